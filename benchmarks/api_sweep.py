@@ -0,0 +1,130 @@
+"""
+Requests/sec of a public API quota sweep against a local aiohttp stand-in for the EcoFlow Open API, served
+over TLS with a throwaway self-signed certificate like the real endpoint is.
+
+Compares the pooled keep-alive session with a session that closes the connection after every request, so
+that every call pays for a new TCP connection and TLS handshake. --plain serves http instead, which only
+shows the TCP setup cost (next to nothing on localhost).
+
+    python -m benchmarks.api_sweep [devices] [sweeps] [--plain]
+"""
+import argparse
+import asyncio
+import datetime
+import ipaddress
+import ssl
+import tempfile
+import time
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from custom_components.ecoflow_cloud.api import EcoflowMqttInfo, HTTP_CONNECTION_LIMIT, HTTP_KEEPALIVE_TIMEOUT
+from custom_components.ecoflow_cloud.api.public_api import EcoflowPublicApiClient
+from custom_components.ecoflow_cloud.api.rate_limiter import EcoflowRateLimiter
+from custom_components.ecoflow_cloud.devices.data_holder import EcoflowDataHolder
+
+HOST = "127.0.0.1"
+
+
+class _StubDevice:
+    def __init__(self):
+        self.data = EcoflowDataHolder()
+
+
+def stand_in_app(sns: list[str]) -> web.Application:
+    async def device_list(request: web.Request):
+        return web.json_response({"code": "0", "message": "Success",
+                                  "data": [{"sn": sn, "productName": "Smart Plug", "online": 1} for sn in sns]})
+
+    async def quota_all(request: web.Request):
+        return web.json_response({"code": "0", "message": "Success",
+                                  "data": {"2_1.watts": 1234, "2_1.volt": 230, "2_1.temp": 31}})
+
+    app = web.Application()
+    app.router.add_get("/iot-open/sign/device/list", device_list)
+    app.router.add_get("/iot-open/sign/device/quota/all", quota_all)
+    return app
+
+
+def self_signed_contexts(directory: Path) -> tuple[ssl.SSLContext, ssl.SSLContext]:
+    """Server context with a fresh certificate for HOST and a client context that trusts only that certificate."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, HOST)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder()
+            .subject_name(name).issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(minutes=1))
+            .not_valid_after(now + datetime.timedelta(hours=1))
+            .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address(HOST))]),
+                           critical=False)
+            .sign(key, hashes.SHA256()))
+    cert_file = directory / "cert.pem"
+    key_file = directory / "key.pem"
+    cert_file.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_file.write_bytes(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                           serialization.NoEncryption()))
+
+    server = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    server.load_cert_chain(cert_file, key_file)
+    client = ssl.create_default_context(cafile=str(cert_file))
+    return server, client
+
+
+async def run_sweeps(base_uri: str, sns: list[str], sweeps: int, session: aiohttp.ClientSession) -> float:
+    client = EcoflowPublicApiClient("access", "secret", "bench", session)
+    client.base_uri = base_uri
+    # measure the transport, not the request budget
+    client.rate_limiter = EcoflowRateLimiter(rate=1e9, burst=10 ** 9)
+    client.mqtt_info = EcoflowMqttInfo("localhost", 8883, "user", "password")
+    client.devices = {sn: _StubDevice() for sn in sns}
+
+    start = time.perf_counter()
+    for _ in range(sweeps):
+        await client.quota_sweep(sns)
+    elapsed = time.perf_counter() - start
+    await client.close()
+    await session.close()
+    return (len(sns) + 1) * sweeps / elapsed
+
+
+async def main(devices: int, sweeps: int, plain: bool):
+    sns = [f"HW52ZDH4SF{i:06d}" for i in range(devices)]
+    with tempfile.TemporaryDirectory() as directory:
+        server_ssl, client_ssl = (None, False) if plain else self_signed_contexts(Path(directory))
+        runner = web.AppRunner(stand_in_app(sns))
+        await runner.setup()
+        site = web.TCPSite(runner, HOST, 0, ssl_context=server_ssl)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        base_uri = f"{'http' if plain else 'https'}://{HOST}:{port}/iot-open/sign"
+
+        try:
+            # the same connector the client builds for itself, only trusting the stand-in's certificate
+            pooled = await run_sweeps(base_uri, sns, sweeps, aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=HTTP_CONNECTION_LIMIT, keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+                                               ssl=client_ssl)))
+            fresh = await run_sweeps(base_uri, sns, sweeps, aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(force_close=True, ssl=client_ssl)))
+        finally:
+            await runner.cleanup()
+
+    print("%s, %d devices, %d sweeps" % ("http" if plain else "https", devices, sweeps))
+    print("%-28s %10.0f req/s" % ("pooled keep-alive session", pooled))
+    print("%-28s %10.0f req/s" % ("connection per request", fresh))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quota sweep throughput, pooled vs fresh connections.")
+    parser.add_argument("devices", nargs="?", type=int, default=30)
+    parser.add_argument("sweeps", nargs="?", type=int, default=20)
+    parser.add_argument("--plain", action="store_true", help="serve http instead of https")
+    args = parser.parse_args()
+    asyncio.run(main(args.devices, args.sweeps, args.plain))
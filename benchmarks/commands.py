@@ -0,0 +1,157 @@
+"""
+Set command round trips through EcoflowMQTTClient against an in-process broker. A responder subscribed to the
+set topic of a Delta 2 answers every command on its set_reply topic with the message id, every --fail-every'th
+one with an error code, and leaves every --drop-every'th one unanswered. Per number of commands kept in flight
+it reports the time to match a reply (it must not grow with the table), the reply counts and how many of the
+optimistic values were rolled back after failures and timeouts. A last check covers a device that applies a
+command and reports the value but sends no set_reply: the timeout must keep the reported value.
+
+    python -m benchmarks.commands [--in-flight 1,100,1000,10000] [--fail-every 10] [--drop-every 25] [--json FILE]
+"""
+import argparse
+import datetime
+import json
+import logging
+import platform
+import time
+from typing import Any
+
+from benchmarks.fake_mqtt import FakeBroker, fake_mqtt
+from benchmarks.load import KIND_INTERNAL, create_device
+from benchmarks.replay import git_revision, percentile
+from custom_components.ecoflow_cloud.api import EcoflowMqttInfo, codec
+from custom_components.ecoflow_cloud.api.ecoflow_mqtt import EcoflowMQTTClient
+
+KEY = "pd.beepMode"
+
+
+class Responder:
+    """Plays the device: collects the set commands and answers them in batches."""
+
+    def __init__(self, broker: FakeBroker, reply_topic: str, fail_every: int, drop_every: int):
+        self.__broker = broker
+        self.__reply_topic = reply_topic
+        self.__fail_every = fail_every
+        self.__drop_every = drop_every
+        self.commands: list[Any] = []
+
+    def deliver(self, topic: str, payload: bytes):
+        self.commands.append(codec.loads(payload)["id"])
+
+    def answer(self) -> list[int]:
+        """Publishes the replies, returns the nanoseconds each one took inside the client."""
+        timings = []
+        for i, command_id in enumerate(self.commands, 1):
+            if self.__drop_every and i % self.__drop_every == 0:
+                continue
+            code = "1" if self.__fail_every and i % self.__fail_every == 0 else "0"
+            reply = codec.dumps({"id": int(command_id), "code": code, "data": {"ack": 0}, "operateType": "TCP"})
+            start = time.perf_counter_ns()
+            self.__broker.publish(self.__reply_topic, reply)
+            timings.append(time.perf_counter_ns() - start)
+        self.commands = []
+        return timings
+
+
+def run_step(in_flight: int, fail_every: int, drop_every: int) -> dict[str, Any]:
+    device = create_device(0, KIND_INTERNAL)
+    info = device.device_info
+    routes = {topic: (device, kind) for topic, kind in info.topic_kinds().items()}
+    broker = FakeBroker()
+    with fake_mqtt(inline_ingest=True, broker=broker):
+        client = EcoflowMQTTClient(EcoflowMqttInfo("localhost", 8883, "user", "password", "commands"),
+                                   {info.sn: device}, routes)
+    responder = Responder(broker, info.set_reply_topic, fail_every, drop_every)
+    broker.subscribe(responder, info.set_topic)
+
+    holder = device.data
+    holder.update_data({"params": {KEY: 0}})
+    for i in range(in_flight):
+        client.send_set_message(info.sn, {f"'{KEY}'": i % 2 + 1}, {"operateType": "TCP", "params": {"id": 38}})
+    pending = holder.commands.pending
+
+    holder.take_changed_keys()
+    timings = responder.answer()
+    rolled_back = KEY in holder.take_changed_keys()
+    holder.commands.timeout = 0
+    holder.expire_commands()
+    stats = holder.commands.stats()
+    client.stop()
+
+    return {
+        "in_flight": in_flight,
+        "pending_before_replies": pending,
+        "match_p50_us": percentile(timings, 50) / 1e3 if timings else None,
+        "match_p99_us": percentile(timings, 99) / 1e3 if timings else None,
+        "acked": stats["acked"],
+        "failed": stats["failed"],
+        "timed_out": stats["timed_out"],
+        "unmatched": stats["unmatched"],
+        "rolled_back_after_failure": rolled_back,
+        "restored_value": holder.params[KEY],
+    }
+
+
+def check_reported_kept() -> bool:
+    device = create_device(0, KIND_INTERNAL)
+    info = device.device_info
+    routes = {topic: (device, kind) for topic, kind in info.topic_kinds().items()}
+    broker = FakeBroker()
+    with fake_mqtt(inline_ingest=True, broker=broker):
+        client = EcoflowMQTTClient(EcoflowMqttInfo("localhost", 8883, "user", "password", "commands"),
+                                   {info.sn: device}, routes)
+    holder = device.data
+    holder.update_data({"params": {KEY: 0}})
+    client.send_set_message(info.sn, {f"'{KEY}'": 1}, {"operateType": "TCP", "params": {"id": 38}})
+    broker.publish(info.data_topic, codec.dumps({"params": {KEY: 1}}))
+    holder.commands.timeout = 0
+    holder.expire_commands()
+    client.stop()
+    return holder.commands.timed_out == 1 and holder.params[KEY] == 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Set command reply matching and rollback.")
+    parser.add_argument("--in-flight", default="1,100,1000,10000",
+                        type=lambda v: [int(c) for c in v.split(",")], help="commands in flight, comma separated")
+    parser.add_argument("--fail-every", type=int, default=10, help="every n-th reply reports an error, 0 for none")
+    parser.add_argument("--drop-every", type=int, default=25, help="every n-th command is not answered, 0 for none")
+    parser.add_argument("--json", dest="json_file", help="write the results to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("custom_components.ecoflow_cloud").setLevel(logging.ERROR)
+    print("%9s %10s %10s %7s %7s %9s %9s" % ("in flight", "match50 us", "match99 us", "acked", "failed",
+                                            "timed out", "unmatched"))
+    results = []
+    for in_flight in args.in_flight:
+        r = run_step(in_flight, args.fail_every, args.drop_every)
+        results.append(r)
+        print("%9d %10.1f %10.1f %7d %7d %9d %9d" % (
+            in_flight, r["match_p50_us"] or 0, r["match_p99_us"] or 0, r["acked"], r["failed"], r["timed_out"],
+            r["unmatched"]))
+
+    reported_kept = check_reported_kept()
+    print("reported value kept after a timeout: %s" % ("yes" if reported_kept else "NO"))
+
+    if args.json_file:
+        output = {
+            "meta": {
+                "revision": git_revision(),
+                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "json_codec": codec.json_codec().name,
+                "fail_every": args.fail_every,
+                "drop_every": args.drop_every,
+            },
+            "results": results,
+            "reported_value_kept": reported_kept,
+        }
+        with open(args.json_file, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+        print("results written to %s" % args.json_file)
+    if not reported_kept:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
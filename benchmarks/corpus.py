@@ -0,0 +1,86 @@
+"""Loads the diagnostic captures in diag/ into flat params dicts, whatever diagnostics layout they were taken with."""
+import json
+import os
+from typing import Any
+
+DIAG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "diag")
+
+# capture file -> (registry, device type) it was taken from
+CAPTURES: dict[str, tuple[str, str]] = {
+    "delta2.json": ("internal", "DELTA_2"),
+    "delta_2_max.json": ("internal", "DELTA_2_MAX"),
+    "delta_mini.json": ("internal", "DELTA_MINI"),
+    "delta_pro.json": ("internal", "DELTA_PRO"),
+    "powerocean.json": ("public", "PowerOcean"),
+    "powerstream.json": ("public", "PowerStream"),
+    "river_2_max.json": ("internal", "RIVER_2_MAX"),
+    "river_max.json": ("internal", "RIVER_MAX"),
+    "river_mini.json": ("internal", "RIVER_MINI"),
+    "river_pro.json": ("internal", "RIVER_PRO"),
+}
+
+
+def load_capture(name: str) -> dict[str, Any]:
+    with open(os.path.join(DIAG_DIR, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_params(name: str) -> dict[str, Any]:
+    data = load_capture(name)["data"]
+    if "params" in data:
+        return dict(data["params"])
+    params = {}
+    for value in data.get("data", data).values():
+        # newer dumps keep params under "data", river_max groups them by module
+        if isinstance(value, dict):
+            params.update(value)
+    if not params and isinstance(data.get("data"), dict):
+        params.update(data["data"])
+    return params
+
+
+def load_raw_messages(name: str) -> list[dict[str, Any]]:
+    """Raw frames kept in diagnostic mode, or a single message carrying all params if none were recorded."""
+    capture = load_capture(name)
+    raw = capture["data"].get("raw_data") or capture.get("raw_data") or []
+    messages = [m for m in raw if isinstance(m, dict) and "params" in m]
+    if not messages:
+        messages = [{"params": load_params(name)}]
+    return messages
+
+
+def load_public_frames(name: str) -> list[dict[str, Any]]:
+    """
+    Re-nests the flat "prefix.key" params of a capture into the envelopes the public API sends:
+    typeCode frames for "pd.*"/"bms_bmsStatus.*"..., cmdFunc/cmdId frames for "20_1.*"...
+    """
+    from custom_components.ecoflow_cloud.devices.public.data_bridge import plain_to_status
+
+    groups: dict[str, dict[str, Any]] = {}
+    for key, value in load_params(name).items():
+        prefix, _, sub_key = key.rpartition(".")
+        if prefix:
+            groups.setdefault(prefix, {})[sub_key] = value
+
+    frames = []
+    for prefix, params in groups.items():
+        if prefix in plain_to_status:
+            frames.append({"typeCode": plain_to_status[prefix], "params": params,
+                           "cmdId": 1, "version": "1.0", "timestamp": 1700000000000})
+        elif "_" in prefix and all(p.isdigit() for p in prefix.split("_", 1)):
+            cmd_func, cmd_id = prefix.split("_", 1)
+            frames.append({"cmdFunc": int(cmd_func), "cmdId": int(cmd_id), "param": params,
+                           "addr": "ems", "version": "1.0", "timestamp": 1700000000000})
+    return frames
+
+
+def load_replay_messages(name: str) -> list[dict[str, Any]]:
+    """Messages as the device of a capture receives them on its data topic."""
+    registry, _ = CAPTURES[name]
+    if registry == "internal":
+        return load_raw_messages(name)
+    frames = load_public_frames(name)
+    if not frames:
+        # PowerOcean reports flat keys in the quota envelope of the Open API
+        frames = [{"code": "0", "message": "Success", "data": load_params(name)}]
+    return frames
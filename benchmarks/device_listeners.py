@@ -0,0 +1,77 @@
+"""
+Cost of the per-device coordinator listeners set up by sensor.async_setup_entry: battery pack discovery
+reads per coordinator round and time per round, for a growing number of PowerOcean devices. Each round should
+cost one read per device. That each listener only reads its own device is checked in
+tests/test_device_listeners.py.
+
+    python -m benchmarks.device_listeners [max devices]
+"""
+import asyncio
+import datetime
+import sys
+import timeit
+from collections import Counter
+from typing import Any, Callable
+from unittest.mock import Mock
+
+from benchmarks.stubs import CountingDataHolder, quota_message
+from custom_components.ecoflow_cloud import ECOFLOW_DOMAIN
+from custom_components.ecoflow_cloud.devices import EcoflowDeviceInfo, EcoflowDeviceListeners
+from custom_components.ecoflow_cloud.devices.public.powerocean import PowerOcean
+from custom_components.ecoflow_cloud.sensor import async_setup_entry
+
+
+class FakeCoordinator:
+    def __init__(self):
+        self.listeners: list[Callable[[], None]] = []
+        self.refresh_interval = datetime.timedelta(seconds=30)
+
+    def async_add_listener(self, listener: Callable[[], None], context: Any = None) -> Callable[[], None]:
+        if context is None:
+            self.listeners.append(listener)
+        return lambda: self.listeners.remove(listener) if listener in self.listeners else None
+
+    def fire(self):
+        for listener in list(self.listeners):
+            listener()
+
+
+def setup(device_count: int) -> tuple[dict[str, PowerOcean], EcoflowDeviceListeners, Counter, list]:
+    reads: Counter = Counter()
+    devices: dict[str, PowerOcean] = {}
+    for i in range(device_count):
+        sn = f"PO{i:03d}"
+        device = PowerOcean(EcoflowDeviceInfo(public_api=True, sn=sn, name=sn, device_type="PowerOcean", status=1,
+                                              data_topic=f"/open/{sn}/quota", set_topic="S", set_reply_topic="R",
+                                              get_topic=None, get_reply_topic=None))
+        device.coordinator = FakeCoordinator()
+        device.data = CountingDataHolder(sn, reads)
+        # each device reports its own battery packs
+        device.data.update_data(device._prepare_data(quota_message([f"{sn}-BAT{j}" for j in range(2)])))
+        devices[sn] = device
+
+    client = Mock(devices=devices, device_listeners=EcoflowDeviceListeners())
+    hass = Mock(data={ECOFLOW_DOMAIN: {"entry": client}})
+    added: list = []
+    asyncio.run(async_setup_entry(hass, Mock(entry_id="entry"), added.extend))
+    return devices, client.device_listeners, reads, added
+
+
+def main(max_devices: int = 12):
+    print("%8s %14s %14s" % ("devices", "reads/round", "us/round"))
+    for count in (1, 2, 3, max_devices // 2, max_devices):
+        devices, listeners, reads, _ = setup(count)
+        reads.clear()
+
+        def round_all():
+            for device in devices.values():
+                device.coordinator.fire()
+
+        number = 2000
+        elapsed = timeit.timeit(round_all, number=number)
+        print("%8d %14.1f %14.2f" % (count, sum(reads.values()) / number, elapsed / number * 1e6))
+        listeners.remove_all()
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:2]])
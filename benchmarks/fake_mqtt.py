@@ -0,0 +1,168 @@
+"""
+Stand-ins for the paho based AsyncMQTTClient, so EcoflowMQTTClient can be built without a broker,
+an in-process broker that routes published messages to the subscribed fake clients,
+and an ingest pipeline that handles each message on the calling thread.
+"""
+import contextlib
+import sys
+import time
+import types
+from typing import Any, Iterator
+from unittest.mock import patch
+
+from custom_components.ecoflow_cloud.api import ecoflow_mqtt
+from custom_components.ecoflow_cloud.api.ingest import EcoflowIngestPipeline
+
+
+class FakeMessage:
+    __slots__ = ("topic", "payload", "qos", "retain")
+
+    def __init__(self, topic: str, payload: bytes, qos: int = 1):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = False
+
+
+class FakePublishInfo:
+    def __init__(self, mid: int):
+        self.mid = mid
+        self.rc = 0
+
+    def is_published(self) -> bool:
+        return True
+
+
+class FakeBroker:
+    """
+    Routes messages to the fake clients subscribed to the topic (EcoFlow topics have no wildcards).
+    publish() calls on_message on the calling thread, so a publishing thread plays paho's network thread.
+    """
+
+    def __init__(self):
+        self.__subscribers: dict[str, list["FakeMQTTClient"]] = {}
+        self.delivered = 0
+        self.unrouted = 0
+
+    def subscribe(self, client: "FakeMQTTClient", topic: str):
+        self.__subscribers.setdefault(topic, []).append(client)
+
+    def unsubscribe(self, client: "FakeMQTTClient", topic: str):
+        clients = self.__subscribers.get(topic, [])
+        if client in clients:
+            clients.remove(client)
+
+    def publish(self, topic: str, payload: bytes):
+        clients = self.__subscribers.get(topic)
+        if not clients:
+            self.unrouted += 1
+            return
+        for client in clients:
+            client.deliver(topic, payload)
+            self.delivered += 1
+
+
+class FakeMQTTClient:
+    """The subset of the paho client EcoflowMQTTClient uses; connects instantly and records what is published."""
+
+    broker: FakeBroker | None = None
+
+    def __init__(self, client_id: str | None = None, **kwargs):
+        self.client_id = client_id
+        self.on_connect = None
+        self.on_disconnect = None
+        self.on_message = None
+        self.on_socket_close = None
+        self.subscriptions: list[str] = []
+        self.published: list[tuple[str, bytes]] = []
+        self.__connected = False
+
+    def setup(self):
+        pass
+
+    def username_pw_set(self, username: str, password: str):
+        pass
+
+    def tls_set(self, **kwargs):
+        pass
+
+    def tls_insecure_set(self, value: bool):
+        pass
+
+    def connect(self, host: str, port: int, keepalive: int = 60):
+        self.__connected = True
+
+    def reconnect(self):
+        self.__connected = True
+
+    def loop_start(self):
+        if self.on_connect is not None:
+            self.on_connect(self, None, {}, 0)
+
+    def loop_stop(self, force: bool = False):
+        pass
+
+    def disconnect(self):
+        self.__connected = False
+
+    def is_connected(self) -> bool:
+        return self.__connected
+
+    def subscribe(self, topics: list[tuple[str, int]]):
+        for topic, _ in topics:
+            self.subscriptions.append(topic)
+            if self.broker is not None:
+                self.broker.subscribe(self, topic)
+
+    def unsubscribe(self, topics: list[str]):
+        for topic in topics:
+            if topic in self.subscriptions:
+                self.subscriptions.remove(topic)
+            if self.broker is not None:
+                self.broker.unsubscribe(self, topic)
+
+    def publish(self, topic: str, payload: bytes, qos: int = 0) -> FakePublishInfo:
+        self.published.append((topic, payload))
+        if self.broker is not None:
+            self.broker.publish(topic, payload)
+        return FakePublishInfo(len(self.published))
+
+    def deliver(self, topic: str, payload: bytes):
+        """Hands a message to on_message the way the paho network thread does."""
+        self.on_message(self, None, FakeMessage(topic, payload))
+
+
+class InlineIngestPipeline(EcoflowIngestPipeline):
+    """Processes every message inside submit(): no worker thread, so the whole ingest path can be timed per message."""
+
+    def __init__(self, handler, *args: Any):
+        super().__init__(handler, *args)
+        self.__inline_handler = handler
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def submit(self, topic: str, payload: Any) -> bool:
+        self.received += 1
+        self.__inline_handler(topic, payload, time.monotonic())
+        self.processed += 1
+        return True
+
+
+@contextlib.contextmanager
+def fake_mqtt(inline_ingest: bool = False, broker: FakeBroker | None = None) -> Iterator[None]:
+    """
+    EcoflowMQTTClient instances created inside use FakeMQTTClient, connected to `broker` if given,
+    and optionally InlineIngestPipeline.
+    """
+    with contextlib.ExitStack() as stack:
+        # replaces the whole module: it only exists in newer Home Assistant releases
+        async_client = types.ModuleType("homeassistant.components.mqtt.async_client")
+        async_client.AsyncMQTTClient = type("FakeMQTTClient", (FakeMQTTClient,), {"broker": broker})
+        stack.enter_context(patch.dict(sys.modules, {async_client.__name__: async_client}))
+        if inline_ingest:
+            stack.enter_context(patch.object(ecoflow_mqtt, "EcoflowIngestPipeline", InlineIngestPipeline))
+        yield
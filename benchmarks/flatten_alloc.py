@@ -0,0 +1,87 @@
+"""
+Allocations of data_bridge.to_plain per public API message, replaying Delta 2 and PowerStream
+frames rebuilt from the diag captures, compared with the previous implementation (new f-string per key,
+envelope copied into a second dict).
+
+    python -m benchmarks.flatten_alloc [messages]
+"""
+import sys
+import timeit
+import tracemalloc
+from typing import Any
+
+from benchmarks.corpus import load_public_frames
+from custom_components.ecoflow_cloud.devices.public.data_bridge import status_to_plain, to_plain
+
+KEPT_MESSAGES = 20  # like the message history of a device in diagnostic mode
+
+
+def legacy_to_plain(raw_data: dict[str, Any]) -> dict[str, Any]:
+    if "typeCode" in raw_data:
+        prefix = status_to_plain.get(raw_data["typeCode"], "unknown_" + raw_data["typeCode"])
+    elif "cmdFunc" in raw_data and "cmdId" in raw_data:
+        prefix = f"{raw_data['cmdFunc']}_{raw_data['cmdId']}"
+    else:
+        return raw_data
+    new_params = {}
+    for name in ("params", "param"):
+        if name in raw_data:
+            for (k, v) in raw_data[name].items():
+                new_params[f"{prefix}.{k}"] = v
+    result = {"params": new_params}
+    for (k, v) in raw_data.items():
+        if k != "param" and k != "params":
+            result[k] = v
+    return result
+
+
+def measure(fn, frames: list[dict[str, Any]], messages: int) -> tuple[float, float]:
+    """Time per message and peak traced memory while the last KEPT_MESSAGES results are kept."""
+    replay = [frames[i % len(frames)] for i in range(messages)]
+    for frame in frames:
+        fn(frame)  # warm up caches
+
+    kept: list[Any] = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for frame in replay:
+        kept.append(fn(frame))
+        if len(kept) > KEPT_MESSAGES:
+            kept.pop(0)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    elapsed = timeit.timeit(lambda: [fn(f) for f in replay], number=1)
+    return elapsed / messages * 1e6, (peak - before) / 1024
+
+
+def retained_per_message(fn, frames: list[dict[str, Any]]) -> tuple[float, float]:
+    """Bytes and memory blocks held by one kept result: keys are either shared with the cache or new strings."""
+    for frame in frames:
+        fn(frame)
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+    kept = [fn(frame) for frame in frames]
+    snapshot_after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del kept
+    stats = snapshot_after.compare_to(snapshot_before, "filename")
+    size = sum(s.size_diff for s in stats if s.traceback[0].filename != tracemalloc.__file__)
+    blocks = sum(s.count_diff for s in stats if s.traceback[0].filename != tracemalloc.__file__)
+    return size / len(frames), blocks / len(frames)
+
+
+def main(messages: int = 20000):
+    for capture in ("delta2.json", "powerstream.json"):
+        frames = load_public_frames(capture)
+        keys = sum(len(f.get("params", f.get("param", {}))) for f in frames)
+        print("%s: %d frames, %d keys" % (capture, len(frames), keys))
+        for name, fn in (("legacy", legacy_to_plain), ("cached keys", to_plain)):
+            us, peak_kb = measure(fn, frames, messages)
+            size, blocks = retained_per_message(fn, frames)
+            print("  %-12s %8.2f us/msg %8.0f B %6.1f blocks retained/msg %8.1f kB peak with %d kept"
+                  % (name, us, size, blocks, peak_kb, KEPT_MESSAGES))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:2]])
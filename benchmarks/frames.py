@@ -0,0 +1,33 @@
+"""Synthetic MQTT frames shared by the benchmark scripts."""
+
+
+def powerstream_heartbeat(seed: int = 0) -> bytes:
+    """One InverterHeartbeat wrapped in a SendHeaderMsg, as sent on /app/device/property/{sn}."""
+    from custom_components.ecoflow_cloud.devices.internal.proto import ecopacket_pb2 as ecopacket, \
+        powerstream_pb2 as powerstream
+
+    heartbeat = powerstream.InverterHeartbeat()
+    heartbeat.pv1_input_volt = 331 + seed % 7
+    heartbeat.pv1_input_cur = 42 + seed % 5
+    heartbeat.pv1_input_watts = 1388 + seed % 11
+    heartbeat.pv1_temp = 310
+    heartbeat.pv2_input_volt = 329
+    heartbeat.pv2_input_cur = 40
+    heartbeat.pv2_input_watts = 1320 + seed % 13
+    heartbeat.pv2_temp = 305
+    heartbeat.bat_input_volt = 524
+    heartbeat.bat_soc = 54
+    heartbeat.bat_temp = 320
+    heartbeat.inv_output_watts = 2650 + seed % 17
+    heartbeat.inv_op_volt = 2301
+    heartbeat.inv_freq = 500
+    heartbeat.inv_temp = 380
+    heartbeat.permanent_watts = 1200
+    heartbeat.dynamic_watts = 0
+
+    packet = ecopacket.SendHeaderMsg()
+    packet.msg.cmd_id = 1
+    packet.msg.cmd_func = 20
+    packet.msg.pdata = heartbeat.SerializeToString()
+    packet.msg.data_len = len(packet.msg.pdata)
+    return packet.SerializeToString()
@@ -0,0 +1,57 @@
+"""
+JSON payload parsing over the diag/*.json corpus: the previous decode-to-str + json.loads,
+the stdlib parsing bytes directly and orjson (when installed), plus command serialization.
+
+    python -m benchmarks.json_codec [rounds]
+"""
+import json
+import sys
+import timeit
+
+from benchmarks.corpus import CAPTURES, load_raw_messages
+from custom_components.ecoflow_cloud.api.codec import EcoflowJsonCodec, EcoflowOrjsonCodec
+
+COMMAND = {"from": "HomeAssistant", "id": "999912345", "version": "1.0",
+           "moduleType": 5, "operateType": "acOutCfg",
+           "params": {"enabled": 1, "xboost": 1, "out_voltage": -1, "out_freq": 255}}
+
+
+def codecs() -> list[EcoflowJsonCodec]:
+    result = [EcoflowJsonCodec()]
+    try:
+        result.append(EcoflowOrjsonCodec())
+    except ImportError:
+        print("orjson not installed, skipping it")
+    return result
+
+
+def main(rounds: int = 50):
+    payloads = []
+    for name in CAPTURES:
+        payloads.extend(json.dumps(m).encode("utf-8") for m in load_raw_messages(name))
+    total = sum(len(p) for p in payloads)
+    print("%d payloads from %d captures, %.1f kB" % (len(payloads), len(CAPTURES), total / 1024))
+
+    def decode_then_loads():
+        for p in payloads:
+            json.loads(p.decode("utf-8"))
+
+    candidates = [("str + json.loads", decode_then_loads)]
+    for c in codecs():
+        candidates.append(("%s bytes" % c.name, lambda c=c: [c.loads(p) for p in payloads]))
+
+    for name, fn in candidates:
+        elapsed = timeit.timeit(fn, number=rounds) / rounds
+        print("%-20s %8.1f us/payload %8.1f MB/s" % (name, elapsed / len(payloads) * 1e6, total / elapsed / 1e6))
+
+    print()
+    number = 20000
+    elapsed = timeit.timeit(lambda: json.dumps(COMMAND), number=number)
+    print("%-20s %8.2f us/command" % ("json.dumps (str)", elapsed / number * 1e6))
+    for c in codecs():
+        elapsed = timeit.timeit(lambda: c.dumps(COMMAND), number=number)
+        print("%-20s %8.2f us/command" % ("%s dumps" % c.name, elapsed / number * 1e6))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:2]])
@@ -0,0 +1,50 @@
+"""
+Cost of EcoFlowDictEntity._updated on the attribute-heavy Delta Pro sensors,
+compared with parsing every key with jsonpath_ng on each update (the previous behaviour).
+
+    python -m benchmarks.key_access [rounds]
+"""
+import datetime
+import sys
+import timeit
+from unittest.mock import Mock
+
+import jsonpath_ng.ext as jp
+
+from benchmarks.corpus import load_params
+from custom_components.ecoflow_cloud.devices import EcoflowDeviceInfo
+from custom_components.ecoflow_cloud.devices.internal.delta_pro import DeltaPro
+from custom_components.ecoflow_cloud.entities import EcoFlowDictEntity
+
+
+def main(rounds: int = 200):
+    device = DeltaPro(EcoflowDeviceInfo(public_api=False, sn="SN", name="DELTA Pro", device_type="DELTA_PRO", status=1,
+                                        data_topic="DATA_TOPIC", set_topic="SET_TOPIC",
+                                        set_reply_topic="SET_REPLY_TOPIC", get_topic=None, get_reply_topic=None))
+    device.coordinator = Mock(refresh_interval=datetime.timedelta(seconds=30))
+    params = load_params("delta_pro.json")
+    sensors = [s for s in device.sensors(Mock()) if isinstance(s, EcoFlowDictEntity)]
+    for s in sensors:
+        s.schedule_update_ha_state = lambda *args, **kwargs: None
+
+    keys = []
+    for s in sensors:
+        keys.append(s._adopt_json_key(s.mqtt_key))
+        keys.extend(s._adopt_json_key(k) for k in s._EcoFlowDictEntity__attributes_mapping.keys())
+
+    def compiled():
+        for s in sensors:
+            s._updated(params)
+
+    def parse_every_time():
+        for key in keys:
+            jp.parse(key).find(params)
+
+    print("%d sensors, %d key lookups per update" % (len(sensors), len(keys)))
+    for name, fn in (("compiled accessors", compiled), ("jsonpath parse", parse_every_time)):
+        elapsed = timeit.timeit(fn, number=rounds)
+        print("%-20s %10.1f us/update" % (name, elapsed / rounds * 1e6))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:2]])
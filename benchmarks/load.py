@@ -0,0 +1,237 @@
+"""
+End-to-end ingest throughput of EcoflowMQTTClient against an in-process broker, for 1 to 500 simulated devices.
+
+A generator thread plays paho's network thread: it publishes for every device at the configured rate on
+/app/device/property/{sn} (internal API) or /open/{user}/{sn}/quota (public API) and the broker calls
+EcoflowMQTTClient._on_message on that same thread. The real ingest pipeline hands the messages to its worker,
+which decodes them and updates the device data holders.
+
+Per device count it reports the rate the network thread managed to offer, how busy it was inside on_message,
+the rate the worker processed (until the queue was drained), drops and the deepest queue. The network thread
+saturates when it can no longer offer the target rate, the worker when messages are dropped or it falls behind.
+--rate 0 publishes as fast as possible.
+
+    python -m benchmarks.load [--devices 1,10,50,100,250,500] [--rate 20] [--seconds 2]
+                              [--mix internal=2,protobuf=1,public=1] [--queue-size 1000] [--json FILE]
+"""
+import argparse
+import datetime
+import itertools
+import json
+import logging
+import platform
+import threading
+import time
+from typing import Any
+
+from benchmarks.corpus import load_public_frames, load_raw_messages
+from benchmarks.fake_mqtt import FakeBroker, fake_mqtt
+from benchmarks.frames import powerstream_heartbeat
+from benchmarks.replay import git_revision, jitter
+from custom_components.ecoflow_cloud.api import EcoflowMqttInfo, codec
+from custom_components.ecoflow_cloud.api.ecoflow_mqtt import EcoflowMQTTClient
+from custom_components.ecoflow_cloud.api.ingest import DEFAULT_INGEST_QUEUE_SIZE
+from custom_components.ecoflow_cloud.devices import BaseDevice, EcoflowDeviceInfo
+from custom_components.ecoflow_cloud.devices import registry
+from custom_components.ecoflow_cloud.devices.data_holder import EcoflowDataHolder
+
+USER = "load-user"
+PAYLOAD_VARIANTS = 8
+
+KIND_INTERNAL = "internal"  # Delta 2 JSON on the internal API
+KIND_PROTOBUF = "protobuf"  # PowerStream heartbeats on the internal API
+KIND_PUBLIC = "public"  # Delta 2 JSON frames on the public API
+KINDS = [KIND_INTERNAL, KIND_PROTOBUF, KIND_PUBLIC]
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    weights = {}
+    for part in mix.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in KINDS:
+            raise argparse.ArgumentTypeError("unknown device kind %s, expected one of %s" % (kind, KINDS))
+        weights[kind] = int(weight or 1)
+    return weights
+
+
+def device_kinds(count: int, mix: dict[str, int]) -> list[str]:
+    pattern = [kind for kind, weight in mix.items() for _ in range(weight)]
+    return list(itertools.islice(itertools.cycle(pattern), count))
+
+
+def create_device(index: int, kind: str) -> BaseDevice:
+    sn = "LOAD%012d" % index
+    if kind == KIND_PUBLIC:
+        info = EcoflowDeviceInfo(public_api=True, sn=sn, name=sn, device_type="DELTA 2", status=1,
+                                 data_topic=f"/open/{USER}/{sn}/quota", set_topic=f"/open/{USER}/{sn}/set",
+                                 set_reply_topic=f"/open/{USER}/{sn}/set_reply", get_topic=None,
+                                 get_reply_topic=None, status_topic=f"/open/{USER}/{sn}/status")
+        device = registry.device_by_product["DELTA 2"](info)
+    else:
+        device_type = "POWERSTREAM" if kind == KIND_PROTOBUF else "DELTA_2"
+        info = EcoflowDeviceInfo(public_api=False, sn=sn, name=sn, device_type=device_type, status=1,
+                                 data_topic=f"/app/device/property/{sn}", set_topic=f"/app/{USER}/{sn}/thing/set",
+                                 set_reply_topic=f"/app/{USER}/{sn}/thing/set_reply",
+                                 get_topic=f"/app/{USER}/{sn}/thing/get",
+                                 get_reply_topic=f"/app/{USER}/{sn}/thing/get_reply")
+        device = registry.devices[device_type](info)
+    # the ingest path only needs the data holder, entity updates are measured by benchmarks.replay
+    device.data = EcoflowDataHolder()
+    return device
+
+
+def payload_variants() -> dict[str, list[bytes]]:
+    internal = load_raw_messages("delta2.json")[0]
+    public = load_public_frames("delta2.json")
+    return {
+        KIND_INTERNAL: [codec.dumps(jitter(internal, r, [0])) for r in range(PAYLOAD_VARIANTS)],
+        KIND_PROTOBUF: [powerstream_heartbeat(r) for r in range(PAYLOAD_VARIANTS)],
+        KIND_PUBLIC: [codec.dumps(jitter(public[r % len(public)], r, [0])) for r in range(PAYLOAD_VARIANTS)],
+    }
+
+
+class LoadGenerator(threading.Thread):
+    """Publishes round robin over all devices, message i is due at i / total rate (rate 0: no pacing)."""
+
+    def __init__(self, broker: FakeBroker, messages: list[tuple[str, list[bytes]]], rate: float, seconds: float):
+        super().__init__(name="load-network", daemon=True)
+        self.__broker = broker
+        self.__messages = messages
+        self.__rate = rate
+        self.__seconds = seconds
+        self.offered = 0
+        self.busy = 0.0
+        self.elapsed = 0.0
+
+    def run(self):
+        broker = self.__broker
+        messages = self.__messages
+        perf_counter = time.perf_counter
+        start = perf_counter()
+        end = start + self.__seconds
+        interval = 1 / self.__rate if self.__rate > 0 else 0.0
+        sent = 0
+        busy = 0.0
+        now = start
+        while now < end:
+            due = start + sent * interval
+            if due > now:
+                if due - now > 0.001:
+                    time.sleep(due - now - 0.0005)
+                now = perf_counter()
+                continue
+            topic, variants = messages[sent % len(messages)]
+            payload = variants[(sent // len(messages)) % len(variants)]
+            broker.publish(topic, payload)
+            sent += 1
+            after = perf_counter()
+            busy += after - now
+            now = after
+        self.offered = sent
+        self.busy = busy
+        self.elapsed = perf_counter() - start
+
+
+def wait_drained(client: EcoflowMQTTClient, timeout: float) -> float:
+    """Seconds until every received message was processed, dropped or failed."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        stats = client.ingest_stats()
+        if stats["processed"] + stats["dropped"] + stats["failed"] >= stats["received"]:
+            break
+        time.sleep(0.001)
+    return time.perf_counter() - start
+
+
+def run_step(count: int, rate: float, seconds: float, mix: dict[str, int], queue_size: int,
+             variants: dict[str, list[bytes]]) -> dict[str, Any]:
+    kinds = device_kinds(count, mix)
+    devices = {d.device_info.sn: d for d in (create_device(i, kind) for i, kind in enumerate(kinds))}
+    routes = {topic: (device, kind) for device in devices.values()
+              for topic, kind in device.device_info.topic_kinds().items()}
+    messages = [(device.device_info.data_topic, variants[kind]) for device, kind in zip(devices.values(), kinds)]
+
+    broker = FakeBroker()
+    with fake_mqtt(broker=broker):
+        client = EcoflowMQTTClient(EcoflowMqttInfo("localhost", 8883, "user", "password", "load"),
+                                   devices, routes, ingest_queue_size=queue_size)
+    generator = LoadGenerator(broker, messages, count * rate, seconds)
+    start = time.perf_counter()
+    generator.start()
+    generator.join()
+    drain = wait_drained(client, timeout=60)
+    total = time.perf_counter() - start
+    stats = client.ingest_stats()
+    client.stop()
+
+    target = count * rate
+    offered = generator.offered / generator.elapsed
+    processed = stats["processed"] / total
+    return {
+        "devices": count,
+        "target_msgs_per_sec": target,
+        "offered_msgs_per_sec": offered,
+        "network_busy_pct": 100 * generator.busy / generator.elapsed,
+        "processed_msgs_per_sec": processed,
+        "drain_ms": drain * 1e3,
+        "received": stats["received"],
+        "dropped": stats["dropped"],
+        "failed": stats["failed"],
+        "max_queue_depth": stats["queue_max_depth"],
+        "network_saturated": rate > 0 and offered < 0.95 * target,
+        "worker_saturated": stats["dropped"] > 0 or processed < 0.95 * offered,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end MQTT ingest throughput for N simulated devices.")
+    parser.add_argument("--devices", default="1,10,50,100,250,500",
+                        type=lambda v: [int(c) for c in v.split(",")], help="device counts, comma separated")
+    parser.add_argument("--rate", type=float, default=20, help="messages/s per device, 0 for no pacing")
+    parser.add_argument("--seconds", type=float, default=2, help="publishing time per device count")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("internal=2,protobuf=1,public=1"),
+                        help="weights of the device kinds %s" % KINDS)
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_INGEST_QUEUE_SIZE, help="ingest queue size")
+    parser.add_argument("--json", dest="json_file", help="write the results to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("custom_components.ecoflow_cloud").setLevel(logging.ERROR)
+    variants = payload_variants()
+    print("mix %s, %g msg/s per device, %g s per step, queue size %d"
+          % (args.mix, args.rate, args.seconds, args.queue_size))
+    print("%7s %9s %9s %7s %10s %8s %8s %7s  %s" % ("devices", "target/s", "offered/s", "net %", "processed/s",
+                                                   "drain ms", "dropped", "depth", "saturated"))
+    results = []
+    for count in args.devices:
+        r = run_step(count, args.rate, args.seconds, args.mix, args.queue_size, variants)
+        results.append(r)
+        saturated = ",".join(n for n, flag in (("network", r["network_saturated"]),
+                                                ("worker", r["worker_saturated"])) if flag)
+        print("%7d %9.0f %9.0f %7.1f %10.0f %8.1f %8d %7d  %s" % (
+            count, r["target_msgs_per_sec"], r["offered_msgs_per_sec"], r["network_busy_pct"],
+            r["processed_msgs_per_sec"], r["drain_ms"], r["dropped"], r["max_queue_depth"], saturated or "-"))
+
+    first = next((r["devices"] for r in results if r["network_saturated"] or r["worker_saturated"]), None)
+    print("saturation from %s devices" % first if first else "no saturation up to %d devices" % max(args.devices))
+
+    if args.json_file:
+        output = {
+            "meta": {
+                "revision": git_revision(),
+                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "json_codec": codec.json_codec().name,
+                "rate": args.rate,
+                "seconds": args.seconds,
+                "mix": args.mix,
+                "queue_size": args.queue_size,
+            },
+            "results": results,
+        }
+        with open(args.json_file, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+        print("results written to %s" % args.json_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Decode cost of PowerStream heartbeats.
+
+- single frame: raw protobuf routing vs. a JSON-wrapped round trip
+- replay: throughput over a capture of distinct heartbeats (every 4th payload carries two concatenated frames)
+
+Each is measured with the device's reusable decoders and with the previous decoding as the baseline, which
+builds new SendHeaderMsg/InverterHeartbeat messages for every frame and copies the fields via HasField.
+
+    python -m benchmarks.powerstream_decode [iterations]
+"""
+import base64
+import json
+import sys
+import time
+import timeit
+
+from benchmarks.frames import powerstream_heartbeat
+from custom_components.ecoflow_cloud.devices import EcoflowDeviceInfo
+from custom_components.ecoflow_cloud.devices.internal.powerstream import PowerStream
+from custom_components.ecoflow_cloud.devices.internal.proto import ecopacket_pb2 as ecopacket, \
+    powerstream_pb2 as powerstream
+from custom_components.ecoflow_cloud.devices.internal.proto.decoder import _read_varint
+
+
+def parse_per_frame(payload: bytes) -> dict:
+    """The baseline: fresh messages for every frame and a HasField check per declared field."""
+    raw = {"params": {}}
+    offset = 0
+    while offset < len(payload):
+        length, start = _read_varint(payload, offset + 1)
+        packet = ecopacket.SendHeaderMsg()
+        packet.ParseFromString(payload[offset:start + length])
+        offset = start + length
+        if packet.msg.cmd_id != 1:
+            continue
+        heartbeat = powerstream.InverterHeartbeat()
+        heartbeat.ParseFromString(packet.msg.pdata)
+        for descriptor in heartbeat.DESCRIPTOR.fields:
+            if heartbeat.HasField(descriptor.name):
+                raw["params"][descriptor.name] = getattr(heartbeat, descriptor.name)
+    return raw
+
+
+def replay_capture(size: int = 1000) -> list[bytes]:
+    capture = []
+    for i in range(size):
+        frame = powerstream_heartbeat(i)
+        capture.append(frame + powerstream_heartbeat(i + 1) if i % 4 == 0 else frame)
+    return capture
+
+
+def main(iterations: int = 20000):
+    device = PowerStream(EcoflowDeviceInfo(public_api=False, sn="SN", name="PowerStream", device_type="POWERSTREAM",
+                                           status=1, data_topic="DATA_TOPIC", set_topic="SET_TOPIC",
+                                           set_reply_topic="SET_REPLY_TOPIC", get_topic=None, get_reply_topic=None))
+    frame = powerstream_heartbeat()
+    wrapped = json.dumps({"payload": base64.b64encode(frame).decode("ascii")}).encode("utf-8")
+
+    assert parse_per_frame(frame)["params"] == device._prepare_data(frame)["params"]
+
+    for label, decode in (("reused decoders", device._prepare_data), ("baseline", parse_per_frame)):
+        def direct():
+            decode(frame)
+
+        def round_trip():
+            decode(base64.b64decode(json.loads(wrapped.decode("utf-8"))["payload"]))
+
+        for name, fn in (("protobuf (direct)", direct), ("json round trip", round_trip)):
+            elapsed = timeit.timeit(fn, number=iterations)
+            print("%-16s %-20s %8.2f us/frame  %10.0f frames/s" % (
+                label, name, elapsed / iterations * 1e6, iterations / elapsed))
+
+        capture = replay_capture()
+        frames = sum(2 if i % 4 == 0 else 1 for i in range(len(capture)))
+        rounds = max(iterations // len(capture), 1)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for payload in capture:
+                decode(payload)
+        elapsed = time.perf_counter() - start
+        print("%-16s %-20s %8.2f us/frame  %10.0f frames/s" % (
+            label, "replay", elapsed / (frames * rounds) * 1e6, frames * rounds / elapsed))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:2]])
@@ -0,0 +1,242 @@
+"""
+Offline replay of the diag/*.json captures through the MQTT hot path. For every capture the matching class
+from devices/registry.py is set up with a stub hass and all of its entities, then the captured messages are
+fed to EcoflowMQTTClient._on_message (-> _process_message -> BaseDevice.dispatch_data -> holder update) and
+each message is followed by a coordinator refresh, which updates the entities. Between rounds a quarter of
+the numeric values change, so entity updates and state writes happen as with live telemetry.
+
+Reports messages/s, p50/p99 latency and traced memory per message for every device type. --json writes
+the results to a file, --compare prints the change against such a file from an earlier commit.
+
+    python -m benchmarks.replay [--rounds N] [--json FILE] [--compare FILE] [capture ...]
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from typing import Any
+
+from benchmarks.corpus import CAPTURES, load_replay_messages
+from benchmarks.fake_mqtt import FakeMessage, fake_mqtt
+from benchmarks.stubs import StubHass
+from custom_components.ecoflow_cloud.api import EcoflowMqttInfo, codec
+from custom_components.ecoflow_cloud.api.ecoflow_mqtt import EcoflowMQTTClient
+from custom_components.ecoflow_cloud.devices import BaseDevice, EcoflowDeviceInfo, EcoflowDeviceUpdateCoordinator
+from custom_components.ecoflow_cloud.devices import registry
+from custom_components.ecoflow_cloud.devices.data_holder import EcoflowDataHolder
+from custom_components.ecoflow_cloud.entities import EcoFlowDictEntity
+
+SN = "REPLAY0000000001"
+
+
+def create_device(hass: StubHass, capture: str) -> BaseDevice:
+    kind, device_type = CAPTURES[capture]
+    public = kind == "public"
+    device_cls = (registry.device_by_product if public else registry.devices)[device_type]
+    if public:
+        info = EcoflowDeviceInfo(public_api=True, sn=SN, name=device_type, device_type=device_type, status=1,
+                                 data_topic=f"/open/replay/{SN}/quota", set_topic=f"/open/replay/{SN}/set",
+                                 set_reply_topic=f"/open/replay/{SN}/set_reply",
+                                 get_topic=None, get_reply_topic=None, status_topic=f"/open/replay/{SN}/status")
+    else:
+        info = EcoflowDeviceInfo(public_api=False, sn=SN, name=device_type, device_type=device_type, status=1,
+                                 data_topic=f"/app/device/property/{SN}", set_topic=f"/app/replay/thing/{SN}/set",
+                                 set_reply_topic=f"/app/replay/thing/{SN}/set_reply",
+                                 get_topic=f"/app/replay/thing/{SN}/get",
+                                 get_reply_topic=f"/app/replay/thing/{SN}/get_reply")
+    device = device_cls(info)
+    # what BaseDevice.configure sets up, without the first refresh against the cloud
+    device.data = EcoflowDataHolder()
+    device.coordinator = EcoflowDeviceUpdateCoordinator(hass, device.data, 30, None)
+    return device
+
+
+class StateWrites:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+async def add_entities(hass: StubHass, device: BaseDevice, writes: StateWrites) -> list[EcoFlowDictEntity]:
+    client = object()  # entities only keep a reference for sending commands
+    entities = [*device.sensors(client), *device.numbers(client), *device.switches(client),
+                *device.selects(client), *device.buttons(client)]
+    entities = [e for e in entities if isinstance(e, EcoFlowDictEntity)]
+    for entity in entities:
+        entity.hass = hass
+        entity.schedule_update_ha_state = writes
+        entity.async_write_ha_state = writes
+        await entity.async_added_to_hass()
+    return entities
+
+
+def jitter(value: Any, round_no: int, counter: list[int]) -> Any:
+    """Shifts every fourth numeric leaf (a different quarter each round) by one."""
+    if isinstance(value, dict):
+        return {k: jitter(v, round_no, counter) for k, v in value.items()}
+    if isinstance(value, list):
+        return [jitter(v, round_no, counter) for v in value]
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        counter[0] += 1
+        if (counter[0] + round_no) % 4 == 0:
+            return value + 1 if round_no % 2 else value - 1
+    return value
+
+
+def encode_rounds(messages: list[dict[str, Any]], rounds: int) -> list[list[bytes]]:
+    """Payload bytes as they come off the wire, encoded up front so serialization is not measured."""
+    return [[codec.dumps(jitter(m, r, [0])) for m in messages] for r in range(rounds)]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def replay(capture: str, rounds: int) -> dict[str, Any]:
+    hass = StubHass(asyncio.get_running_loop())
+    device = create_device(hass, capture)
+    writes = StateWrites()
+    entities = await add_entities(hass, device, writes)
+    routes = {topic: (device, kind) for topic, kind in device.device_info.topic_kinds().items()}
+    topic = device.device_info.data_topic
+
+    with fake_mqtt(inline_ingest=True):
+        client = EcoflowMQTTClient(EcoflowMqttInfo("localhost", 8883, "user", "password", "replay"),
+                                   {SN: device}, routes)
+    coordinator = device.coordinator
+
+    async def handle(payload: bytes) -> tuple[int, int]:
+        start = time.perf_counter_ns()
+        client._on_message(None, None, FakeMessage(topic, payload))
+        ingested = time.perf_counter_ns()
+        await coordinator.async_refresh()
+        return ingested - start, time.perf_counter_ns() - start
+
+    messages = load_replay_messages(capture)
+    # round 0 creates all keys and the first states, it is replayed once as warm-up
+    payloads = encode_rounds(messages, rounds + 1)
+    for payload in payloads[0]:
+        await handle(payload)
+
+    writes.count = 0
+    ingest_ns: list[int] = []
+    total_ns: list[int] = []
+    for round_payloads in payloads[1:]:
+        for payload in round_payloads:
+            ingest, total = await handle(payload)
+            ingest_ns.append(ingest)
+            total_ns.append(total)
+    state_writes = writes.count
+
+    # a second pass under tracemalloc: transient peak and memory still held after each message
+    peaks: list[int] = []
+    tracemalloc.start()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    for round_payloads in payloads[1:]:
+        for payload in round_payloads:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            await handle(payload)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    retained = tracemalloc.get_traced_memory()[0] - start_memory
+    tracemalloc.stop()
+
+    client.stop()
+    count = len(total_ns)
+    return {
+        "device_class": type(device).__module__.rsplit(".", 2)[-2] + "." + type(device).__name__,
+        "entities": len(entities),
+        "messages": count,
+        "payload_bytes": sum(len(p) for p in payloads[1]) / len(payloads[1]),
+        "msgs_per_sec": count / (sum(total_ns) / 1e9),
+        "ingest_p50_us": percentile(ingest_ns, 50) / 1e3,
+        "ingest_p99_us": percentile(ingest_ns, 99) / 1e3,
+        "total_p50_us": percentile(total_ns, 50) / 1e3,
+        "total_p99_us": percentile(total_ns, 99) / 1e3,
+        "total_mean_us": statistics.fmean(total_ns) / 1e3,
+        "state_writes_per_msg": state_writes / count,
+        "peak_bytes_per_msg": statistics.fmean(peaks),
+        "retained_bytes_per_msg": retained / count,
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: dict[str, dict[str, Any]]):
+    print("%-18s %-22s %5s %9s %9s %9s %9s %9s %7s %9s %9s" % (
+        "capture", "class", "msgs", "msg/s", "ingest50", "ingest99", "total50", "total99", "wr/msg",
+        "peak B", "held B"))
+    for capture, r in results.items():
+        print("%-18s %-22s %5d %9.0f %9.1f %9.1f %9.1f %9.1f %7.2f %9.0f %9.1f" % (
+            capture, r["device_class"], r["messages"], r["msgs_per_sec"], r["ingest_p50_us"], r["ingest_p99_us"],
+            r["total_p50_us"], r["total_p99_us"], r["state_writes_per_msg"], r["peak_bytes_per_msg"],
+            r["retained_bytes_per_msg"]))
+
+
+def print_comparison(results: dict[str, dict[str, Any]], baseline: dict[str, Any]):
+    print()
+    print("compared with %s (%s):" % (baseline["meta"].get("revision"), baseline["meta"].get("timestamp")))
+    print("%-18s %10s %10s %10s %10s" % ("capture", "msg/s", "total99", "peak B", "held B"))
+    for capture, r in results.items():
+        old = baseline["results"].get(capture)
+        if old is None:
+            continue
+        changes = [100 * (r[k] / old[k] - 1) if old[k] else 0.0
+                   for k in ("msgs_per_sec", "total_p99_us", "peak_bytes_per_msg", "retained_bytes_per_msg")]
+        print("%-18s %+9.1f%% %+9.1f%% %+9.1f%% %+9.1f%%" % (capture, *changes))
+
+
+async def run(captures: list[str], rounds: int) -> dict[str, dict[str, Any]]:
+    return {capture: await replay(capture, rounds) for capture in captures}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the diag captures through the MQTT ingest path.")
+    parser.add_argument("captures", nargs="*", default=list(CAPTURES), help="capture files in diag/")
+    parser.add_argument("--rounds", type=int, default=50, help="replays of each capture (after one warm-up)")
+    parser.add_argument("--json", dest="json_file", help="write the results to this file")
+    parser.add_argument("--compare", help="results file of an earlier run to compare with")
+    args = parser.parse_args()
+
+    # invalid values of absent modules (slave batteries, ...) would be logged once per entity
+    logging.getLogger("custom_components.ecoflow_cloud").setLevel(logging.ERROR)
+    results = asyncio.run(run(args.captures, args.rounds))
+    print_results(results)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(results, json.load(f))
+
+    if args.json_file:
+        output = {
+            "meta": {
+                "revision": git_revision(),
+                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "json_codec": codec.json_codec().name,
+                "rounds": args.rounds,
+            },
+            "results": results,
+        }
+        with open(args.json_file, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+        print("results written to %s" % args.json_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+State writes reaching HA for an hour of jittery Delta 2 Max telemetry (one message per second),
+without filters (the default) and with some per-device filters as they can be set in the options.
+
+    python -m benchmarks.sensor_filters [seconds] [seed]
+"""
+import datetime
+import heapq
+import logging
+import random
+import sys
+from typing import Any
+from unittest.mock import Mock, patch
+
+import custom_components.ecoflow_cloud.entities as entities
+from benchmarks.corpus import load_params
+from custom_components.ecoflow_cloud.devices import EcoflowDeviceInfo
+from custom_components.ecoflow_cloud.devices.internal.delta2_max import Delta2Max
+from custom_components.ecoflow_cloud.entities import BaseSensorEntity
+from homeassistant.components.sensor import SensorStateClass
+
+# nothing is filtered by default, these are deadbands worth setting in the options
+DEADBANDS = {
+    "power": {"deadband_abs": 2, "deadband_pct": 1},
+    "millivolt": {"deadband_abs": 10, "deadband_pct": 0.2},
+    "temperature": {"deadband_abs": 0.15},
+}
+
+SCENARIOS: list[tuple[str, dict[str, Any]]] = [
+    ("unfiltered", {}),
+    ("deadbands", {"sensor_filters": DEADBANDS}),
+    ("deadbands, 10s min interval", {"sensor_filters": DEADBANDS, "state_min_interval": 10}),
+    ("deadbands, power EMA 5", {"sensor_filters": {**DEADBANDS, "power": {**DEADBANDS["power"], "ema_window": 5}}}),
+    ("deadbands, 300s max age", {"sensor_filters": DEADBANDS, "state_max_age": 300}),
+]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.__timers: list[list] = []
+        self.__seq = 0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def call_later(self, _hass, delay: float, action):
+        self.__seq += 1
+        entry = [self.now + delay, self.__seq, action]
+        heapq.heappush(self.__timers, entry)
+
+        def cancel():
+            entry[2] = None
+        return cancel
+
+    def advance(self, now: float):
+        while self.__timers and self.__timers[0][0] <= now:
+            due, _, action = heapq.heappop(self.__timers)
+            self.now = due
+            if action is not None:
+                action(None)
+        self.now = now
+
+
+def traffic(base: dict[str, Any], keys: list[str], seconds: int, seed: int):
+    """Every measurement wobbles around its level, levels jump now and then."""
+    rnd = random.Random(seed)
+    levels = {k: base[k] for k in keys if isinstance(base.get(k), (int, float)) and not isinstance(base[k], bool)}
+    for _ in range(seconds):
+        message = {}
+        for key, level in levels.items():
+            if rnd.random() < 0.005:
+                level = levels[key] = int(level * rnd.uniform(0.5, 1.5)) + rnd.randint(0, 50)
+            message[key] = int(level + rnd.gauss(0, max(abs(level) * 0.005, 1.5)))
+        yield message
+
+
+def run(options: dict[str, Any], params: dict[str, Any], seconds: int, seed: int) -> int:
+    device = Delta2Max(EcoflowDeviceInfo(public_api=False, sn="SN", name="DELTA 2 Max", device_type="DELTA_2_MAX",
+                                         status=1, data_topic="DATA_TOPIC", set_topic="SET_TOPIC",
+                                         set_reply_topic="SET_REPLY_TOPIC", get_topic=None, get_reply_topic=None))
+    device.coordinator = Mock(refresh_interval=datetime.timedelta(seconds=30))
+    device.state_min_interval = options.get("state_min_interval", 0)
+    device.state_max_age = options.get("state_max_age", 0)
+    device.sensor_filters = options.get("sensor_filters", {})
+    device.data.params.update(params)
+
+    clock = FakeClock()
+    writes = 0
+
+    def count_write(*args, **kwargs):
+        nonlocal writes
+        writes += 1
+
+    with patch.object(entities, "time", clock), patch.object(entities, "async_call_later", clock.call_later):
+        sensors = [s for s in device.sensors(Mock()) if isinstance(s, BaseSensorEntity)]
+        for s in sensors:
+            s.hass = Mock()
+            s.schedule_update_ha_state = count_write
+        keys = [s.mqtt_key for s in sensors if s.state_class == SensorStateClass.MEASUREMENT]
+
+        for second, message in enumerate(traffic(params, keys, seconds, seed)):
+            clock.advance(float(second))
+            device.data.params.update(message)
+            for s in sensors:
+                s.update_from_coordinator()
+        clock.advance(float(seconds + 3600))
+    return writes
+
+
+def main(seconds: int = 3600, seed: int = 1):
+    # invalid values of the absent slave batteries are logged once per scenario
+    logging.getLogger("custom_components.ecoflow_cloud").setLevel(logging.ERROR)
+    params = load_params("delta_2_max.json")
+    print("%d s of traffic, 1 message/s" % seconds)
+    baseline = None
+    for name, options in SCENARIOS:
+        writes = run(options, params, seconds, seed)
+        if baseline is None:
+            baseline = writes
+        print("%-28s %8d state writes  %6.1f%% fewer" % (name, writes, 100 * (1 - writes / baseline)))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:3]])
@@ -0,0 +1,43 @@
+"""Stand-ins for Home Assistant and the data holder, shared by the benchmark scripts and the tests."""
+import asyncio
+import json
+from collections import Counter
+from typing import Any
+
+from custom_components.ecoflow_cloud.devices.data_holder import EcoflowDataHolder
+
+
+class StubHass:
+    """Just enough of HomeAssistant for coordinators, their refresh timers and delayed state writes."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.data: dict[str, Any] = {}
+        self.is_stopping = False
+
+    def async_run_hass_job(self, job, *args):
+        result = job.target(*args)
+        if asyncio.iscoroutine(result):
+            return self.loop.create_task(result)
+        return None
+
+
+class CountingDataHolder(EcoflowDataHolder):
+    """Counts per device SN how often the battery pack discovery reads the new keys."""
+
+    def __init__(self, sn: str, reads: Counter):
+        super().__init__()
+        self.sn = sn
+        self.reads = reads
+
+    def take_new_keys(self, prefix: str) -> set[str]:
+        self.reads[self.sn] += 1
+        return super().take_new_keys(prefix)
+
+
+def quota_message(packs: list[str]) -> dict[str, Any]:
+    """A PowerOcean quota reply with one bp_addr.* entry per battery pack."""
+    data: dict[str, Any] = {"bpSoc": 50}
+    for pack in packs:
+        data[f"bp_addr.{pack}"] = json.dumps({"bpSoc": 40, "bpSoh": 99, "bpCycles": 12})
+    return {"code": "0", "message": "Success", "data": data}
@@ -5,10 +5,13 @@ from typing import Final
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from .api import EcoflowApiClient
+from .api import EcoflowApiClient, DEFAULT_QUOTA_MAX_IN_FLIGHT
 from .api.private_api import EcoflowPrivateApiClient
 from .api.public_api import EcoflowPublicApiClient
+from .api.ingest import DEFAULT_INGEST_QUEUE_SIZE, DEFAULT_INGEST_OVERFLOW
+from .api.ingest_log import DEFAULT_INGEST_LOG_SAMPLE, DEFAULT_RAW_FRAME_BUFFER_SIZE
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -32,6 +35,7 @@ ATTR_MQTT_CONNECTED = "mqtt_connected"
 ATTR_STATUS_RECONNECTS = "reconnects"
 ATTR_STATUS_PHASE = "status_phase"
 ATTR_QUOTA_REQUESTS = "quota_requests"
+ATTR_QUOTA_SWEEP_LATENCY = "quota_sweep_latency_ms"
 
 CONF_AUTH_TYPE: Final = "auth_type"
 
@@ -52,8 +56,20 @@ CONF_DEVICE_ID: Final = "device_id"
 OPTS_DIAGNOSTIC_MODE: Final = "diagnostic_mode"
 OPTS_POWER_STEP: Final = "power_step"
 OPTS_REFRESH_PERIOD_SEC: Final = "refresh_period_sec"
+OPTS_HISTORY_SIZE: Final = "history_size"
+OPTS_STATE_MIN_INTERVAL_SEC: Final = "state_min_interval_sec"
+OPTS_STATE_MAX_AGE_SEC: Final = "state_max_age_sec"
+OPTS_SENSOR_FILTERS: Final = "sensor_filters"
+OPTS_INGEST_QUEUE_SIZE: Final = "ingest_queue_size"
+OPTS_INGEST_OVERFLOW: Final = "ingest_overflow_policy"
+OPTS_INGEST_LOG_SAMPLE: Final = "ingest_log_sample_every"
+OPTS_RAW_FRAME_BUFFER_SIZE: Final = "raw_frame_buffer_size"
+OPTS_QUOTA_MAX_IN_FLIGHT: Final = "quota_max_in_flight"
 
 DEFAULT_REFRESH_PERIOD_SEC: Final = 5
+DEFAULT_HISTORY_SIZE: Final = 20
+DEFAULT_STATE_MIN_INTERVAL_SEC: Final = 0
+DEFAULT_STATE_MAX_AGE_SEC: Final = 0
 
 
 @dataclasses.dataclass
@@ -68,6 +84,10 @@ class DeviceOptions:
     refresh_period: int
     power_step: int
     diagnostic_mode: bool
+    history_size: int = DEFAULT_HISTORY_SIZE
+    state_min_interval: int = DEFAULT_STATE_MIN_INTERVAL_SEC
+    state_max_age: int = DEFAULT_STATE_MAX_AGE_SEC
+    sensor_filters: dict[str, dict[str, float]] = dataclasses.field(default_factory=dict)
 
 
 async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry):
@@ -166,7 +186,11 @@ def extract_options(entry: ConfigEntry) -> dict[str, DeviceOptions]:
     options: dict[str, DeviceOptions] = {}
     for sn, device_option in entry.options[CONF_DEVICE_LIST].items():
         options[sn] = DeviceOptions(
-            device_option[OPTS_REFRESH_PERIOD_SEC], device_option[OPTS_POWER_STEP], device_option[OPTS_DIAGNOSTIC_MODE]
+            device_option[OPTS_REFRESH_PERIOD_SEC], device_option[OPTS_POWER_STEP], device_option[OPTS_DIAGNOSTIC_MODE],
+            device_option.get(OPTS_HISTORY_SIZE, DEFAULT_HISTORY_SIZE),
+            device_option.get(OPTS_STATE_MIN_INTERVAL_SEC, DEFAULT_STATE_MIN_INTERVAL_SEC),
+            device_option.get(OPTS_STATE_MAX_AGE_SEC, DEFAULT_STATE_MAX_AGE_SEC),
+            device_option.get(OPTS_SENSOR_FILTERS, {})
         )
     return options
 
@@ -179,18 +203,30 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     if ECOFLOW_DOMAIN not in hass.data:
         hass.data[ECOFLOW_DOMAIN] = {}
 
+    from .profiler import async_register_services
+    async_register_services(hass)
+    from .ingest_stats import async_register_services as async_register_ingest_services
+    async_register_ingest_services(hass)
+
+    session = async_get_clientsession(hass)
     if CONF_USERNAME in entry.data and CONF_PASSWORD in entry.data:
         api_client = EcoflowPrivateApiClient(entry.data[CONF_USERNAME], entry.data[CONF_PASSWORD],
-                                             entry.data[CONF_GROUP])
+                                             entry.data[CONF_GROUP], session)
 
     elif CONF_ACCESS_KEY in entry.data and CONF_SECRET_KEY in entry.data:
         api_client = EcoflowPublicApiClient(entry.data[CONF_ACCESS_KEY], entry.data[CONF_SECRET_KEY],
-                                            entry.data[CONF_GROUP])
+                                            entry.data[CONF_GROUP], session)
     else:
         return False
 
     await api_client.login()
 
+    api_client.ingest_queue_size = entry.options.get(OPTS_INGEST_QUEUE_SIZE, DEFAULT_INGEST_QUEUE_SIZE)
+    api_client.ingest_overflow = entry.options.get(OPTS_INGEST_OVERFLOW, DEFAULT_INGEST_OVERFLOW)
+    api_client.ingest_log_sample = entry.options.get(OPTS_INGEST_LOG_SAMPLE, DEFAULT_INGEST_LOG_SAMPLE)
+    api_client.raw_frame_buffer_size = entry.options.get(OPTS_RAW_FRAME_BUFFER_SIZE, DEFAULT_RAW_FRAME_BUFFER_SIZE)
+    api_client.quota_max_in_flight = entry.options.get(OPTS_QUOTA_MAX_IN_FLIGHT, DEFAULT_QUOTA_MAX_IN_FLIGHT)
+
     devices_list: dict[str, DeviceData] = {}
     devices_options: dict[str, DeviceOptions] = {}
 
@@ -221,13 +257,25 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         hass,
         device_option.refresh_period,
         device_option.diagnostic_mode,
-        api_client  # ← Der Client kommt hier dazu
+        api_client,  # ← Der Client kommt hier dazu
+        device_option.history_size,
+        device_option.state_min_interval,
+        device_option.state_max_age,
+        device_option.sensor_filters
     )
 
+    from .devices import EcoflowDeviceListeners
+    api_client.device_listeners = EcoflowDeviceListeners()
+
     await hass.async_add_executor_job(api_client.start)
     hass.data[ECOFLOW_DOMAIN][entry.entry_id] = api_client
     await hass.config_entries.async_forward_entry_setups(entry, _PLATFORMS)
-    await api_client.quota_all(None)
+
+    from .devices import EcoflowAccountUpdateCoordinator
+    api_client.account_coordinator = EcoflowAccountUpdateCoordinator(hass, api_client)
+    await api_client.account_coordinator.async_refresh()
+    # the only timer of the entry, it refreshes the device coordinators that are due
+    entry.async_on_unload(api_client.account_coordinator.async_start_ticks())
 
     entry.async_on_unload(entry.add_update_listener(update_listener))
 
@@ -239,7 +287,17 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
         return False
 
     client: EcoflowApiClient = hass.data[ECOFLOW_DOMAIN].pop(entry.entry_id)
-    client.stop()
+    if client.device_listeners is not None:
+        client.device_listeners.remove_all()
+    # joins the paho thread and the ingest worker, not in the event loop
+    await hass.async_add_executor_job(client.stop)
+    await client.close()
+
+    if not hass.data[ECOFLOW_DOMAIN]:
+        from .profiler import async_remove_services
+        async_remove_services(hass)
+        from .ingest_stats import async_remove_services as async_remove_ingest_services
+        async_remove_ingest_services(hass)
     return True
 
 
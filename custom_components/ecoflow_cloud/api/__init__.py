@@ -1,12 +1,24 @@
+import json
 import logging
 from abc import abstractmethod
 
 from typing import Any
+
+import aiohttp
 from aiohttp import ClientResponse
 from attr import dataclass
 
+from .ingest import DEFAULT_INGEST_QUEUE_SIZE, DEFAULT_INGEST_OVERFLOW
+from .ingest_log import DEFAULT_INGEST_LOG_SAMPLE, DEFAULT_RAW_FRAME_BUFFER_SIZE
+
 _LOGGER = logging.getLogger(__name__)
 
+# Only a handful of endpoints on a single host: keep the pool small but the connections alive
+HTTP_CONNECTION_LIMIT = 10
+HTTP_KEEPALIVE_TIMEOUT = 60
+
+DEFAULT_QUOTA_MAX_IN_FLIGHT = 4
+
 
 class EcoflowException(Exception):
     def __init__(self, *args, **kwargs):
@@ -24,10 +36,35 @@ class EcoflowMqttInfo:
 
 class EcoflowApiClient:
 
-    def __init__(self):
+    def __init__(self, session: aiohttp.ClientSession | None = None):
         self.mqtt_info: EcoflowMqttInfo
+        self._session: aiohttp.ClientSession | None = session
+        self.__owns_session = session is None
         self.devices: dict[str, Any] = {}
+        self.topic_routes: dict[str, tuple[Any, str]] = {}
+        self.ingest_queue_size: int = DEFAULT_INGEST_QUEUE_SIZE
+        self.ingest_overflow: str = DEFAULT_INGEST_OVERFLOW
+        self.ingest_log_sample: int = DEFAULT_INGEST_LOG_SAMPLE
+        self.raw_frame_buffer_size: int = DEFAULT_RAW_FRAME_BUFFER_SIZE
         self.mqtt_client = None
+        self.account_coordinator = None
+        self.device_listeners = None
+        self.rate_limiter = None
+        self.quota_max_in_flight: int = DEFAULT_QUOTA_MAX_IN_FLIGHT
+        self.last_sweep_latency: float | None = None
+        self.last_sweep_errors: dict[str, str] = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # One session per client: TCP/TLS connections are reused across requests
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=HTTP_CONNECTION_LIMIT, keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self.__owns_session = True
+        return self._session
+
+    async def close(self):
+        if self.__owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
 
     @abstractmethod
     async def login(self):
@@ -41,15 +78,40 @@ class EcoflowApiClient:
     async def quota_all(self, device_sn: str | None):
         pass
 
+    async def quota_sweep(self, device_sns: list[str]):
+        for sn in device_sns:
+            await self.quota_all(sn)
+
+    def sweep_stats(self) -> dict[str, Any]:
+        return {
+            "max_in_flight": self.quota_max_in_flight,
+            "last_sweep_latency_ms": None if self.last_sweep_latency is None else round(self.last_sweep_latency * 1000),
+            "last_sweep_errors": dict(self.last_sweep_errors),
+        }
+
     @abstractmethod
     def configure_device(self, device_sn: str, device_name: str, device_type: str, power_step=-1):
         pass
 
     def add_device(self, device):
         self.devices[device.device_info.sn] = device
+        self._rebuild_topic_routes()
 
     def remove_device(self, device):
         self.devices.pop(device.device_info.sn, None)
+        if self.device_listeners is not None:
+            self.device_listeners.remove(device.device_info.sn)
+        self._rebuild_topic_routes()
+
+    def _rebuild_topic_routes(self):
+        # topic -> (device, message kind); swapped as a whole so the MQTT thread never sees a partial table
+        routes: dict[str, tuple[Any, str]] = {}
+        for device in self.devices.values():
+            for topic, kind in device.device_info.topic_kinds().items():
+                routes[topic] = (device, kind)
+        self.topic_routes = routes
+        if self.mqtt_client:
+            self.mqtt_client.update_topic_routes(routes)
 
     def _accept_mqqt_certification(self, resp_json: dict):
         _LOGGER.info(f"Received MQTT credentials: {resp_json}")
@@ -68,13 +130,14 @@ class EcoflowApiClient:
         if resp.status != 200:
             raise EcoflowException(f"Got HTTP status code {resp.status}: {resp.reason}")
 
+        raw_text = await resp.text()
         try:
-            json_resp = await resp.json()
+            json_resp = json.loads(raw_text)
             response_message = json_resp["message"]
         except KeyError as key:
             raise EcoflowException(f"Failed to extract key {key} from {resp}")
         except Exception as error:
-            raise EcoflowException(f"Failed to parse response: {resp.text} Error: {error}")
+            raise EcoflowException(f"Failed to parse response: {raw_text} Error: {error}")
 
         if response_message.lower() != "success":
             raise EcoflowException(f"{response_message}")
@@ -83,7 +146,9 @@ class EcoflowApiClient:
 
     def start(self):
         from custom_components.ecoflow_cloud.api.ecoflow_mqtt import EcoflowMQTTClient
-        self.mqtt_client = EcoflowMQTTClient(self.mqtt_info, self.devices)
+        self.mqtt_client = EcoflowMQTTClient(self.mqtt_info, self.devices, self.topic_routes,
+                                             self.ingest_queue_size, self.ingest_overflow,
+                                             self.ingest_log_sample, self.raw_frame_buffer_size)
 
     def stop(self):
         self.mqtt_client.stop()
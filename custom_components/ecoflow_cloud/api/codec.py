@@ -0,0 +1,65 @@
+"""
+JSON codec for MQTT payloads: parses bytes as received and serializes commands straight to bytes.
+orjson is used when installed (Home Assistant ships it), the stdlib json module otherwise.
+"""
+import json
+import logging
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EcoflowJsonCodec:
+    name = "json"
+
+    def loads(self, data: bytes | bytearray | memoryview | str) -> Any:
+        """Raises ValueError (incl. UnicodeDecodeError) for payloads that are no valid JSON."""
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        # the stdlib detects the UTF encoding of bytes itself, no intermediate str needed
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+class EcoflowOrjsonCodec(EcoflowJsonCodec):
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self.__orjson = orjson
+
+    def loads(self, data: bytes | bytearray | memoryview | str) -> Any:
+        return self.__orjson.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.__orjson.dumps(obj)
+
+
+def _default_codec() -> EcoflowJsonCodec:
+    try:
+        return EcoflowOrjsonCodec()
+    except ImportError:
+        _LOGGER.debug("orjson not installed, using the json module")
+        return EcoflowJsonCodec()
+
+
+_codec: EcoflowJsonCodec = _default_codec()
+
+
+def json_codec() -> EcoflowJsonCodec:
+    return _codec
+
+
+def set_json_codec(codec: EcoflowJsonCodec):
+    global _codec
+    _codec = codec
+
+
+def loads(data: bytes | bytearray | memoryview | str) -> Any:
+    return _codec.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    return _codec.dumps(obj)
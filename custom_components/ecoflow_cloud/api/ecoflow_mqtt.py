@@ -1,4 +1,3 @@
-import json
 import logging
 import random
 import ssl
@@ -8,20 +7,36 @@ from typing import Any
 
 from homeassistant.core import callback
 
-from custom_components.ecoflow_cloud.api import EcoflowMqttInfo
-from custom_components.ecoflow_cloud.devices import BaseDevice
+from custom_components.ecoflow_cloud.api import EcoflowMqttInfo, codec
+from custom_components.ecoflow_cloud.api.ingest import EcoflowIngestPipeline, DEFAULT_INGEST_QUEUE_SIZE, \
+    DEFAULT_INGEST_OVERFLOW
+from custom_components.ecoflow_cloud.api.ingest_log import EcoflowIngestLog, DEFAULT_INGEST_LOG_SAMPLE, \
+    DEFAULT_RAW_FRAME_BUFFER_SIZE
+from custom_components.ecoflow_cloud.api.ingest_metrics import EcoflowIngestMetrics
+from custom_components.ecoflow_cloud.devices import BaseDevice, PAYLOAD_CODEC_PROTOBUF, PAYLOAD_CODEC_AUTO, \
+    PAYLOAD_CODEC_JSON, MSG_KIND_DATA, MSG_KIND_SET_REPLY
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class EcoflowMQTTClient:
 
-    def __init__(self, mqtt_info: EcoflowMqttInfo, devices: dict[str, BaseDevice]):
+    def __init__(self, mqtt_info: EcoflowMqttInfo, devices: dict[str, BaseDevice],
+                 topic_routes: dict[str, tuple[BaseDevice, str]],
+                 ingest_queue_size: int = DEFAULT_INGEST_QUEUE_SIZE,
+                 ingest_overflow: str = DEFAULT_INGEST_OVERFLOW,
+                 ingest_log_sample: int = DEFAULT_INGEST_LOG_SAMPLE,
+                 raw_frame_buffer_size: int = DEFAULT_RAW_FRAME_BUFFER_SIZE):
 
         from ..devices import BaseDevice
         self.connected = False
         self.__mqtt_info = mqtt_info
         self.__devices: dict[str, BaseDevice] = devices
+        self.__topic_routes: dict[str, tuple[BaseDevice, str]] = topic_routes
+        self.__ingest_log = EcoflowIngestLog(_LOGGER, ingest_log_sample, raw_frame_buffer_size)
+        self.__metrics = EcoflowIngestMetrics()
+        self.__ingest = EcoflowIngestPipeline(self.__late_process_message, ingest_queue_size, ingest_overflow)
+        self.__ingest.start()
 
         from homeassistant.components.mqtt.async_client import AsyncMQTTClient
         self.__client: AsyncMQTTClient = AsyncMQTTClient(
@@ -36,7 +51,7 @@ class EcoflowMQTTClient:
         self.__client.tls_insecure_set(False)
         self.__client.on_connect = self._on_connect
         self.__client.on_disconnect = self._on_disconnect
-        self.__client.on_message = self._on_message
+        self.__client.on_message = self.__late_on_message
         self.__client.on_socket_close = self._on_socket_close
 
         _LOGGER.info(
@@ -84,57 +99,111 @@ class EcoflowMQTTClient:
             self.__log_with_reason("disconnect", client, userdata, rc)
             time.sleep(5)
 
+    def update_topic_routes(self, topic_routes: dict[str, tuple[BaseDevice, str]]):
+        self.__topic_routes = topic_routes
+
+    def ingest_stats(self) -> dict[str, Any]:
+        return self.__ingest.stats()
+
+    def recent_frames(self) -> list[dict[str, Any]]:
+        return self.__ingest_log.recent_frames()
+
+    def ingest_metrics(self) -> EcoflowIngestMetrics:
+        """Counters of all devices of the account, the per device ones are in their data holders."""
+        return self.__metrics
+
+    # the callbacks are looked up on every message, so the profile service can wrap them on the class
+    def __late_on_message(self, client, userdata, message):
+        self._on_message(client, userdata, message)
+
+    def __late_process_message(self, topic: str, payload: Any, received_at: float):
+        self._process_message(topic, payload, received_at)
+
     @callback
     def _on_message(self, client, userdata, message):
-        # Debug-Ausgabe
-        if isinstance(message.payload, bytes):
-            _LOGGER.debug("Raw MQTT payload (hex): %s", message.payload.hex())
+        # paho network thread: only hand over, decoding happens in the ingest worker
+        self.__ingest.submit(message.topic, message.payload)
+
+    def _process_message(self, topic: str, payload: Any, received_at: float):
+        self.__ingest_log.frame(topic, payload)
+        route = self.__topic_routes.get(topic)
+        if route is None:
+            self.__metrics.ignore()
+            _LOGGER.debug("No device registered for topic %s", topic)
+            return
+
+        device, kind = route
+        metrics = device.data.metrics
+        start = time.perf_counter()
+        payload_codec = device.payload_codec(kind)
+        if payload_codec == PAYLOAD_CODEC_PROTOBUF or \
+                (payload_codec == PAYLOAD_CODEC_AUTO and not self.__looks_like_json(payload)):
+            # binary frames go straight to the device's protobuf decoder
+            raw_data = payload
+            payload_codec = PAYLOAD_CODEC_PROTOBUF
         else:
-            _LOGGER.debug("Raw MQTT payload (str?): %s", message.payload)
+            raw_data = self.__decode_json(payload)
+            payload_codec = PAYLOAD_CODEC_JSON
+            if raw_data is None:
+                metrics.ignore()
+                self.__metrics.ignore()
+                return
+
+        if not device.dispatch_data(raw_data, kind):
+            metrics.ignore()
+            self.__metrics.ignore()
+            return
 
-        raw_data = message.payload
+        # decode time includes the update of the data holder
+        decode_seconds = time.perf_counter() - start
+        metrics.message(kind, payload_codec, decode_seconds)
+        self.__metrics.message(kind, payload_codec, decode_seconds)
+        if kind == MSG_KIND_DATA:
+            metrics.received(received_at)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Message for %s and Topic %s", device.device_info.sn, topic)
+
+    @staticmethod
+    def __looks_like_json(payload: Any) -> bool:
+        if isinstance(payload, bytes):
+            return len(payload) > 0 and payload[0] in (0x7B, 0x5B)  # '{', '['
+        elif isinstance(payload, str):
+            return payload.startswith("{") or payload.startswith("[")
+        return isinstance(payload, dict)
+
+    def __decode_json(self, raw_data: Any) -> dict[str, Any] | None:
+        if isinstance(raw_data, dict):
+            return raw_data
 
         # Versuche nur zu dekodieren, wenn es überhaupt nach JSON aussieht
+        if not self.__looks_like_json(raw_data):
+            _LOGGER.debug("Payload doesn't look like JSON – skipping.")
+            return None
+
         try:
-            if isinstance(raw_data, bytes):
-                # Wenn die Bytes nicht mit { oder [ anfangen, vermutlich kein JSON
-                if not raw_data or raw_data[0] not in (ord('{'), ord('[')):
-                    _LOGGER.debug("Binary payload doesn't look like JSON – skipping.")
-                    return
-                raw_data = raw_data.decode("utf-8")
-
-            elif isinstance(raw_data, str):
-                # Wenn der String nicht mit { oder [ anfängt, vermutlich kein JSON
-                if not (raw_data.startswith("{") or raw_data.startswith("[")):
-                    _LOGGER.debug("String payload doesn't look like JSON – skipping.")
-                    return
-
-            # Falls wir noch kein Dict haben, parse JSON
-            if not isinstance(raw_data, dict):
-                raw_data = json.loads(raw_data)
-
-        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            # bytes are parsed as received, without an intermediate str
+            return codec.loads(raw_data)
+        except ValueError as e:
             _LOGGER.error("Error decoding JSON from payload: %s", e)
-            return
-
-        # Jetzt ist raw_data ein Dict, direkt an die Geräte weiterreichen
-        for (sn, device) in self.__devices.items():
-            if device.update_data(raw_data, message.topic):
-                _LOGGER.debug("Message for %s and Topic %s", sn, message.topic)
+            return None
 
     def send_get_message(self, device_sn: str, command: dict):
         payload = self.__prepare_payload(command)
-        self.__send(self.__devices[device_sn].device_info.get_topic, json.dumps(payload))
+        self.__send(self.__devices[device_sn].device_info.get_topic, codec.dumps(payload))
 
     def send_set_message(self, device_sn: str, mqtt_state: dict[str, Any], command: dict):
-        self.__devices[device_sn].data.update_to_target_state(mqtt_state)
+        device = self.__devices[device_sn]
         payload = self.__prepare_payload(command)
-        self.__send(self.__devices[device_sn].device_info.set_topic, json.dumps(payload))
+        # only JSON replies carry the message id back, the others could only time out
+        command_id = payload["id"] if device.payload_codec(MSG_KIND_SET_REPLY) == PAYLOAD_CODEC_JSON else None
+        device.data.update_to_target_state(mqtt_state, command_id)
+        self.__send(device.device_info.set_topic, codec.dumps(payload))
 
     def stop(self):
         self.__client.unsubscribe(self.__target_topics())
         self.__client.loop_stop()
         self.__client.disconnect()
+        self.__ingest.stop()
 
     def __log_with_reason(self, action: str, client, userdata, rc):
         import paho.mqtt.client as mqtt_client
@@ -150,14 +219,15 @@ class EcoflowMQTTClient:
         payload.update(command)
         return payload
 
-    def __send(self, topic: str, message: str):
+    def __send(self, topic: str, message: bytes):
         try:
             info = self.__client.publish(topic, message, 1)
-            _LOGGER.debug("Sending " + message + " :" + str(info) + "(" + str(info.is_published()) + ")")
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("Sending %s :%s(%s)", message, info, info.is_published())
         except RuntimeError as error:
-            _LOGGER.error(error, "Error on topic " + topic + " and message " + message)
+            _LOGGER.error("Error on topic %s and message %s: %s", topic, message, error)
         except Exception as error:
-            _LOGGER.debug(error, "Error on topic " + topic + " and message " + message)
+            _LOGGER.debug("Error on topic %s and message %s: %s", topic, message, error)
 
     def __target_topics(self) -> list[str]:
         topics = []
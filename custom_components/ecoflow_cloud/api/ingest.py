@@ -0,0 +1,101 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable
+
+_LOGGER = logging.getLogger(__name__)
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_NEWEST = "drop_newest"
+OVERFLOW_POLICIES = [OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST]
+
+DEFAULT_INGEST_QUEUE_SIZE = 1000
+DEFAULT_INGEST_OVERFLOW = OVERFLOW_DROP_OLDEST
+
+
+class EcoflowIngestPipeline:
+    """
+    Bounded hand-off between the paho network thread and the payload decoding.
+    The MQTT callback only enqueues (topic, payload, receive time); a single worker thread
+    decodes and dispatches in arrival order, so keepalives and acks are never stalled by parsing.
+    """
+
+    def __init__(self, handler: Callable[[str, Any, float], None],
+                 maxsize: int = DEFAULT_INGEST_QUEUE_SIZE,
+                 overflow: str = DEFAULT_INGEST_OVERFLOW):
+        if overflow not in OVERFLOW_POLICIES:
+            _LOGGER.warning("Unknown ingest overflow policy %s, using %s", overflow, DEFAULT_INGEST_OVERFLOW)
+            overflow = DEFAULT_INGEST_OVERFLOW
+
+        self.__handler = handler
+        self.__queue: queue.Queue[tuple[str, Any, float]] = queue.Queue(maxsize=max(maxsize, 1))
+        self.__overflow = overflow
+        self.__stopped = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, name="ecoflow-ingest", daemon=True)
+
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.max_depth = 0
+
+    def start(self):
+        self.__thread.start()
+
+    def stop(self):
+        self.__stopped.set()
+        if self.__thread.is_alive():
+            self.__thread.join(timeout=5)
+
+    def submit(self, topic: str, payload: Any) -> bool:
+        """Called from the paho thread: must never block."""
+        self.received += 1
+        item = (topic, payload, time.monotonic())
+        try:
+            self.__queue.put_nowait(item)
+        except queue.Full:
+            if self.__overflow == OVERFLOW_DROP_NEWEST:
+                self.dropped += 1
+                return False
+            try:
+                self.__queue.get_nowait()
+                self.dropped += 1
+                self.__queue.put_nowait(item)
+            except (queue.Empty, queue.Full):
+                self.dropped += 1
+                return False
+
+        depth = self.__queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        return True
+
+    def depth(self) -> int:
+        return self.__queue.qsize()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queue_depth": self.depth(),
+            "queue_max_depth": self.max_depth,
+            "queue_size": self.__queue.maxsize,
+            "overflow_policy": self.__overflow,
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def __run(self):
+        while not self.__stopped.is_set():
+            try:
+                topic, payload, received_at = self.__queue.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            try:
+                self.__handler(topic, payload, received_at)
+                self.processed += 1
+            except Exception as error:  # pylint: disable=broad-except
+                self.failed += 1
+                _LOGGER.error("Error processing MQTT message on topic %s: %s", topic, error)
@@ -0,0 +1,76 @@
+import collections
+import datetime
+import logging
+import time
+from typing import Any
+
+DEFAULT_INGEST_LOG_SAMPLE = 10
+DEFAULT_RAW_FRAME_BUFFER_SIZE = 50
+
+# hex dumps of protobuf frames get long, diagnostics and log lines are cut after this many bytes
+MAX_LOGGED_PAYLOAD = 512
+
+
+class _Payload:
+    """Formats a payload only when a handler really emits the record."""
+
+    __slots__ = ("payload",)
+
+    def __init__(self, payload: Any):
+        self.payload = payload
+
+    def __str__(self) -> str:
+        return format_payload(self.payload)
+
+
+def format_payload(payload: Any) -> str:
+    if isinstance(payload, (bytes, bytearray)):
+        head = bytes(payload[:MAX_LOGGED_PAYLOAD])
+        if head[:1] in (b"{", b"["):
+            text = head.decode("utf-8", errors="replace")
+        else:
+            text = head.hex()
+        return text + ("..." if len(payload) > MAX_LOGGED_PAYLOAD else "")
+    text = str(payload)
+    return text[:MAX_LOGGED_PAYLOAD * 2] + ("..." if len(text) > MAX_LOGGED_PAYLOAD * 2 else "")
+
+
+def _size(payload: Any) -> int:
+    return len(payload) if isinstance(payload, (bytes, bytearray, str)) else 0
+
+
+class EcoflowIngestLog:
+    """
+    Logging for the MQTT ingest path: raw frames are logged at DEBUG for one message in `sample_every`
+    per topic, and the last `buffer_size` frames are kept unformatted for diagnostics.
+    """
+
+    def __init__(self, logger: logging.Logger,
+                 sample_every: int = DEFAULT_INGEST_LOG_SAMPLE,
+                 buffer_size: int = DEFAULT_RAW_FRAME_BUFFER_SIZE):
+        self.__logger = logger
+        self.__sample_every = max(sample_every, 1)
+        self.__frames: collections.deque[tuple[float, str, Any]] = collections.deque(maxlen=max(buffer_size, 0))
+        self.__topic_counts: dict[str, int] = {}
+
+    def frame(self, topic: str, payload: Any):
+        self.__frames.append((time.time(), topic, payload))
+
+        if not self.__logger.isEnabledFor(logging.DEBUG):
+            return
+        count = self.__topic_counts.get(topic, 0) + 1
+        self.__topic_counts[topic] = count
+        if count % self.__sample_every == 1 or self.__sample_every == 1:
+            self.__logger.debug("Raw MQTT payload #%u on %s (%u bytes, 1 of %u logged): %s",
+                                count, topic, _size(payload), self.__sample_every, _Payload(payload))
+
+    def recent_frames(self) -> list[dict[str, Any]]:
+        frames = []
+        for received, topic, payload in list(self.__frames):
+            frames.append({
+                "received": datetime.datetime.fromtimestamp(received, datetime.timezone.utc).isoformat(),
+                "topic": topic,
+                "size": _size(payload),
+                "payload": format_payload(payload),
+            })
+        return frames
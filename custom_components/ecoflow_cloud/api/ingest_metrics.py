@@ -0,0 +1,126 @@
+"""
+Counters of the MQTT ingest path for the ingest_stats service and the diagnostics. They are plain attributes
+written by the ingest worker (and the coordinator, for the state lag) and only read in Home Assistant's loop, so
+recording a message costs a few increments. Only adding a new topic kind or codec takes a lock, readers copy the dicts
+under it, so they never iterate while a key is inserted.
+"""
+import threading
+from typing import Any
+
+# upper bounds of the decode time histogram buckets in ms, the last bucket is unbounded
+DECODE_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50)
+
+
+class EcoflowDecodeHistogram:
+    __slots__ = ("counts", "count", "seconds")
+
+    def __init__(self):
+        self.counts = [0] * (len(DECODE_BUCKETS_MS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+
+    def add(self, seconds: float):
+        ms = seconds * 1000
+        for i, bound in enumerate(DECODE_BUCKETS_MS):
+            if ms <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.seconds += seconds
+
+    def buckets(self) -> dict[str, int]:
+        labels = [f"<={bound}ms" for bound in DECODE_BUCKETS_MS] + [f">{DECODE_BUCKETS_MS[-1]}ms"]
+        return dict(zip(labels, self.counts))
+
+
+class EcoflowIngestMetrics:
+    """Messages per topic kind, decode time per payload codec, ignored messages and receipt-to-broadcast lag."""
+
+    def __init__(self):
+        self.messages: dict[str, int] = {}
+        self.decode: dict[str, EcoflowDecodeHistogram] = {}
+        self.ignored = 0
+        self.__keys_lock = threading.Lock()
+        self.last_lag: float | None = None
+        self.max_lag = 0.0
+        self.lag_count = 0
+        self.lag_seconds = 0.0
+        self.__pending_since: float | None = None
+        self.__rate_meter = EcoflowRateMeter()
+
+    def message(self, kind: str, codec: str, decode_seconds: float):
+        count = self.messages.get(kind)
+        if count is None:
+            with self.__keys_lock:
+                self.messages[kind] = 1
+        else:
+            self.messages[kind] = count + 1
+        histogram = self.decode.get(codec)
+        if histogram is None:
+            with self.__keys_lock:
+                histogram = self.decode[codec] = EcoflowDecodeHistogram()
+        histogram.add(decode_seconds)
+
+    def message_counts(self) -> dict[str, int]:
+        with self.__keys_lock:
+            return dict(self.messages)
+
+    def decode_histograms(self) -> list[tuple[str, EcoflowDecodeHistogram]]:
+        with self.__keys_lock:
+            return list(self.decode.items())
+
+    def rates(self, now: float) -> dict[str, float] | None:
+        """Messages/s per topic kind since the previous call, None on the first one."""
+        return self.__rate_meter.read(self.message_counts(), now)
+
+    def ignore(self):
+        self.ignored += 1
+
+    def received(self, received_at: float):
+        """Monotonic receipt time of a data message, the lag is measured from the oldest one not yet broadcast."""
+        if self.__pending_since is None:
+            self.__pending_since = received_at
+
+    def broadcast(self, now: float, changed: bool):
+        """The coordinator hands the changed keys to the entities, which write their states right away."""
+        pending_since = self.__pending_since
+        self.__pending_since = None
+        if pending_since is None or not changed:
+            return
+        lag = max(now - pending_since, 0.0)
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self.lag_count += 1
+        self.lag_seconds += lag
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "messages": self.message_counts(),
+            "ignored": self.ignored,
+            "decode": {codec: {"count": h.count,
+                               "mean_ms": round(h.seconds / h.count * 1000, 3) if h.count else None,
+                               "buckets": h.buckets()}
+                       for codec, h in self.decode_histograms()},
+            "last_lag_sec": None if self.last_lag is None else round(self.last_lag, 3),
+            "max_lag_sec": round(self.max_lag, 3),
+            "mean_lag_sec": round(self.lag_seconds / self.lag_count, 3) if self.lag_count else None,
+        }
+
+
+class EcoflowRateMeter:
+    """Messages/s per topic kind between two reads of a counter dict."""
+
+    def __init__(self):
+        self.__last_counts: dict[str, int] = {}
+        self.__last_time: float | None = None
+
+    def read(self, counts: dict[str, int], now: float) -> dict[str, float] | None:
+        """None on the first read, there is nothing to compare with yet. `counts` must be a copy."""
+        last_counts, last_time = self.__last_counts, self.__last_time
+        self.__last_counts, self.__last_time = counts, now
+        if last_time is None or now <= last_time:
+            return None
+        elapsed = now - last_time
+        return {kind: round((count - last_counts.get(kind, 0)) / elapsed, 2) for kind, count in counts.items()}
@@ -0,0 +1,101 @@
+"""
+Set commands of a device waiting for their set_reply, keyed by the message id of the payload. The reply
+carries the id back (as a number, it is sent as a string), so matching a reply is a dict pop. The table
+is filled in Home Assistant's loop and the replies are matched by the ingest worker, hence the lock.
+"""
+import threading
+from collections import deque
+from typing import Any
+
+# seconds without a set_reply until a command counts as timed out
+DEFAULT_COMMAND_TIMEOUT = 15
+# round trip times kept for the percentiles
+RTT_SAMPLES = 100
+
+
+class EcoflowPendingCommand:
+    """
+    `previous` holds the values the optimistic update overwrote that may still be restored, `target` the
+    values it wrote.
+    """
+    __slots__ = ("command_id", "sent_at", "previous", "target")
+
+    def __init__(self, command_id: str, sent_at: float, previous: dict[str, Any], target: dict[str, Any]):
+        self.command_id = command_id
+        self.sent_at = sent_at
+        self.previous = previous
+        self.target = target
+
+
+class EcoflowPendingCommands:
+
+    def __init__(self, timeout: float = DEFAULT_COMMAND_TIMEOUT, samples: int = RTT_SAMPLES):
+        self.timeout = timeout
+        self.__pending: dict[str, EcoflowPendingCommand] = {}
+        self.__lock = threading.Lock()
+        self.__rtts: deque[float] = deque(maxlen=samples)
+        self.acked = 0
+        self.failed = 0
+        self.timed_out = 0
+        # replies to commands of other clients (the app) or to commands that already timed out
+        self.unmatched = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self.__pending)
+
+    def add(self, command: EcoflowPendingCommand):
+        with self.__lock:
+            self.__pending[command.command_id] = command
+
+    def reported(self, params: dict[str, Any]):
+        """The device reported these params keys: what it reports is its state, it must not be rolled back."""
+        with self.__lock:
+            for command in self.__pending.values():
+                # flat json keys are quoted for jsonpath
+                for key in [k for k in command.previous if k.strip("'") in params]:
+                    del command.previous[key]
+
+    def reply(self, command_id: Any, success: bool, now: float) -> EcoflowPendingCommand | None:
+        with self.__lock:
+            command = self.__pending.pop(str(command_id), None)
+        if command is None:
+            self.unmatched += 1
+            return None
+        self.__rtts.append(now - command.sent_at)
+        if success:
+            self.acked += 1
+        else:
+            self.failed += 1
+        return command
+
+    def expire(self, now: float) -> list[EcoflowPendingCommand]:
+        expired = []
+        with self.__lock:
+            # commands are added in the order they are sent, so the overdue ones are at the front
+            for command in self.__pending.values():
+                if now - command.sent_at < self.timeout:
+                    break
+                expired.append(command)
+            for command in expired:
+                del self.__pending[command.command_id]
+        self.timed_out += len(expired)
+        return expired
+
+    def rtt_percentiles(self) -> dict[str, float | None]:
+        ordered = sorted(self.__rtts)
+        result = {}
+        for pct in (50, 90, 99):
+            result[f"p{pct}"] = round(ordered[min(len(ordered) - 1, len(ordered) * pct // 100)] * 1000, 1) \
+                if ordered else None
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "pending": self.pending,
+            "acked": self.acked,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "unmatched": self.unmatched,
+            "rtt_ms": self.rtt_percentiles(),
+        }
@@ -16,8 +16,9 @@ BASE_URI = "https://api.ecoflow.com"
 
 class EcoflowPrivateApiClient(EcoflowApiClient):
 
-    def __init__(self, ecoflow_username: str, ecoflow_password: str, group: str):
-        super().__init__()
+    def __init__(self, ecoflow_username: str, ecoflow_password: str, group: str,
+                 session: aiohttp.ClientSession | None = None):
+        super().__init__(session)
         self.ecoflow_password = ecoflow_password
         self.ecoflow_username = ecoflow_username
         self.group = group
@@ -27,34 +28,33 @@ class EcoflowPrivateApiClient(EcoflowApiClient):
 
 
     async def login(self):
-        async with aiohttp.ClientSession() as session:
-            url = f"{BASE_URI}/auth/login"
-            headers = {"lang": "en_US", "content-type": "application/json"}
-            data = {"email": self.ecoflow_username,
-                    "password": base64.b64encode(self.ecoflow_password.encode()).decode(),
-                    "scene": "IOT_APP",
-                    "userType": "ECOFLOW"}
+        url = f"{BASE_URI}/auth/login"
+        headers = {"lang": "en_US", "content-type": "application/json"}
+        data = {"email": self.ecoflow_username,
+                "password": base64.b64encode(self.ecoflow_password.encode()).decode(),
+                "scene": "IOT_APP",
+                "userType": "ECOFLOW"}
 
-            _LOGGER.info(f"Login to EcoFlow API {url}")
+        _LOGGER.info(f"Login to EcoFlow API {url}")
 
-            resp = await session.post(url, headers=headers, json=data)
+        async with self._get_session().post(url, headers=headers, json=data) as resp:
             response = await self._get_json_response(resp)
 
-            try:
-                self.token = response["data"]["token"]
-                self.user_id = response["data"]["user"]["userId"]
-                self.user_name = response["data"]["user"].get("name", "<no user name>")
-            except KeyError as key:
-                raise EcoflowException(f"Failed to extract key {key} from response: {response}")
+        try:
+            self.token = response["data"]["token"]
+            self.user_id = response["data"]["user"]["userId"]
+            self.user_name = response["data"]["user"].get("name", "<no user name>")
+        except KeyError as key:
+            raise EcoflowException(f"Failed to extract key {key} from response: {response}")
 
-            _LOGGER.info(f"Successfully logged in: {self.user_name}")
+        _LOGGER.info(f"Successfully logged in: {self.user_name}")
 
-            _LOGGER.info(f"Requesting IoT MQTT credentials")
-            response = await self.__call_api("/iot-auth/app/certification")
-            self._accept_mqqt_certification(response)
+        _LOGGER.info(f"Requesting IoT MQTT credentials")
+        response = await self.__call_api("/iot-auth/app/certification")
+        self._accept_mqqt_certification(response)
 
-            # Should be ANDROID_..str.._user_id !!!
-            self.mqtt_info.client_id = f'ANDROID_{str(uuid.random_uuid_hex()).upper()}_{self.user_id}'
+        # Should be ANDROID_..str.._user_id !!!
+        self.mqtt_info.client_id = f'ANDROID_{str(uuid.random_uuid_hex()).upper()}_{self.user_id}'
 
 
     # Failed to connect to MQTT: not authorised
@@ -109,13 +109,13 @@ class EcoflowPrivateApiClient(EcoflowApiClient):
         )
 
     async def __call_api(self, endpoint: str, params: dict[str: any] | None = None) -> dict:
-        async with aiohttp.ClientSession() as session:
-            headers = {"lang": "en_US", "authorization": f"Bearer {self.token}", "content-type": "application/json"}
-            user_data = {"userId": self.user_id}
-            req_params = {}
-            if params is not None:
-                req_params.update(params)
-
-            resp = await session.get(f"{BASE_URI}{endpoint}", data=user_data, params=req_params, headers=headers)
+        headers = {"lang": "en_US", "authorization": f"Bearer {self.token}", "content-type": "application/json"}
+        user_data = {"userId": self.user_id}
+        req_params = {}
+        if params is not None:
+            req_params.update(params)
+
+        async with self._get_session().get(f"{BASE_URI}{endpoint}", data=user_data, params=req_params,
+                                           headers=headers) as resp:
             _LOGGER.info(f"Request: {endpoint} {req_params}: got {resp}")
-            return await self._get_json_response(resp)
\ No newline at end of file
+            return await self._get_json_response(resp)
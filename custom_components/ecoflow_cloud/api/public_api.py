@@ -1,5 +1,7 @@
+import asyncio
 import hashlib
 import hmac
+import json
 import logging
 import random
 import time
@@ -8,7 +10,9 @@ from datetime import datetime
 import aiohttp
 from homeassistant.util import dt
 
-from . import EcoflowApiClient
+from . import EcoflowApiClient, EcoflowException
+from .rate_limiter import EcoflowRateLimiter, PRIORITY_COMMAND, PRIORITY_RECOVERY, PRIORITY_SWEEP, \
+    BACKOFF_HTTP_STATUS, is_throttled
 from ..devices import DiagnosticDevice, EcoflowDeviceInfo
 
 _LOGGER = logging.getLogger(__name__)
@@ -20,8 +24,10 @@ BASE_URI = "https://api-e.ecoflow.com/iot-open/sign"
 # It's recommended to use a static client_id for your application.
 
 class EcoflowPublicApiClient(EcoflowApiClient):
-    def __init__(self, access_key: str, secret_key: str, group: str):
-        super().__init__()
+    def __init__(self, access_key: str, secret_key: str, group: str, session: aiohttp.ClientSession | None = None):
+        super().__init__(session)
+        self.base_uri = BASE_URI
+        self.rate_limiter = EcoflowRateLimiter()
         self.access_key = access_key
         self.secret_key = secret_key
         self.group = group
@@ -37,9 +43,9 @@ class EcoflowPublicApiClient(EcoflowApiClient):
         # client_id möglichst stabil wählen
         self.mqtt_info.client_id = f"Hassio-{self.mqtt_info.username}-{self.group.replace(' ', '-')}"
 
-    async def fetch_all_available_devices(self) -> list[EcoflowDeviceInfo]:
+    async def fetch_all_available_devices(self, priority: int = PRIORITY_COMMAND) -> list[EcoflowDeviceInfo]:
         _LOGGER.info("Requesting all devices")
-        response = await self.call_api("/device/list")
+        response = await self.call_api("/device/list", priority=priority)
         result = []
         for device in response["data"]:
             sn = device["sn"]
@@ -64,59 +70,90 @@ class EcoflowPublicApiClient(EcoflowApiClient):
 
     async def quota_all(self, device_sn: str | None):
         if not device_sn:
-            target_devices = self.devices.keys()
-            # update all statuses
-            devices = await self.fetch_all_available_devices()
-            for dev in devices:
-                if dev.sn in self.devices:
-                    self.devices[dev.sn].data.update_status({"params": {"status": dev.status}})
+            await self.quota_sweep(list(self.devices.keys()))
         else:
-            target_devices = [device_sn]
+            # single device requests come from staleness recovery
+            await self.__quota(device_sn, PRIORITY_RECOVERY)
+
+    async def quota_sweep(self, device_sns: list[str]):
+        # update all statuses with a single /device/list
+        devices = await self.fetch_all_available_devices(PRIORITY_SWEEP)
+        for dev in devices:
+            if dev.sn in self.devices:
+                self.devices[dev.sn].data.update_status({"params": {"status": dev.status}})
+
+        start = time.monotonic()
+        semaphore = asyncio.Semaphore(max(self.quota_max_in_flight, 1))
+
+        async def bounded_quota(sn: str):
+            async with semaphore:
+                await self.__quota(sn, PRIORITY_SWEEP)
+
+        # return_exceptions: one failing SN must not abort the sweep for the others
+        results = await asyncio.gather(*[bounded_quota(sn) for sn in device_sns], return_exceptions=True)
+        errors = {}
+        for sn, result in zip(device_sns, results):
+            if isinstance(result, Exception):
+                _LOGGER.warning("Failed to fetch quota for %s: %s", sn, result)
+                errors[sn] = str(result)
+
+        self.last_sweep_errors = errors
+        self.last_sweep_latency = time.monotonic() - start
+
+    async def __quota(self, sn: str, priority: int):
+        raw = await self.call_api("/device/quota/all", {"sn": sn}, priority)
+        if "data" in raw:
+            self.devices[sn].data.update_data({"params": raw["data"]})
+
+    async def call_api(self, endpoint: str, params: dict[str, str] = None, priority: int = PRIORITY_COMMAND) -> dict:
+        await self.rate_limiter.acquire(priority)
 
-        for sn in target_devices:
-            raw = await self.call_api("/device/quota/all", {"sn": sn})
-            if "data" in raw:
-                self.devices[sn].data.update_data({"params": raw["data"]})
-
-    async def call_api(self, endpoint: str, params: dict[str, str] = None) -> dict:
         # Erzeuge pro Request neuen nonce & timestamp
         nonce = str(random.randint(10000, 1000000))
         timestamp = str(int(time.time() * 1000))
 
-        async with aiohttp.ClientSession() as session:
-            params_str = ""
-            if params is not None:
-                params_str = self.__sort_and_concat_params(params)
-
-            sign = self.__gen_sign(params_str, nonce, timestamp)
-
-            headers = {
-                'accessKey': self.access_key,
-                'nonce': nonce,
-                'timestamp': timestamp,
-                'sign': sign
-            }
-
-            url = f"{BASE_URI}{endpoint}?{params_str}"
-            resp = await session.get(url, headers=headers)
-
-            # **Ab hier: raw Text loggen**
-            raw_text = await resp.text()
-            _LOGGER.debug(f"[call_api] Raw response from {endpoint}: {raw_text}")
-
-            # Dann JSON parsen
-            if resp.status != 200:
-                raise EcoflowException(f"Got HTTP status code {resp.status}: {resp.reason}")
-
-            try:
-                json_resp = await resp.json()
-            except Exception as error:
-                raise EcoflowException(f"Failed to parse JSON: {error}")
-
-            # Hier evtl. noch mal loggen, wenn du möchtest
-            _LOGGER.debug(f"[call_api] Parsed JSON from {endpoint}: {json_resp}")
-
-            return json_resp
+        params_str = ""
+        if params is not None:
+            params_str = self.__sort_and_concat_params(params)
+
+        sign = self.__gen_sign(params_str, nonce, timestamp)
+
+        headers = {
+            'accessKey': self.access_key,
+            'nonce': nonce,
+            'timestamp': timestamp,
+            'sign': sign
+        }
+
+        url = f"{self.base_uri}{endpoint}?{params_str}"
+        try:
+            async with self._get_session().get(url, headers=headers) as resp:
+                # Body nur einmal lesen
+                raw_text = await resp.text()
+                _LOGGER.debug("[call_api] Raw response from %s: %s", endpoint, raw_text)
+
+                if resp.status in BACKOFF_HTTP_STATUS:
+                    self.rate_limiter.penalize(f"HTTP {resp.status}")
+                if resp.status != 200:
+                    raise EcoflowException(f"Got HTTP status code {resp.status}: {resp.reason}")
+        except aiohttp.ClientConnectionError as error:
+            self.rate_limiter.penalize(error)
+            raise EcoflowException(f"Connection error on {endpoint}: {error}")
+        except asyncio.TimeoutError:
+            self.rate_limiter.penalize("timeout")
+            raise EcoflowException(f"Timeout on {endpoint}")
+
+        try:
+            json_resp = json.loads(raw_text)
+        except Exception as error:
+            raise EcoflowException(f"Failed to parse JSON: {error}")
+
+        if is_throttled(json_resp):
+            self.rate_limiter.penalize(f"code {json_resp.get('code')}: {json_resp.get('message')}")
+            raise EcoflowException(f"Throttled on {endpoint}: {json_resp.get('code')} {json_resp.get('message')}")
+
+        self.rate_limiter.success()
+        return json_resp
 
     def __create_device_info(self, device_sn: str, device_name: str,
                              device_type: str, status: int = -1) -> EcoflowDeviceInfo:
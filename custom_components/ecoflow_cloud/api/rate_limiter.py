@@ -0,0 +1,138 @@
+import asyncio
+import heapq
+import logging
+import time
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# lower value is served first
+PRIORITY_COMMAND = 0
+PRIORITY_RECOVERY = 1
+PRIORITY_SWEEP = 2
+
+DEFAULT_RATE = 2.0  # requests per second
+DEFAULT_BURST = 10
+
+BACKOFF_MIN_SEC = 1.0
+BACKOFF_MAX_SEC = 300.0
+
+# HTTP status codes that mean "slow down" rather than "this request is wrong"
+BACKOFF_HTTP_STATUS = {429, 500, 502, 503, 504}
+
+# the Open API reports throttling with HTTP 200 and an error code in the body,
+# the code is not documented consistently, so the message is checked as well
+BACKOFF_API_CODES = {"429"}
+BACKOFF_API_MESSAGES = ("too frequent", "frequently", "rate limit", "too many requests", "limit exceeded")
+
+
+def is_throttled(response: dict[str, Any]) -> bool:
+    code = str(response.get("code", "0"))
+    if code == "0":
+        return False
+    message = str(response.get("message", "")).lower()
+    return code in BACKOFF_API_CODES or any(m in message for m in BACKOFF_API_MESSAGES)
+
+
+class EcoflowRateLimiter:
+    """
+    Account-wide token bucket for the EcoFlow Open API.
+    Waiting requests are served by priority (user commands, staleness recovery, periodic sweeps)
+    and the whole bucket pauses with exponential backoff after throttling errors.
+    Waiters sleep on their own future, a single timer due when the next token is (or the backoff
+    ends) hands the tokens to the head of the queue.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.__tokens = float(burst)
+        self.__updated = time.monotonic()
+        self.__waiters: list[tuple[int, int, asyncio.Future]] = []
+        self.__seq = 0
+        self.__timer: asyncio.TimerHandle | None = None
+        self.__backoff_delay = 0.0
+        self.__backoff_until = 0.0
+        self.throttled = 0
+
+    async def acquire(self, priority: int = PRIORITY_COMMAND):
+        now = time.monotonic()
+        self.__refill(now)
+        if not self.__waiters and self.__can_take(now):
+            self.__tokens -= 1
+            return
+
+        self.__seq += 1
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, self.__seq, future)
+        heapq.heappush(self.__waiters, entry)
+        if self.__timer is None:
+            self.__schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                self.__waiters.remove(entry)
+                heapq.heapify(self.__waiters)
+            else:
+                # the token was handed over right before the cancellation, the next waiter gets it
+                self.__tokens += 1
+                self.__schedule()
+            raise
+
+    def success(self):
+        self.__backoff_delay = 0.0
+
+    def penalize(self, reason: Any):
+        self.throttled += 1
+        self.__backoff_delay = min(max(self.__backoff_delay * 2, BACKOFF_MIN_SEC), BACKOFF_MAX_SEC)
+        self.__backoff_until = time.monotonic() + self.__backoff_delay
+        _LOGGER.warning("EcoFlow API throttling (%s), pausing requests for %.0f sec", reason, self.__backoff_delay)
+        if self.__waiters:
+            self.__schedule()
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        self.__refill(now)
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self.__tokens, 2),
+            "queue_length": len(self.__waiters),
+            "backoff_sec": self.__backoff_delay,
+            "backoff_remaining_sec": round(max(self.__backoff_until - now, 0), 1),
+            "throttled": self.throttled,
+        }
+
+    def __can_take(self, now: float) -> bool:
+        # a token refilled by the timer may come out a hair below 1
+        return now >= self.__backoff_until and self.__tokens >= 1 - 1e-9
+
+    def __schedule(self):
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+        if not self.__waiters:
+            return
+        now = time.monotonic()
+        self.__refill(now)
+        delay = max(self.__backoff_until - now, 0.0)
+        if not delay:
+            delay = max((1 - self.__tokens) / self.rate, 0.0)
+        self.__timer = asyncio.get_running_loop().call_later(delay, self.__dispatch)
+
+    def __dispatch(self):
+        self.__timer = None
+        now = time.monotonic()
+        self.__refill(now)
+        while self.__waiters and self.__can_take(now):
+            _, _, future = heapq.heappop(self.__waiters)
+            if future.done():
+                continue
+            self.__tokens -= 1
+            future.set_result(None)
+        self.__schedule()
+
+    def __refill(self, now: float):
+        self.__tokens = min(self.burst, self.__tokens + (now - self.__updated) * self.rate)
+        self.__updated = now
@@ -1,64 +1,61 @@
 from __future__ import annotations
 
 import logging
-import json
 
+from homeassistant.core import callback
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
+from .devices import EcoflowDataKeys
+
 _LOGGER = logging.getLogger(__name__)
 
 class BatterySensorManager:
     """
     Verwalte dynamisch Sensoren pro Battery-SN (z.B. bp_addr.HJ32ZDH4XYZ...).
+    Nur für Geräte mit battery_pack_prefix(); neue Batterien werden über den Prefix-Index des Data Holders erkannt.
     """
 
     def __init__(self, add_entities_callback: AddEntitiesCallback, device, coordinator):
         self._add_entities = add_entities_callback
         self._device = device
         self._coordinator = coordinator
+        self._prefix: str = device.battery_pack_prefix()
+        device.data.index_prefix(self._prefix)
 
         # Merkt sich, welche Batterien schon angelegt sind
         self._battery_sensors: dict[str, BatteryModuleSensor] = {}
 
-    def process_quota_data(self, raw_params: dict[str, any]):
+    @callback
+    def discover(self):
         """
-        Wird nach jedem Coordinator-Update aufgerufen,
-        um in raw_params nach 'bp_addr.<SN>'-Feldern zu suchen und ggf. neue Entities anzulegen.
+        Coordinator-Listener: betrachtet nur Keys, die seit dem letzten Aufruf zum ersten Mal gesehen wurden,
+        statt bei jedem Update alle params zu durchsuchen.
         """
-        for key, val in raw_params.items():
-            if not key.startswith("bp_addr."):
-                continue
-            # key z.B. "bp_addr.HJ32ZDH4ZF7E0051"
-            # val z.B. ein JSON-String => {"bpSoc":17,"bpSoh":99,...}
-            if key in self._battery_sensors:
-                # Schon angelegt => nur updaten
+        new_sensors = []
+        for key in self._device.data.take_new_keys(self._prefix):
+            # "bp_addr.HJ32ZDH4ZF7E0051" oder ein Sub-Key "bp_addr.HJ32ZDH4ZF7E0051.bpSoc"
+            battery_key = self._prefix + key[len(self._prefix):].split(".", 1)[0]
+            if battery_key in self._battery_sensors:
                 continue
 
-            # Neues Battery-SN-Entity anlegen
-            _LOGGER.info(f"Discovered new Battery Module {key}")
-            sensor_entity = BatteryModuleSensor(self._device, self._coordinator, key)
-            self._battery_sensors[key] = sensor_entity
+            _LOGGER.info("Discovered new Battery Module %s", battery_key)
+            sensor_entity = BatteryModuleSensor(self._device, self._coordinator, battery_key)
+            self._battery_sensors[battery_key] = sensor_entity
+            new_sensors.append(sensor_entity)
 
+        if new_sensors:
             # Jetzt im HA-System registrieren
-            self._add_entities([sensor_entity])
-
-    def update_existing_sensors(self):
-        """
-        Coordinator hat neue Daten => existierende Entities aktualisieren
-        (In HA macht das normal 'CoordinatorEntity' auto. 
-         Hier aber kann man manuell .schedule_update_ha_state() aufrufen, wenn nötig.)
-        """
-        for sensor in self._battery_sensors.values():
-            sensor.update_from_coordinator()
+            self._add_entities(new_sensors)
 
 class BatteryModuleSensor(Entity):
     """
     Repräsentiert EINE Batteriemodul-Einheit. Holt Daten aus bp_addr.<SN>.
-    Zeigt z.B. bpSoc, bpSoh, bpTemp etc. als Attribute an oder man baut
-    pro Info einen Sub-Sensor => Variation.
+    State = bpSoc, bpSoh/bpCycles/bpTemp als Attribute. Wird nur benachrichtigt, wenn sich einer dieser Sub-Keys ändert.
     """
 
+    _attr_should_poll = False
+
     def __init__(self, device, coordinator, battery_key: str):
         self._device = device
         self._coordinator = coordinator
@@ -67,6 +64,14 @@ class BatteryModuleSensor(Entity):
         self._state = None
         self._unique_id = f"{device.device_info.sn}-{battery_key}"
 
+        # z.B. "bp_addr.HJ32ZDH4ZF7E0051.bpSoc", einmal gebaut statt bei jedem Update
+        self._soc_key = f"{battery_key}.bpSoc"
+        self._attr_keys = {
+            "bpSoh": f"{battery_key}.bpSoh",
+            "bpCycles": f"{battery_key}.bpCycles",
+            "bpTemp": f"{battery_key}.bpTemp",
+        }
+
     @property
     def name(self) -> str:
         return f"{self._device.device_info.name} {self._battery_key}"
@@ -83,40 +88,27 @@ class BatteryModuleSensor(Entity):
     def state(self):
         return self._state
 
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        keys = EcoflowDataKeys([self._soc_key, *self._attr_keys.values()])
+        self.async_on_remove(self._coordinator.async_add_listener(self.update_from_coordinator, keys))
+        self.update_from_coordinator()
+
+    @callback
     def update_from_coordinator(self):
-        """Alle relevanten Felder aus coordinator.data (params) auslesen und in self._attrs speichern."""
+        """Liest die Sub-Keys aus params; geschrieben wird nur, wenn sich etwas geändert hat."""
         params = self._device.data.params
-        # params["bp_addr.HJ32ZDH4ZF7E0051.bpSoc"], z.B.
-
-        # z.B. "bp_addr.HJ32ZDH4ZF7E0051.bpSoc" => Key = f"{self._battery_key}.bpSoc"
-        # Sammeln wir mal State = SoC
-        main_soc_key = f"{self._battery_key}.bpSoc"
-        if main_soc_key in params:
-            self._state = params[main_soc_key]
-        else:
-            self._state = "unknown"
-
-        # z.B. S0H, cycles etc. => als Attribute
-        soh_key = f"{self._battery_key}.bpSoh"
-        cyc_key = f"{self._battery_key}.bpCycles"
-        if soh_key in params:
-            self._attrs["bpSoh"] = params[soh_key]
-        if cyc_key in params:
-            self._attrs["bpCycles"] = params[cyc_key]
-
-        # Weitere Felder (Temperaturen, Akkuleistung etc.) 
-        # -> in self._attrs
-        # z.B. "bp_addr.HJ32ZDH4ZF7E0051.bpTemp" => array
-        temp_key = f"{self._battery_key}.bpTemp"
-        if temp_key in params:
-            self._attrs["bpTemp"] = params[temp_key]
-
-        # ... etc. so viele Felder du willst ...
-        self.schedule_update_ha_state()
-
-    def update(self):
-        """
-        Standard-HA-Funktion: 
-        Ruft update_from_coordinator auf (im Sync-Context).
-        """
-        self.update_from_coordinator()
+        changed = False
+
+        state = params.get(self._soc_key, "unknown")
+        if state != self._state:
+            self._state = state
+            changed = True
+
+        for title, key in self._attr_keys.items():
+            if key in params and self._attrs.get(title) != params[key]:
+                self._attrs[title] = params[key]
+                changed = True
+
+        if changed:
+            self.async_write_ha_state()
@@ -8,6 +8,7 @@ from homeassistant.core import callback
 from homeassistant.helpers import selector
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.device_registry import DeviceRegistry
 from homeassistant.helpers.entity_registry import EntityRegistry
 
@@ -15,9 +16,15 @@ from . import ECOFLOW_DOMAIN, CONFIG_VERSION, CONF_ACCESS_KEY, CONF_SECRET_KEY,
     CONF_SELECT_DEVICE_KEY, CONF_DEVICE_TYPE, CONF_DEVICE_LIST, CONF_LOAD_ALL_DEVICES, \
     CONF_DEVICE_NAME, CONF_DEVICE_ID, OPTS_DIAGNOSTIC_MODE, \
     OPTS_POWER_STEP, OPTS_REFRESH_PERIOD_SEC, DEFAULT_REFRESH_PERIOD_SEC, extract_options, extract_devices, \
-    DeviceOptions, DeviceData, CONF_GROUP
-from .api import EcoflowException
+    DeviceOptions, DeviceData, CONF_GROUP, OPTS_HISTORY_SIZE, DEFAULT_HISTORY_SIZE, \
+    OPTS_STATE_MIN_INTERVAL_SEC, DEFAULT_STATE_MIN_INTERVAL_SEC, OPTS_STATE_MAX_AGE_SEC, DEFAULT_STATE_MAX_AGE_SEC, \
+    OPTS_SENSOR_FILTERS, OPTS_INGEST_QUEUE_SIZE, OPTS_INGEST_OVERFLOW, \
+    OPTS_QUOTA_MAX_IN_FLIGHT, OPTS_INGEST_LOG_SAMPLE, OPTS_RAW_FRAME_BUFFER_SIZE
+from .api import EcoflowException, DEFAULT_QUOTA_MAX_IN_FLIGHT
+from .api.ingest import DEFAULT_INGEST_QUEUE_SIZE, DEFAULT_INGEST_OVERFLOW, OVERFLOW_POLICIES
+from .api.ingest_log import DEFAULT_INGEST_LOG_SAMPLE, DEFAULT_RAW_FRAME_BUFFER_SIZE
 from .devices import EcoflowDeviceInfo
+from .entities.coalescer import FILTER_GROUPS, SENSOR_FILTER_FIELDS
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -142,7 +149,8 @@ class EcoflowConfigFlow(ConfigFlow, domain=ECOFLOW_DOMAIN):
         self.new_data[CONF_PASSWORD] = user_input.get(CONF_PASSWORD)
 
         from .api.private_api import EcoflowPrivateApiClient
-        self.auth = EcoflowPrivateApiClient(self.new_data[CONF_USERNAME], self.new_data[CONF_PASSWORD], self.new_data[CONF_GROUP])
+        self.auth = EcoflowPrivateApiClient(self.new_data[CONF_USERNAME], self.new_data[CONF_PASSWORD], self.new_data[CONF_GROUP],
+                                            async_get_clientsession(self.hass))
 
         errors: Dict[str, str] = {}
         try:
@@ -194,7 +202,10 @@ class EcoflowConfigFlow(ConfigFlow, domain=ECOFLOW_DOMAIN):
         self.new_options[CONF_DEVICE_LIST][sn] = {
             OPTS_POWER_STEP: device.default_charging_power_step(),
             OPTS_REFRESH_PERIOD_SEC: DEFAULT_REFRESH_PERIOD_SEC,
-            OPTS_DIAGNOSTIC_MODE: False
+            OPTS_DIAGNOSTIC_MODE: False,
+            OPTS_HISTORY_SIZE: DEFAULT_HISTORY_SIZE,
+            OPTS_STATE_MIN_INTERVAL_SEC: DEFAULT_STATE_MIN_INTERVAL_SEC,
+            OPTS_STATE_MAX_AGE_SEC: DEFAULT_STATE_MAX_AGE_SEC
         }
 
         self.new_data[CONF_DEVICE_LIST][sn] = {
@@ -221,7 +232,8 @@ class EcoflowConfigFlow(ConfigFlow, domain=ECOFLOW_DOMAIN):
         self.new_data[CONF_LOAD_ALL_DEVICES] = False
 
         from .api.public_api import EcoflowPublicApiClient
-        self.auth = EcoflowPublicApiClient(self.new_data[CONF_ACCESS_KEY], self.new_data[CONF_SECRET_KEY], self.new_data[CONF_GROUP])
+        self.auth = EcoflowPublicApiClient(self.new_data[CONF_ACCESS_KEY], self.new_data[CONF_SECRET_KEY], self.new_data[CONF_GROUP],
+                                           async_get_clientsession(self.hass))
 
         errors: Dict[str, str] = {}
         try:
@@ -315,7 +327,10 @@ class EcoflowConfigFlow(ConfigFlow, domain=ECOFLOW_DOMAIN):
         self.new_options[CONF_DEVICE_LIST][sn] = {
             OPTS_POWER_STEP: device.default_charging_power_step(),
             OPTS_REFRESH_PERIOD_SEC: DEFAULT_REFRESH_PERIOD_SEC,
-            OPTS_DIAGNOSTIC_MODE: False
+            OPTS_DIAGNOSTIC_MODE: False,
+            OPTS_HISTORY_SIZE: DEFAULT_HISTORY_SIZE,
+            OPTS_STATE_MIN_INTERVAL_SEC: DEFAULT_STATE_MIN_INTERVAL_SEC,
+            OPTS_STATE_MAX_AGE_SEC: DEFAULT_STATE_MAX_AGE_SEC
         }
 
         self.new_data[CONF_DEVICE_LIST][sn] = {
@@ -341,10 +356,46 @@ class EcoflowOptionsFlow(OptionsFlow):
             self.device_selector[f"{device.name} ({device.sn})"] = device
 
         self.selected_device = None
+        self.device_options_input: dict[str, Any] = {}
 
     async def async_step_init(self, user_input: dict[str, Any] | None = None):
+        return self.async_show_menu(step_id="init", menu_options=["device", "account"])
+
+    async def async_step_account(self, user_input: dict[str, Any] | None = None):
+        # account wide: the MQTT connection and its ingest worker are shared by all devices
+        if user_input is None:
+            options = self.config_entry.options
+            return self.async_show_form(
+                step_id="account",
+                last_step=True,
+                data_schema=vol.Schema({
+                    vol.Required(OPTS_INGEST_QUEUE_SIZE,
+                                 default=options.get(OPTS_INGEST_QUEUE_SIZE, DEFAULT_INGEST_QUEUE_SIZE)):
+                        vol.All(int, vol.Range(min=10, max=100000)),
+                    vol.Required(OPTS_INGEST_OVERFLOW,
+                                 default=options.get(OPTS_INGEST_OVERFLOW, DEFAULT_INGEST_OVERFLOW)):
+                        selector.SelectSelector(
+                            selector.SelectSelectorConfig(options=OVERFLOW_POLICIES,
+                                                          translation_key=OPTS_INGEST_OVERFLOW,
+                                                          mode=selector.SelectSelectorMode.DROPDOWN),
+                        ),
+                    vol.Required(OPTS_QUOTA_MAX_IN_FLIGHT,
+                                 default=options.get(OPTS_QUOTA_MAX_IN_FLIGHT, DEFAULT_QUOTA_MAX_IN_FLIGHT)):
+                        vol.All(int, vol.Range(min=1, max=32)),
+                    vol.Required(OPTS_INGEST_LOG_SAMPLE,
+                                 default=options.get(OPTS_INGEST_LOG_SAMPLE, DEFAULT_INGEST_LOG_SAMPLE)):
+                        vol.All(int, vol.Range(min=1)),
+                    vol.Required(OPTS_RAW_FRAME_BUFFER_SIZE,
+                                 default=options.get(OPTS_RAW_FRAME_BUFFER_SIZE, DEFAULT_RAW_FRAME_BUFFER_SIZE)):
+                        vol.All(int, vol.Range(min=0, max=1000)),
+                })
+            )
+
+        return self.async_create_entry(title="", data={**self.config_entry.options, **user_input})
+
+    async def async_step_device(self, user_input: dict[str, Any] | None = None):
         if user_input is None:
-            return self.async_show_form(step_id="init",
+            return self.async_show_form(step_id="device",
                                         data_schema=vol.Schema({
                                             vol.Required(CONF_SELECT_DEVICE_KEY): vol.In(
                                                 list(self.device_selector.keys()))
@@ -358,19 +409,50 @@ class EcoflowOptionsFlow(OptionsFlow):
             device_options: DeviceOptions = self.devices_options[self.selected_device.sn]
             return self.async_show_form(
                 step_id="options",
-                last_step=True,
+                last_step=False,
                 data_schema=vol.Schema({
                     vol.Required(OPTS_POWER_STEP, default=device_options.power_step): int,
                     vol.Required(OPTS_REFRESH_PERIOD_SEC, default=device_options.refresh_period): int,
                     vol.Required(OPTS_DIAGNOSTIC_MODE, default=device_options.diagnostic_mode): bool,
+                    vol.Required(OPTS_HISTORY_SIZE, default=device_options.history_size): vol.All(int, vol.Range(min=1)),
+                    vol.Required(OPTS_STATE_MIN_INTERVAL_SEC, default=device_options.state_min_interval): vol.All(int, vol.Range(min=0)),
+                    vol.Required(OPTS_STATE_MAX_AGE_SEC, default=device_options.state_max_age): vol.All(int, vol.Range(min=0)),
                 })
             )
 
-        new_options = {**self.config_entry.options}
-        new_options[CONF_DEVICE_LIST][self.selected_device.sn] = {
+        self.device_options_input = {
             OPTS_POWER_STEP: user_input[OPTS_POWER_STEP],
             OPTS_REFRESH_PERIOD_SEC: user_input[OPTS_REFRESH_PERIOD_SEC],
-            OPTS_DIAGNOSTIC_MODE: user_input[OPTS_DIAGNOSTIC_MODE]
+            OPTS_DIAGNOSTIC_MODE: user_input[OPTS_DIAGNOSTIC_MODE],
+            OPTS_HISTORY_SIZE: user_input[OPTS_HISTORY_SIZE],
+            OPTS_STATE_MIN_INTERVAL_SEC: user_input[OPTS_STATE_MIN_INTERVAL_SEC],
+            OPTS_STATE_MAX_AGE_SEC: user_input[OPTS_STATE_MAX_AGE_SEC]
+        }
+        return await self.async_step_filters()
+
+    async def async_step_filters(self, user_input: dict[str, Any] | None = None):
+        # empty fields do not filter, there are no defaults
+        if user_input is None:
+            sensor_filters = self.devices_options[self.selected_device.sn].sensor_filters
+            schema = {}
+            for group in FILTER_GROUPS:
+                for field in SENSOR_FILTER_FIELDS:
+                    current = sensor_filters.get(group, {}).get(field)
+                    key = vol.Optional(f"{group}_{field}", description={"suggested_value": current})
+                    schema[key] = vol.All(vol.Coerce(float), vol.Range(min=0))
+            return self.async_show_form(step_id="filters", last_step=True, data_schema=vol.Schema(schema))
+
+        sensor_filters = {}
+        for group in FILTER_GROUPS:
+            fields = {field: user_input[f"{group}_{field}"] for field in SENSOR_FILTER_FIELDS
+                      if user_input.get(f"{group}_{field}") is not None}
+            if fields:
+                sensor_filters[group] = fields
+
+        new_options = {**self.config_entry.options}
+        new_options[CONF_DEVICE_LIST][self.selected_device.sn] = {
+            **self.device_options_input,
+            OPTS_SENSOR_FILTERS: sensor_filters
         }
 
         return self.async_create_entry(title="", data=new_options)
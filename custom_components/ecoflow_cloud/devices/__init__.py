@@ -1,6 +1,5 @@
 import dataclasses
 import datetime
-import json
 import logging
 from abc import ABC, abstractmethod
 from typing import Any, Callable, Dict
@@ -10,15 +9,27 @@ from homeassistant.components.number import NumberEntity
 from homeassistant.components.select import SelectEntity
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.components.switch import SwitchEntity
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, CALLBACK_TYPE, callback
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.util import dt
 
-from .data_holder import EcoflowDataHolder
-from ..api import EcoflowApiClient
+from .data_holder import EcoflowDataHolder, DEFAULT_HISTORY_SIZE
+from ..api import EcoflowApiClient, codec
 
 _LOGGER = logging.getLogger(__name__)
 
+MSG_KIND_DATA = "data"
+MSG_KIND_SET = "set"
+MSG_KIND_SET_REPLY = "set_reply"
+MSG_KIND_GET = "get"
+MSG_KIND_GET_REPLY = "get_reply"
+MSG_KIND_STATUS = "status"
+
+PAYLOAD_CODEC_JSON = "json"
+PAYLOAD_CODEC_PROTOBUF = "protobuf"
+PAYLOAD_CODEC_AUTO = "auto"
+
 @dataclasses.dataclass
 class EcoflowDeviceInfo:
     public_api: bool
@@ -44,10 +55,27 @@ class EcoflowDeviceInfo:
         ]
         return list(filter(lambda v: v is not None, topics))
 
+    def topic_kinds(self) -> dict[str, str]:
+        kinds = {
+            self.data_topic: MSG_KIND_DATA,
+            self.get_topic: MSG_KIND_GET,
+            self.get_reply_topic: MSG_KIND_GET_REPLY,
+            self.set_topic: MSG_KIND_SET,
+            self.set_reply_topic: MSG_KIND_SET_REPLY,
+            self.status_topic: MSG_KIND_STATUS
+        }
+        kinds.pop(None, None)
+        return kinds
+
 @dataclasses.dataclass
 class EcoflowBroadcastDataHolder:
     data_holder: EcoflowDataHolder
     changed: bool
+    changed_keys: set[str] = dataclasses.field(default_factory=set)
+
+
+class EcoflowDataKeys(frozenset):
+    """Coordinator listener context: the params keys an entity reads. Such listeners are only called when one of them changed."""
 
 class DeviceData:
     """Klasse zur Speicherung von Gerätedaten."""
@@ -58,36 +86,164 @@ class DeviceData:
     def update_params(self, new_params: Dict[str, Any]):
         """Aktualisiert die params mit neuen Daten."""
         self.params.update(new_params)
-        _LOGGER.debug(f"DeviceData updated with params: {self.params}")
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("DeviceData updated with %u params: %s", len(new_params), list(new_params))
 
 class EcoflowDeviceUpdateCoordinator(DataUpdateCoordinator[EcoflowBroadcastDataHolder]):
     def __init__(self, hass, holder: EcoflowDataHolder, refresh_period: int, client) -> None:
         """Initialize the coordinator."""
+        # no timer of its own: the account coordinator refreshes it every refresh_interval
         super().__init__(
             hass,
             _LOGGER,
             name="Ecoflow update coordinator",
             always_update=True,
-            update_interval=datetime.timedelta(seconds=max(refresh_period, 30)),
+            update_interval=None,
         )
+        self.refresh_interval = datetime.timedelta(seconds=max(refresh_period, 30))
         self.holder = holder
         self.client = client               # ← Hier die Referenz setzen
         self.__last_broadcast = dt.utcnow().replace(
             year=2000, month=1, day=1, hour=0, minute=0, second=0
         )
+        self.__key_listeners: dict[str, list[CALLBACK_TYPE]] = {}
+        self.__remove_dispatcher: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE, context: Any = None) -> Callable[[], None]:
+        if isinstance(context, EcoflowDataKeys):
+            return self.__add_key_listener(context, update_callback)
+        return super().async_add_listener(update_callback, context)
+
+    def __add_key_listener(self, keys: EcoflowDataKeys, update_callback: CALLBACK_TYPE) -> Callable[[], None]:
+        for key in keys:
+            self.__key_listeners.setdefault(key, []).append(update_callback)
+        if self.__remove_dispatcher is None:
+            # a single regular listener fans out to the keyed ones
+            self.__remove_dispatcher = super().async_add_listener(self.__dispatch_changed_keys)
+
+        @callback
+        def remove_listener() -> None:
+            for k in keys:
+                listeners = self.__key_listeners.get(k)
+                if listeners and update_callback in listeners:
+                    listeners.remove(update_callback)
+                if not listeners:
+                    self.__key_listeners.pop(k, None)
+            if not self.__key_listeners and self.__remove_dispatcher is not None:
+                self.__remove_dispatcher()
+                self.__remove_dispatcher = None
+
+        return remove_listener
+
+    @callback
+    def __dispatch_changed_keys(self) -> None:
+        if self.data is None:
+            return
+        notified = set()
+        for key in self.data.changed_keys:
+            for update_callback in self.__key_listeners.get(key, ()):
+                if update_callback not in notified:
+                    notified.add(update_callback)
+                    update_callback()
 
     async def _async_update_data(self):
-        try:
-            await self.client.quota_all(None)
-            _LOGGER.debug("Successfully updated all quotas from /device/quota/all")
-        except Exception as e:
-            _LOGGER.warning(f"Failed to fetch device quotas: {e}")
-
+        # quotas are fetched by the account coordinator, this one only broadcasts the holder state
+        self.holder.expire_commands()
         received_time = self.holder.last_received_time()
         changed = self.__last_broadcast < received_time
         self.__last_broadcast = received_time
 
-        return EcoflowBroadcastDataHolder(self.holder, changed)
+        return EcoflowBroadcastDataHolder(self.holder, changed, self.holder.take_changed_keys())
+
+
+class EcoflowDeviceListeners:
+    """
+    Coordinator listeners that are no entities (battery pack discovery, ...), kept per device SN:
+    each one is bound to its own device's coordinator and removed with it.
+    """
+
+    def __init__(self):
+        self.__unsubscribers: dict[str, list[Callable[[], None]]] = {}
+
+    def add(self, device: "BaseDevice", listener: CALLBACK_TYPE):
+        unsubscribe = device.coordinator.async_add_listener(listener)
+        self.__unsubscribers.setdefault(device.device_info.sn, []).append(unsubscribe)
+
+    def count(self, sn: str) -> int:
+        return len(self.__unsubscribers.get(sn, []))
+
+    def remove(self, sn: str):
+        for unsubscribe in self.__unsubscribers.pop(sn, []):
+            unsubscribe()
+
+    def remove_all(self):
+        for sn in list(self.__unsubscribers):
+            self.remove(sn)
+
+
+class EcoflowAccountUpdateCoordinator(DataUpdateCoordinator[None]):
+    """
+    One quota sweep per tick for the whole account, fanned out to the device coordinators that are due.
+    The tick is the only timer of a config entry: neither this nor the device coordinators schedule
+    refreshes themselves, async_start_ticks() does and returns the callback that stops it on unload.
+    """
+
+    def __init__(self, hass, client: EcoflowApiClient) -> None:
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="Ecoflow account coordinator",
+            update_interval=None,
+        )
+        self.client = client
+        intervals = [d.coordinator.refresh_interval for d in client.devices.values() if d.coordinator]
+        self.tick = min(intervals, default=datetime.timedelta(seconds=30))
+        self.__last_sweep: dict[str, datetime.datetime] = {}
+        self.__ticking = False
+
+    @callback
+    def async_start_ticks(self) -> CALLBACK_TYPE:
+        async def tick(_now: datetime.datetime):
+            # a sweep slower than the tick must not overlap with the next one
+            if self.__ticking:
+                return
+            self.__ticking = True
+            try:
+                await self.async_refresh()
+            finally:
+                self.__ticking = False
+
+        return async_track_time_interval(self.hass, tick, self.tick, name=self.name, cancel_on_shutdown=True)
+
+    def due_devices(self, now: datetime.datetime) -> list[str]:
+        due = []
+        for sn, device in self.client.devices.items():
+            last = self.__last_sweep.get(sn)
+            interval = device.coordinator.refresh_interval if device.coordinator else self.tick
+            # half a tick of tolerance, so timer jitter does not push a device into the next interval
+            if last is None or now - last >= interval - self.tick / 2:
+                due.append(sn)
+        return due
+
+    async def _async_update_data(self):
+        now = dt.utcnow()
+        due = self.due_devices(now)
+        if not due:
+            return None
+
+        try:
+            await self.client.quota_sweep(due)
+            _LOGGER.debug("Successfully updated quotas of %s", due)
+        except Exception as e:
+            _LOGGER.warning(f"Failed to fetch device quotas: {e}")
+
+        for sn in due:
+            self.__last_sweep[sn] = now
+            device = self.client.devices.get(sn)
+            if device and device.coordinator:
+                await device.coordinator.async_refresh()
+        return None
 
 class BaseDevice(ABC):
 
@@ -97,15 +253,25 @@ class BaseDevice(ABC):
         self.data = DeviceData()
         self.device_info: EcoflowDeviceInfo = device_info
         self.power_step: int = -1
+        self.state_min_interval: float = 0.0
+        self.state_max_age: float = 0.0
+        self.sensor_filters: dict[str, dict[str, Any]] = {}
 
     def configure(
         self, 
         hass: HomeAssistant, 
         refresh_period: int, 
         diag: bool = False, 
-        client: EcoflowApiClient | None = None
+        client: EcoflowApiClient | None = None,
+        history_size: int = DEFAULT_HISTORY_SIZE,
+        state_min_interval: float = 0.0,
+        state_max_age: float = 0.0,
+        sensor_filters: dict[str, dict[str, Any]] | None = None
     ):
-        self.data = EcoflowDataHolder(diag)
+        self.data = EcoflowDataHolder(diag, history_size)
+        self.state_min_interval = state_min_interval
+        self.state_max_age = state_max_age
+        self.sensor_filters = sensor_filters or {}
         self.coordinator = EcoflowDeviceUpdateCoordinator(
             hass, 
             self.data, 
@@ -127,6 +293,16 @@ class BaseDevice(ABC):
     def flat_json(self) -> bool:
         return True
 
+    def battery_pack_prefix(self) -> str | None:
+        # params prefix of dynamically reported battery packs (bp_addr.<SN>), None if the device has none
+        return None
+
+    def payload_codec(self, kind: str) -> str:
+        # codec of the messages of a topic kind (MSG_KIND_*)
+        # json: payload is parsed before _prepare_data, protobuf: raw bytes are handed over as is,
+        # auto: JSON-looking payloads are parsed, everything else is handed over as raw bytes
+        return PAYLOAD_CODEC_JSON
+
     @abstractmethod
     def sensors(self, client: EcoflowApiClient) -> list[SensorEntity]:
         pass
@@ -147,19 +323,25 @@ class BaseDevice(ABC):
         return []
 
     def update_data(self, raw_data, data_type: str) -> bool:
-        if data_type == self.device_info.data_topic:
+        kind = self.device_info.topic_kinds().get(data_type)
+        if kind is None:
+            return False
+        return self.dispatch_data(raw_data, kind)
+
+    def dispatch_data(self, raw_data, kind: str) -> bool:
+        if kind == MSG_KIND_DATA:
             raw = self._prepare_data(raw_data)
             self.data.update_data(raw)
-        elif data_type == self.device_info.set_topic:
+        elif kind == MSG_KIND_SET:
             raw = self._prepare_data(raw_data)
             self.data.add_set_message(raw)
-        elif data_type == self.device_info.set_reply_topic:
+        elif kind == MSG_KIND_SET_REPLY:
             raw = self._prepare_data(raw_data)
             self.data.add_set_reply_message(raw)
-        elif data_type == self.device_info.get_topic:
+        elif kind == MSG_KIND_GET:
             raw = self._prepare_data(raw_data)
             self.data.add_get_message(raw)
-        elif data_type == self.device_info.get_reply_topic:
+        elif kind == MSG_KIND_GET_REPLY:
             raw = self._prepare_data(raw_data)
             self.data.add_get_reply_message(raw)
         else:
@@ -173,15 +355,10 @@ class BaseDevice(ABC):
             return raw_data
 
         try:
-            # Falls raw_data bytes oder String ist => dekodieren
-            if isinstance(raw_data, bytes):
-                payload = raw_data.decode("utf-8", errors='ignore')
-                return json.loads(payload)
-            else:
-                # Hier ist raw_data vermutlich ein String
-                return json.loads(raw_data)
-
-        except (UnicodeDecodeError, ValueError) as error1:
+            # bytes oder String, bytes werden direkt geparst
+            return codec.loads(raw_data)
+
+        except ValueError as error1:
             _LOGGER.error(f"Could not decode JSON payload: {error1}. Ignoring message.")
             return {}
 
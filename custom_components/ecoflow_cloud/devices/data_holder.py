@@ -1,35 +1,42 @@
 import logging
-from typing import Any, List, TypeVar
+import threading
+import time
+from collections import deque
+from typing import Any, TypeVar
 
-import jsonpath_ng.ext as jp
 from homeassistant.util import utcnow, dt
 
+from .key_accessor import compile_key
+from ..api.ingest_metrics import EcoflowIngestMetrics
+from ..api.pending_commands import EcoflowPendingCommand, EcoflowPendingCommands
+
 _LOGGER = logging.getLogger(__name__)
 
+DEFAULT_HISTORY_SIZE = 20
+
+_MISSING = object()
+
 _T = TypeVar("_T")
-class BoundFifoList(List):
+class BoundFifoList(deque):
+    """Bounded history, iterated newest first. O(1) append: the oldest entry falls off the end."""
 
-    def __init__(self, maxlen=20) -> None:
-        super().__init__()
-        self.maxlen = maxlen
+    def __init__(self, maxlen=DEFAULT_HISTORY_SIZE) -> None:
+        super().__init__(maxlen=maxlen)
 
     def append(self, __object: _T) -> None:
-        super().insert(0, __object)
-        while len(self) >= self.maxlen:
-            self.pop()
-
+        super().appendleft(__object)
 
 
 class EcoflowDataHolder:
 
-    def __init__(self, collect_raw: bool = False):
+    def __init__(self, collect_raw: bool = False, history_size: int = DEFAULT_HISTORY_SIZE):
         self.__collect_raw = collect_raw
-        self.set = BoundFifoList[dict[str, Any]]()
-        self.set_reply = BoundFifoList[dict[str, Any]]()
+        self.set = BoundFifoList[dict[str, Any]](history_size)
+        self.set_reply = BoundFifoList[dict[str, Any]](history_size)
         self.set_reply_time = dt.utcnow().replace(year=2000, month=1, day=1, hour=0, minute=0, second=0)
 
-        self.get = BoundFifoList[dict[str, Any]]()
-        self.get_reply = BoundFifoList[dict[str, Any]]()
+        self.get = BoundFifoList[dict[str, Any]](history_size)
+        self.get_reply = BoundFifoList[dict[str, Any]](history_size)
         self.get_reply_time = dt.utcnow().replace(year=2000, month=1, day=1, hour=0, minute=0, second=0)
 
         self.params = dict[str, Any]()
@@ -38,7 +45,19 @@ class EcoflowDataHolder:
         self.status = dict[str, Any]()
         self.status_time = dt.utcnow().replace(year=2000, month=1, day=1, hour=0, minute=0, second=0)
 
-        self.raw_data = BoundFifoList[dict[str, Any]]()
+        self.raw_data = BoundFifoList[dict[str, Any]](history_size)
+
+        # params keys whose values changed since the last take_changed_keys() (MQTT thread -> HA loop)
+        self.__changed_keys: set[str] = set()
+        self.__changed_lock = threading.Lock()
+
+        # prefix -> params keys first seen since the last take_new_keys(prefix), only for indexed prefixes
+        self.__new_keys_by_prefix: dict[str, set[str]] = {}
+
+        # ingest counters of this device, fed by the MQTT client
+        self.metrics = EcoflowIngestMetrics()
+        # set commands waiting for their set_reply, by message id
+        self.commands = EcoflowPendingCommands()
 
     def last_received_time(self):
         return max(self.status_time, self.params_time, self.get_reply_time, self.set_reply_time)
@@ -50,6 +69,13 @@ class EcoflowDataHolder:
         self.set_reply.append(msg)
         self.set_reply_time = dt.utcnow()
 
+        if "id" in msg:
+            # "code" is "0" on success, data.ack differs between devices and is not checked
+            success = str(msg.get("code", "0")) == "0"
+            command = self.commands.reply(msg["id"], success, time.monotonic())
+            if command is not None and not success:
+                self.__roll_back(command, "failed")
+
     def add_get_message(self, msg: dict[str, Any]):
         self.get.append(msg)
 
@@ -64,13 +90,70 @@ class EcoflowDataHolder:
         self.get_reply_time = dt.utcnow()
 
 
-    def update_to_target_state(self, target_state: dict[str, Any]):
+    def update_to_target_state(self, target_state: dict[str, Any], command_id: str | None = None):
+        """
+        Optimistic update for a set command. With a command_id the overwritten values are kept until the
+        set_reply, they are restored if the command fails or times out.
+        """
+        previous = {}
         # key can be xpath!
         for key, value in target_state.items():
-            jp.parse(key).update(self.params, value)
-
+            accessor = compile_key(key)
+            if command_id is not None:
+                values = accessor.values(self.params)
+                if len(values) == 1:
+                    previous[key] = values[0]
+            accessor.update(self.params, value)
+        if command_id is not None:
+            self.commands.add(EcoflowPendingCommand(command_id, time.monotonic(), previous, dict(target_state)))
+
+        with self.__changed_lock:
+            # flat json keys are quoted for jsonpath
+            self.__changed_keys.update(k.strip("'") for k in target_state.keys())
         self.params_time = dt.utcnow()
 
+    def expire_commands(self):
+        for command in self.commands.expire(time.monotonic()):
+            self.__roll_back(command, "timed out")
+
+    def __roll_back(self, command: EcoflowPendingCommand, reason: str):
+        restored = []
+        params = self.params
+        with self.__changed_lock:
+            for key, value in command.previous.items():
+                accessor = compile_key(key)
+                # keys reported by the device since the command are dropped from previous,
+                # a later command for the same key is newer than both values
+                if accessor.values(params) != [command.target[key]]:
+                    continue
+                accessor.update(params, value)
+                restored.append(key.strip("'"))
+            self.__changed_keys.update(restored)
+        if restored:
+            self.params_time = dt.utcnow()
+        _LOGGER.info("Set command %s %s, restored %s", command.command_id, reason, restored or "nothing")
+
+    def take_changed_keys(self) -> set[str]:
+        with self.__changed_lock:
+            changed = self.__changed_keys
+            self.__changed_keys = set()
+        self.metrics.broadcast(time.monotonic(), bool(changed))
+        return changed
+
+    def index_prefix(self, prefix: str):
+        """Track keys starting with prefix as they show up, existing ones are reported by the next take_new_keys."""
+        with self.__changed_lock:
+            if prefix not in self.__new_keys_by_prefix:
+                self.__new_keys_by_prefix[prefix] = {k for k in self.params if k.startswith(prefix)}
+
+    def take_new_keys(self, prefix: str) -> set[str]:
+        with self.__changed_lock:
+            new_keys = self.__new_keys_by_prefix.get(prefix)
+            if not new_keys:
+                return set()
+            self.__new_keys_by_prefix[prefix] = set()
+        return new_keys
+
     def update_status(self, raw: dict[str, Any]):
         self.status.update({"status" : int(raw['params']['status'])})
         self.status_time = dt.utcnow()
@@ -78,12 +161,29 @@ class EcoflowDataHolder:
     def update_data(self, raw: dict[str, Any]):
         self.__add_raw_data(raw)
         try:
-            self.params.update(raw['params'])
+            new_params = raw['params']
+            params = self.params
+            with self.__changed_lock:
+                changed = self.__changed_keys
+                for key, value in new_params.items():
+                    old_value = params.get(key, _MISSING)
+                    if old_value != value:
+                        changed.add(key)
+                        if old_value is _MISSING and self.__new_keys_by_prefix:
+                            self.__index_new_key(key)
+                params.update(new_params)
+            if self.commands.pending:
+                self.commands.reported(new_params)
             self.params_time = dt.utcnow()
 
         except Exception as error:
             _LOGGER.error("Error updating data: %s", error)
 
+    def __index_new_key(self, key: str):
+        for prefix, new_keys in self.__new_keys_by_prefix.items():
+            if key.startswith(prefix):
+                new_keys.add(key)
+
     def __add_raw_data(self, raw: dict[str, Any]):
         if self.__collect_raw:
             self.raw_data.append(raw)
@@ -2,7 +2,8 @@ import logging
 
 from homeassistant.util import utcnow
 
-from custom_components.ecoflow_cloud.devices import BaseDevice
+from custom_components.ecoflow_cloud.devices import BaseDevice, PAYLOAD_CODEC_PROTOBUF, PAYLOAD_CODEC_AUTO, \
+    MSG_KIND_DATA, EcoflowDeviceInfo
 from custom_components.ecoflow_cloud.entities import (
     BaseSensorEntity, BaseNumberEntity, BaseSelectEntity, BaseSwitchEntity
 )
@@ -12,6 +13,7 @@ from custom_components.ecoflow_cloud.sensor import (
     DecivoltSensorEntity, InWattsSolarSensorEntity, LevelSensorEntity,
     MiscSensorEntity, RemainSensorEntity, StatusSensorEntity, ReconnectStatusSensorEntity,
 )
+from .proto.decoder import EcoPacketDecoder, inverter_heartbeat_decoder
 from ...api import EcoflowApiClient
 
 # from ..number import MinBatteryLevelEntity, MaxBatteryLevelEntity
@@ -19,6 +21,12 @@ from ...api import EcoflowApiClient
 _LOGGER = logging.getLogger(__name__)
 
 class PowerStream(BaseDevice):
+    def __init__(self, device_info: EcoflowDeviceInfo):
+        super().__init__(device_info)
+        # the decoders reuse their message instances: one set per device, only used by its ingest worker
+        self.__packet_decoder = EcoPacketDecoder()
+        self.__heartbeat_decoder = inverter_heartbeat_decoder()
+
     def sensors(self, client: EcoflowApiClient) -> list[BaseSensorEntity]:
         return [
             InWattsSolarSensorEntity(client, self,  "pv1_input_watts", "Solar 1 Watts"),
@@ -109,46 +117,29 @@ class PowerStream(BaseDevice):
             #                     "params": {"supplyPriority": value}}),
         ]
 
+    def payload_codec(self, kind: str) -> str:
+        if kind == MSG_KIND_DATA:
+            return PAYLOAD_CODEC_PROTOBUF
+        # the JSON get/set messages of the app and of quota_all come back on the other topics
+        return PAYLOAD_CODEC_AUTO
+
     def _prepare_data(self, raw_data) -> dict[str, any]:
+        if isinstance(raw_data, dict):
+            return raw_data
         raw = {"params": {}}
-        from .proto import ecopacket_pb2 as ecopacket, powerstream_pb2 as powerstream
         try:
-            payload =raw_data
-
-            while True:
-                packet = ecopacket.SendHeaderMsg()
-                packet.ParseFromString(payload)
-
-                _LOGGER.debug("cmd id %u payload \"%s\"", packet.msg.cmd_id, payload.hex())
-
-                if packet.msg.cmd_id != 1:
-                    _LOGGER.info("Unsupported EcoPacket cmd id %u", packet.msg.cmd_id)
-
-                else:
-                    heartbeat = powerstream.InverterHeartbeat()
-                    heartbeat.ParseFromString(packet.msg.pdata)
-
-                    for descriptor in heartbeat.DESCRIPTOR.fields:
-                        if not heartbeat.HasField(descriptor.name):
-                            continue
+            for header in self.__packet_decoder.headers(raw_data):
+                if header.cmd_id != 1:
+                    _LOGGER.debug("Unsupported EcoPacket cmd id %u", header.cmd_id)
+                    continue
 
-                        raw["params"][descriptor.name] = getattr(heartbeat, descriptor.name)
-
-                    _LOGGER.info("Found %u fields", len(raw["params"]))
-
-                    raw["timestamp"] = utcnow()
-
-                if packet.ByteSize() >= len(payload):
-                    break
-
-                _LOGGER.info("Found another frame in payload")
-
-                packet_length = len(payload) - packet.ByteSize()
-                payload = payload[:packet_length]
+                count = self.__heartbeat_decoder.decode_into(header.pdata, raw["params"])
+                _LOGGER.debug("Found %u fields", count)
+                raw["timestamp"] = utcnow()
 
         except Exception as error:
             _LOGGER.error(error)
-            _LOGGER.info(raw_data.hex())
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug(raw_data.hex())
 
         return raw
-
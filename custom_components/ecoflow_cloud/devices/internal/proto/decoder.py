@@ -0,0 +1,70 @@
+from typing import Any, Iterator
+
+from google.protobuf.message import DecodeError, Message
+
+from . import ecopacket_pb2 as ecopacket, powerstream_pb2 as powerstream
+
+# SendHeaderMsg only has "optional Header msg = 1": every frame is tag 0x0A, varint length, Header bytes
+_SEND_HEADER_MSG_TAG = 0x0A
+
+
+class ProtobufParamsDecoder:
+    """
+    Decodes one protobuf message type straight into a flat params dict.
+    The message instance is reused between calls, so a decoder must only be used from one thread
+    (the MQTT ingest worker of the device that owns it) and never shared between devices.
+    """
+
+    def __init__(self, message_type: type[Message]):
+        self.__message = message_type()
+
+    def decode_into(self, data: bytes | memoryview, params: dict[str, Any]) -> int:
+        message = self.__message
+        message.ParseFromString(data)
+        fields = message.ListFields()
+        for descriptor, value in fields:
+            params[descriptor.name] = value
+        return len(fields)
+
+
+class EcoPacketDecoder:
+    """Walks concatenated SendHeaderMsg frames by offset and parses each inner Header in place."""
+
+    def __init__(self):
+        self.__header = ecopacket.Header()
+
+    def headers(self, payload: bytes) -> Iterator[ecopacket.Header]:
+        """Yields the same (reused) Header instance for every frame - consume it before advancing."""
+        view = memoryview(payload)
+        offset = 0
+        size = len(payload)
+        while offset < size:
+            if payload[offset] != _SEND_HEADER_MSG_TAG:
+                raise DecodeError(f"Unexpected tag 0x{payload[offset]:02x} at offset {offset}")
+            length, offset = _read_varint(payload, offset + 1)
+            end = offset + length
+            if end > size:
+                raise DecodeError(f"Truncated frame: {length} bytes announced at offset {offset}, {size - offset} left")
+
+            self.__header.ParseFromString(view[offset:end])
+            yield self.__header
+            offset = end
+
+
+def _read_varint(data: bytes, offset: int) -> tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise DecodeError("Truncated varint")
+        b = data[offset]
+        offset += 1
+        result |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return result, offset
+        shift += 7
+
+
+def inverter_heartbeat_decoder() -> ProtobufParamsDecoder:
+    """A new decoder on every call: the decoders are stateful and must not be shared."""
+    return ProtobufParamsDecoder(powerstream.InverterHeartbeat)
@@ -0,0 +1,57 @@
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any
+
+import jsonpath_ng.ext as jp
+
+ACCESSOR_CACHE_SIZE = 2048
+
+
+class KeyAccessor(ABC):
+    @abstractmethod
+    def values(self, data: dict[str, Any]) -> list[Any]:
+        pass
+
+    @abstractmethod
+    def update(self, data: dict[str, Any], value: Any):
+        pass
+
+
+class FlatKeyAccessor(KeyAccessor):
+    """A quoted single key ('bmsMaster.soc') is a plain dict lookup - no jsonpath needed."""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key: str):
+        self.key = key
+
+    def values(self, data: dict[str, Any]) -> list[Any]:
+        if self.key in data:
+            return [data[self.key]]
+        return []
+
+    def update(self, data: dict[str, Any], value: Any):
+        # same as jsonpath: only existing keys are updated
+        if self.key in data:
+            data[self.key] = value
+
+
+class JsonPathAccessor(KeyAccessor):
+    __slots__ = ("expr",)
+
+    def __init__(self, expr):
+        self.expr = expr
+
+    def values(self, data: dict[str, Any]) -> list[Any]:
+        return [match.value for match in self.expr.find(data)]
+
+    def update(self, data: dict[str, Any], value: Any):
+        self.expr.update(data, value)
+
+
+@lru_cache(maxsize=ACCESSOR_CACHE_SIZE)
+def compile_key(key: str) -> KeyAccessor:
+    """Process-wide cache of compiled accessors: jsonpath_ng parsing runs a full PLY parser."""
+    if len(key) >= 2 and key[0] == "'" and key[-1] == "'" and "'" not in key[1:-1]:
+        return FlatKeyAccessor(key[1:-1])
+    return JsonPathAccessor(jp.parse(key))
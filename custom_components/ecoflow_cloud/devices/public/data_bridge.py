@@ -1,3 +1,10 @@
+import logging
+import sys
+from typing import Any
+
+from custom_components.ecoflow_cloud.api import codec
+
+_LOGGER = logging.getLogger(__name__)
 
 plain_to_status: dict[str, str] = {
         "pd": "pdStatus",
@@ -12,67 +19,120 @@ plain_to_status: dict[str, str] = {
 
 status_to_plain = dict((v, k) for (k, v) in plain_to_status.items())
 
+# prefix -> key -> interned "prefix.key": the same few hundred key strings are reused for every message
+_PREFIXED_KEYS: dict[str, dict[str, str]] = {}
+_CMD_PREFIXES: dict[Any, dict[Any, str]] = {}
+MAX_CACHED_PREFIXES = 256
+
+
+def _prefixed_keys(prefix: str) -> dict[str, str]:
+    keys = _PREFIXED_KEYS.get(prefix)
+    if keys is None:
+        if len(_PREFIXED_KEYS) >= MAX_CACHED_PREFIXES:
+            # unknown typeCodes must not grow the cache forever
+            _PREFIXED_KEYS.clear()
+        keys = _PREFIXED_KEYS[prefix] = {}
+    return keys
+
+
+def _cmd_prefix(cmd_func: Any, cmd_id: Any) -> str:
+    by_id = _CMD_PREFIXES.get(cmd_func)
+    if by_id is None:
+        by_id = _CMD_PREFIXES[cmd_func] = {}
+    prefix = by_id.get(cmd_id)
+    if prefix is None:
+        if len(by_id) >= MAX_CACHED_PREFIXES:
+            by_id.clear()
+        prefix = by_id[cmd_id] = sys.intern(f"{cmd_func}_{cmd_id}")
+    return prefix
+
+
+def _flatten(raw_data: dict[str, Any], prefix: str) -> dict[str, Any]:
+    """One pass over the envelope: "param"/"params" are prefixed into result["params"], the rest is copied."""
+    keys = _prefixed_keys(prefix)
+    new_params: dict[str, Any] = {}
+    result = {"params": new_params}
+    for (k, v) in raw_data.items():
+        if k == "param" or k == "params":
+            for (pk, pv) in v.items():
+                full_key = keys.get(pk)
+                if full_key is None:
+                    full_key = keys[pk] = sys.intern(f"{prefix}.{pk}")
+                new_params[full_key] = pv
+        else:
+            result[k] = v
+    return result
+
+
 def to_plain(raw_data: dict[str, any]) -> dict[str, any]:
     if "typeCode" in raw_data:
-        prefix = status_to_plain.get(raw_data["typeCode"], "unknown_"+raw_data["typeCode"])
-        new_params = {}
-        if "params" in raw_data:
-            for (k, v) in raw_data["params"].items():
-                new_params[f"{prefix}.{k}"] = v
-        if "param" in raw_data:
-            for (k, v) in raw_data["param"].items():
-                new_params[f"{prefix}.{k}"] = v
+        prefix = status_to_plain.get(raw_data["typeCode"])
+        if prefix is None:
+            prefix = "unknown_" + raw_data["typeCode"]
+        return _flatten(raw_data, prefix)
+    elif "cmdFunc" in raw_data and "cmdId" in raw_data:
+        return _flatten(raw_data, _cmd_prefix(raw_data["cmdFunc"], raw_data["cmdId"]))
+    else:
+        return raw_data
 
-        result = {"params": new_params}
-        for (k, v) in raw_data.items():
-            if k != "param" and k != "params":
-                result[k] = v
 
-        return result
-    else:
-        if "cmdFunc" in raw_data and "cmdId" in raw_data:
-            new_params = {}
-            prefix = f"{raw_data['cmdFunc']}_{raw_data['cmdId']}"
+BP_ADDR_PREFIX = "bp_addr."
 
-            if "param" in raw_data:
-                for (k, v) in raw_data["param"].items():
-                    new_params[f"{prefix}.{k}"] = v
 
-            if "params" in raw_data:
-                for (k, v) in raw_data["params"].items():
-                    new_params[f"{prefix}.{k}"] = v
+class BpAddrCache:
+    """
+    Per device memo of the bp_addr.<SN> JSON blobs of the battery packs: an unchanged blob is neither
+    parsed nor expanded again, a changed one only emits the sub-keys whose values differ.
+    Must live as long as the data holder it feeds - sub-keys skipped here are expected to be in its params.
+    """
 
-            result = {"params": new_params}
-            for (k, v) in raw_data.items():
-                if k != "param" and k != "params":
-                    result[k] = v
+    def __init__(self):
+        self.__entries: dict[str, tuple[int, str, dict[str, Any]]] = {}
+        self.hits = 0
+        self.misses = 0
 
-            return result
+    def expand_into(self, key: str, raw: str, new_params: dict[str, Any]):
+        raw_hash = hash(raw)
+        entry = self.__entries.get(key)
+        if entry is not None and entry[0] == raw_hash and entry[1] == raw:
+            self.hits += 1
+            return
 
-        return raw_data
-    
-def to_plain_other(raw_data: dict[str, any]) -> dict[str, any]:
+        self.misses += 1
+        sub_json = codec.loads(raw)
+        previous = entry[2] if entry is not None else {}
+        keys = _prefixed_keys(key)
+        for sub_k, sub_val in sub_json.items():
+            if sub_k in previous and previous[sub_k] == sub_val:
+                continue
+            full_key = keys.get(sub_k)
+            if full_key is None:
+                full_key = keys[sub_k] = sys.intern(f"{key}.{sub_k}")
+            new_params[full_key] = sub_val
+        self.__entries[key] = (raw_hash, raw, sub_json)
+
+
+def _expand_bp_addr(key: str, raw: str, new_params: dict[str, Any]):
+    sub_json = codec.loads(raw)
+    for sub_k, sub_val in sub_json.items():
+        new_params[f"{key}.{sub_k}"] = sub_val
+
+
+def to_plain_other(raw_data: dict[str, any], bp_cache: BpAddrCache | None = None) -> dict[str, any]:
     
     # 1) Prüfen, ob "code","message","data" => Quota-All JSON
     if "code" in raw_data and "message" in raw_data and "data" in raw_data:
         new_params = {}
+        expand = bp_cache.expand_into if bp_cache is not None else _expand_bp_addr
 
-        # Kopiere alles aus raw_data["data"] nach new_params
-        data_dict = raw_data["data"]
-        for k, v in data_dict.items():
-            new_params[k] = v
-
-        # Optional: bp_addr.* Einträge entpacken
-        for key in list(new_params.keys()):
-            if key.startswith("bp_addr.") and isinstance(new_params[key], str):
+        # Kopiere alles aus raw_data["data"] nach new_params, bp_addr.* Einträge werden entpackt
+        for key, value in raw_data["data"].items():
+            new_params[key] = value
+            if isinstance(value, str) and key.startswith(BP_ADDR_PREFIX):
                 try:
-                    sub_json = json.loads(new_params[key])
-                    for sub_k, sub_val in sub_json.items():
-                        new_params[f"{key}.{sub_k}"] = sub_val
+                    expand(key, value, new_params)
                 except Exception as exc:
-                    _LOGGER.debug(
-                        f"Unable to parse JSON in {key}: {new_params[key]} => {exc}"
-                    )
+                    _LOGGER.debug("Unable to parse JSON in %s: %s => %s", key, value, exc)
 
         # Baue ein "params"-Dict
         result = {"params": new_params}
@@ -1,4 +1,4 @@
-from .data_bridge import to_plain_other
+from .data_bridge import to_plain_other, BpAddrCache, BP_ADDR_PREFIX
 
 from homeassistant.components.number import NumberEntity
 from homeassistant.components.select import SelectEntity
@@ -6,7 +6,7 @@ from homeassistant.components.sensor import SensorEntity
 from homeassistant.components.switch import SwitchEntity
 
 from custom_components.ecoflow_cloud import EcoflowApiClient
-from custom_components.ecoflow_cloud.devices import BaseDevice, const
+from custom_components.ecoflow_cloud.devices import BaseDevice, EcoflowDeviceInfo, const
 from custom_components.ecoflow_cloud.number import BrightnessLevelEntity
 from custom_components.ecoflow_cloud.sensor import (
     LevelSensorEntity,
@@ -28,6 +28,15 @@ _LOGGER = logging.getLogger(__name__)
 
 
 class PowerOcean(BaseDevice):
+    def __init__(self, device_info: EcoflowDeviceInfo):
+        super().__init__(device_info)
+        self.bp_cache = BpAddrCache()
+
+    def configure(self, *args, **kwargs):
+        # a new data holder doesn't have the expanded battery pack keys yet
+        self.bp_cache = BpAddrCache()
+        super().configure(*args, **kwargs)
+
     def sensors(self, client: EcoflowApiClient) -> list[SensorEntity]:
         return [
             SolarPowerSensorEntity(client, self, "mpptPwr", "mpptPwr"),
@@ -76,10 +85,14 @@ class PowerOcean(BaseDevice):
     def selects(self, client: EcoflowApiClient) -> list[SelectEntity]:
         return []
 
+    def battery_pack_prefix(self) -> str | None:
+        return BP_ADDR_PREFIX
+
     def _prepare_data(self, raw_data) -> dict[str, any]:
         res = super()._prepare_data(raw_data)
-        _LOGGER.info(f"_prepare_data {raw_data}")
-        res = to_plain_other(res)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("_prepare_data %s", raw_data)
+        res = to_plain_other(res, self.bp_cache)
         return res
     
     def _status_sensor(self, client: EcoflowApiClient) -> StatusSensorEntity:
@@ -5,6 +5,7 @@ from homeassistant.core import HomeAssistant
 
 from . import ECOFLOW_DOMAIN
 from .api import EcoflowApiClient
+from .profiler import last_profile
 
 
 def _to_serializable(x):
@@ -19,6 +20,15 @@ def _to_serializable(x):
 async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry):
     client: EcoflowApiClient = hass.data[ECOFLOW_DOMAIN][entry.entry_id]
     values = {"EcoFlow":[]}
+    if client.mqtt_client:
+        values["ingest"] = client.mqtt_client.ingest_stats()
+        values["recent_frames"] = client.mqtt_client.recent_frames()
+        values["ingest_metrics"] = client.mqtt_client.ingest_metrics().stats()
+    values["quota_sweep"] = client.sweep_stats()
+    if last_profile() is not None:
+        values["profile"] = last_profile()
+    if client.rate_limiter:
+        values["rate_limit"] = client.rate_limiter.stats()
     for (sn, device) in client.devices.items():
         value = {
             'device':    device.device_info.device_type,
@@ -29,7 +39,9 @@ async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigE
             'set_reply': [dict(sorted(k.items())) for k in device.data.set_reply],
             'get':       [dict(sorted(k.items())) for k in device.data.get],
             'get_reply': [dict(sorted(k.items())) for k in device.data.get_reply],
-            'raw_data': device.data.raw_data,
+            'raw_data': list(device.data.raw_data),
+            'ingest_metrics': device.data.metrics.stats(),
+            'commands': device.data.commands.stats(),
         }
         values["EcoFlow"].append(value)
     return values
@@ -2,22 +2,26 @@
 
 from __future__ import annotations
 
-import inspect
 import logging
+import time
 from typing import Any, Callable, OrderedDict, Mapping
 
-import jsonpath_ng.ext as jp
 from homeassistant.components.button import ButtonEntity
 from homeassistant.components.number import NumberEntity
 from homeassistant.components.select import SelectEntity
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.components.switch import SwitchEntity
+from homeassistant.core import callback
 from homeassistant.helpers.entity import EntityCategory, DeviceInfo
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from custom_components.ecoflow_cloud import ECOFLOW_DOMAIN
 from custom_components.ecoflow_cloud.api import EcoflowApiClient
-from custom_components.ecoflow_cloud.devices import BaseDevice, EcoflowDeviceUpdateCoordinator
+from custom_components.ecoflow_cloud.devices import BaseDevice, EcoflowDeviceUpdateCoordinator, EcoflowDataKeys
+from custom_components.ecoflow_cloud.devices.key_accessor import compile_key, KeyAccessor
+from custom_components.ecoflow_cloud.entities.coalescer import SensorFilter, StateWriteCoalescer, StateWritePolicy
+from custom_components.ecoflow_cloud.entities.command import CommandFunc, EcoflowCommandBuilder
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -62,17 +66,19 @@ class EcoFlowDictEntity(EcoFlowAbstractEntity):
 
         self.__mqtt_key = mqtt_key
         self._mqtt_key_adopted = self._adopt_json_key(mqtt_key)
-        self._mqtt_key_expr = jp.parse(self._mqtt_key_adopted)
+        self._mqtt_key_expr = compile_key(self._mqtt_key_adopted)
 
         self._auto_enable = auto_enable
         self._attr_entity_registry_enabled_default = enabled
         self._attr_entity_registry_visible_default = enabled
         self._attr_available  = enabled
         self.__attributes_mapping: dict[str, str] = {}
+        self.__attributes_accessors: dict[str, KeyAccessor] = {}
         self.__attrs = OrderedDict[str, Any]()
 
     def attr(self, mqtt_key: str, title: str, default: Any) -> EcoFlowDictEntity:
         self.__attributes_mapping[mqtt_key] = title
+        self.__attributes_accessors[title] = compile_key(self._adopt_json_key(mqtt_key))
         self.__attrs[title] = default
         return self
 
@@ -94,32 +100,44 @@ class EcoFlowDictEntity(EcoFlowAbstractEntity):
     def enabled_default(self):
         return self._attr_entity_registry_enabled_default
 
+    def data_keys(self) -> set[str] | None:
+        """params keys this entity reads, None if they can't be named (non-flat json paths)."""
+        if not self._device.flat_json():
+            return None
+        return {self.__mqtt_key, *self.__attributes_mapping.keys()}
+
     async def async_added_to_hass(self):
+        # only get notified when one of our keys changed
+        keys = self.data_keys()
+        if keys is not None:
+            self.coordinator_context = EcoflowDataKeys(keys)
         await super().async_added_to_hass()
-        # d = self._device.data.params_observable().subscribe(self._updated)
-        # self.async_on_remove(d.dispose)
+        if self.coordinator.data is not None:
+            self.update_from_coordinator()
 
     def _handle_coordinator_update(self) -> None:
         """Verarbeitet Updates vom Coordinator."""
         self.update_from_coordinator()
 
+    def update_from_coordinator(self):
+        self._updated(self._device.data.params)
+
     def _updated(self, data: dict[str, Any]):
         # Update attributes
-        for key, title in self.__attributes_mapping.items():
-            key_expr = jp.parse(self._adopt_json_key(key))
-            attr_values = key_expr.find(data)
+        for title, accessor in self.__attributes_accessors.items():
+            attr_values = accessor.values(data)
             if len(attr_values) == 1:
-                self.__attrs[title] = attr_values[0].value
+                self.__attrs[title] = attr_values[0]
 
         # Update value
-        values = self._mqtt_key_expr.find(data)
+        values = self._mqtt_key_expr.values(data)
         if len(values) == 1:
             self._attr_available = True
             if self._auto_enable:
                 self._attr_entity_registry_enabled_default = True
                 self._attr_entity_registry_visible_default = True
 
-            if self._update_value(values[0].value):
+            if self._update_value(values[0]):
                 self.schedule_update_ha_state()
 
     @property
@@ -131,18 +149,14 @@ class EcoFlowDictEntity(EcoFlowAbstractEntity):
 
 class EcoFlowBaseCommandEntity(EcoFlowDictEntity):
     def __init__(self, client: EcoflowApiClient, device: BaseDevice, mqtt_key: str, title: str,
-                 command: Callable[[Any], dict[str, Any]] | Callable[[Any, dict[str, Any]], dict[str, Any]] | None,
+                 command: CommandFunc | None,
                  enabled: bool = True, auto_enable: bool = False):
         super().__init__(client, device, mqtt_key, title, enabled, auto_enable)
-        self._command = command
+        self._command = EcoflowCommandBuilder(command) if command else None
 
     def command_dict(self, value: Any) -> dict[str, Any] | None:
         if self._command:
-            p_count = len(inspect.signature(self._command).parameters)
-            if p_count == 1:
-                return self._command(value)
-            elif p_count == 2:
-                return self._command(value, self._device.data.params)
+            return self._command.build(value, self._device.data.params)
         else:
             return None
 
@@ -170,6 +184,24 @@ class BaseNumberEntity(NumberEntity, EcoFlowBaseCommandEntity):
 class BaseSensorEntity(SensorEntity, EcoFlowDictEntity):
     """Basisklasse für alle EcoFlow Sensor-Entities."""
 
+    # group of the per-device filters in the options (FILTER_GROUPS), values only reach HA when they pass them
+    _filter_group: str | None = None
+
+    def __init__(self, client: EcoflowApiClient, device: BaseDevice, mqtt_key: str, title: str, enabled: bool = True,
+                 auto_enable: bool = False):
+        super().__init__(client, device, mqtt_key, title, enabled, auto_enable)
+        self._coalescer = StateWriteCoalescer(self._state_write_policy())
+        self.__invalid = False
+        self.__cancel_flush: Callable[[], None] | None = None
+
+    def _state_write_policy(self) -> StateWritePolicy:
+        flt = SensorFilter.of_group(self._filter_group, self._device.sensor_filters)
+        return StateWritePolicy(min_interval=max(self._device.state_min_interval, flt.min_interval),
+                                deadband_abs=flt.deadband_abs,
+                                deadband_rel=flt.deadband_pct / 100,
+                                max_age=self._device.state_max_age,
+                                ema_window=int(flt.ema_window))
+
     def _update_value(self, val: Any) -> bool:
         """Aktualisiert den nativen Wert des Sensors, falls er sich geändert hat."""
         if self._attr_native_value != val:
@@ -183,13 +215,47 @@ class BaseSensorEntity(SensorEntity, EcoFlowDictEntity):
         params = self._device.data.params
         value = params.get(self.mqtt_key, "unknown")
         if isinstance(value, (int, float, list)):
-            _LOGGER.debug(f"{self.name} ({self.mqtt_key}) updated with value: {value}")
-            if self._update_value(value):
-                self.schedule_update_ha_state()
-        else:
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug(f"{self.name} ({self.mqtt_key}) updated with value: {value}")
+            self._update_value(value)
+            self._attr_native_value = self._coalescer.smooth(self._attr_native_value)
+            if self.__invalid:
+                self.__invalid = False
+                self.__write_now(time.monotonic())
+            else:
+                self._write_state(time.monotonic())
+        elif not self.__invalid:
+            # written once on the transition, not again for every update without the key
             _LOGGER.warning(f"Invalid value for {self.name} ({self.mqtt_key}): {value}")
+            self.__invalid = True
             self._update_value("unknown")
-            self.schedule_update_ha_state()
+            self.__write_now(time.monotonic())
+
+    def _write_state(self, now: float):
+        value = self._attr_native_value
+        if self._coalescer.should_write(value, now):
+            self.__write_now(now)
+        elif self.__cancel_flush is None and self._coalescer.significant(value):
+            self.__cancel_flush = async_call_later(self.hass, self._coalescer.delay(now), self.__flush)
+
+    def __write_now(self, now: float):
+        if self.__cancel_flush is not None:
+            self.__cancel_flush()
+            self.__cancel_flush = None
+        self._coalescer.written(self._attr_native_value, now)
+        self.schedule_update_ha_state()
+
+    @callback
+    def __flush(self, _now: Any):
+        self.__cancel_flush = None
+        if self._coalescer.significant(self._attr_native_value):
+            self.__write_now(time.monotonic())
+
+    async def async_will_remove_from_hass(self) -> None:
+        if self.__cancel_flush is not None:
+            self.__cancel_flush()
+            self.__cancel_flush = None
+        await super().async_will_remove_from_hass()
 
 class BaseSwitchEntity(SwitchEntity, EcoFlowBaseCommandEntity):
     pass
@@ -0,0 +1,107 @@
+import dataclasses
+from typing import Any
+
+FILTER_GROUP_POWER = "power"  # W
+FILTER_GROUP_MILLIVOLT = "millivolt"  # mV
+FILTER_GROUP_TEMPERATURE = "temperature"  # °C
+FILTER_GROUPS = [FILTER_GROUP_POWER, FILTER_GROUP_MILLIVOLT, FILTER_GROUP_TEMPERATURE]
+
+SENSOR_FILTER_FIELDS = ("deadband_abs", "deadband_pct", "min_interval", "ema_window")
+
+
+@dataclasses.dataclass(frozen=True)
+class SensorFilter:
+    """
+    Filter of one sensor group, values in the native unit of the group's sensor classes. Nothing is filtered
+    unless a device sets fields in its options: {"power": {"deadband_abs": 5}}.
+    """
+
+    deadband_abs: float = 0.0
+    deadband_pct: float = 0.0
+    min_interval: float = 0.0
+    ema_window: int = 0  # number of samples, 0/1 = no smoothing
+
+    @staticmethod
+    def of_group(group: str | None, sensor_filters: dict[str, dict[str, Any]]) -> "SensorFilter":
+        fields = sensor_filters.get(group) if group else None
+        if not fields:
+            return NO_FILTER
+        return SensorFilter(**{k: v for k, v in fields.items() if k in SENSOR_FILTER_FIELDS})
+
+
+NO_FILTER = SensorFilter()
+
+
+@dataclasses.dataclass(frozen=True)
+class StateWritePolicy:
+    min_interval: float = 0.0  # sec between two writes, changes in between are coalesced
+    deadband_abs: float = 0.0  # numeric changes up to this absolute step are not written
+    deadband_rel: float = 0.0  # ... or up to this fraction of the last written value
+    max_age: float = 0.0  # sec after which an update is written even inside the deadband, 0 = never
+    ema_window: int = 0  # exponential moving average over about this many samples before the deadband
+
+
+class StateWriteCoalescer:
+    """
+    Decides per entity whether a new value is worth a state write.
+    Only the last written value is remembered; the caller keeps the current value and flushes it
+    after `delay()` when a significant change arrived too early.
+    """
+
+    __slots__ = ("policy", "__alpha", "__ema", "__written", "__written_at", "writes", "suppressed")
+
+    def __init__(self, policy: StateWritePolicy):
+        self.policy = policy
+        self.__alpha = 2 / (policy.ema_window + 1) if policy.ema_window > 1 else 0.0
+        self.__ema: float | None = None
+        self.__written: Any = None
+        self.__written_at: float | None = None
+        self.writes = 0
+        self.suppressed = 0
+
+    def smooth(self, value: Any) -> Any:
+        if not self.__alpha or not _is_number(value):
+            return value
+        if self.__ema is None:
+            self.__ema = value
+        else:
+            self.__ema += self.__alpha * (value - self.__ema)
+        return round(self.__ema, 2)
+
+    def significant(self, value: Any) -> bool:
+        if self.__written_at is None:
+            return True
+        last = self.__written
+        if _is_number(value) and _is_number(last):
+            band = max(self.policy.deadband_abs, self.policy.deadband_rel * abs(last))
+            if band > 0:
+                return abs(value - last) > band
+        return value != last
+
+    def should_write(self, value: Any, now: float) -> bool:
+        if self.__written_at is None:
+            return True
+        age = now - self.__written_at
+        if 0 < self.policy.max_age <= age:
+            return True
+        if not self.significant(value):
+            self.suppressed += 1
+            return False
+        if age < self.policy.min_interval:
+            self.suppressed += 1
+            return False
+        return True
+
+    def delay(self, now: float) -> float:
+        if self.__written_at is None:
+            return 0.0
+        return max(self.policy.min_interval - (now - self.__written_at), 0.0)
+
+    def written(self, value: Any, now: float):
+        self.__written = value
+        self.__written_at = now
+        self.writes += 1
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
@@ -0,0 +1,114 @@
+import inspect
+from typing import Any, Callable
+
+CommandFunc = Callable[[Any], dict[str, Any]] | Callable[[Any, dict[str, Any]], dict[str, Any]]
+
+_Path = tuple[str | int, ...]
+
+
+class _ValueSlot:
+    """Probe passed as the command value: any use besides placing it into the payload raises."""
+
+    def _refuse(self, *args, **kwargs):
+        raise TypeError("command value is transformed")
+
+    __bool__ = __int__ = __float__ = __index__ = __str__ = __format__ = _refuse
+    __eq__ = __ne__ = __lt__ = __le__ = __gt__ = __ge__ = _refuse
+    __hash__ = object.__hash__
+
+
+# values a prerendered template is checked against, a command that branches on the value
+# (value is None, isinstance(value, ...)) builds something else for one of them
+_PROBE_VALUES = (None, False, True, 0, 1, -1, 2.5, "1")
+
+
+class EcoflowCommandBuilder:
+    """
+    Resolves the arity of a command callable once and, for value-only commands that place the value
+    as is (no int(value), value * 50, ...), pre-renders the static part of the payload.
+    Building such a command copies the template's dicts and lists and puts the value into its slots,
+    every built command is a new payload the caller may change.
+    """
+
+    __slots__ = ("__command", "__with_params", "__template", "__slots")
+
+    def __init__(self, command: CommandFunc):
+        self.__command = command
+        self.__with_params = len(inspect.signature(command).parameters) == 2
+        self.__template: dict[str, Any] | None = None
+        self.__slots: list[_Path] = []
+        if not self.__with_params:
+            self.__prerender()
+
+    @property
+    def prerendered(self) -> bool:
+        return self.__template is not None
+
+    def build(self, value: Any, params: dict[str, Any]) -> dict[str, Any]:
+        if self.__template is None:
+            if self.__with_params:
+                return self.__command(value, params)
+            return self.__command(value)
+
+        result = _copy(self.__template)
+        for path in self.__slots:
+            container = result
+            for key in path[:-1]:
+                container = container[key]
+            container[path[-1]] = value
+        return result
+
+    def __prerender(self):
+        slot = _ValueSlot()
+        try:
+            template = self.__command(slot)
+        except Exception:  # pylint: disable=broad-except
+            # value is converted or inspected: keep calling the command
+            return
+        if not isinstance(template, dict):
+            return
+
+        slots: list[_Path] = []
+        if not self.__find_slots(template, slot, (), slots):
+            return
+        self.__template = template
+        self.__slots = slots
+        if not self.__linear():
+            self.__template = None
+            self.__slots = []
+
+    def __linear(self) -> bool:
+        """The template builds the same payloads as the command, whatever the value is."""
+        for value in _PROBE_VALUES:
+            try:
+                expected = self.__command(value)
+            except Exception:  # pylint: disable=broad-except
+                return False
+            if self.build(value, {}) != expected:
+                return False
+        return True
+
+    @classmethod
+    def __find_slots(cls, node: Any, slot: _ValueSlot, path: _Path, slots: list[_Path]) -> bool:
+        if isinstance(node, dict):
+            for k, v in node.items():
+                if k is slot or not cls.__find_slots(v, slot, path + (k,), slots):
+                    return False
+        elif isinstance(node, list):
+            for i, v in enumerate(node):
+                if not cls.__find_slots(v, slot, path + (i,), slots):
+                    return False
+        elif node is slot:
+            slots.append(path)
+        elif isinstance(node, tuple | set):
+            # immutable containers can't be patched in place
+            return all(v is not slot for v in node)
+        return True
+
+
+def _copy(node: Any) -> Any:
+    if isinstance(node, dict):
+        return {k: _copy(v) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_copy(v) for v in node]
+    return node
@@ -0,0 +1,52 @@
+"""
+ecoflow_cloud.ingest_stats service: returns the counters of the MQTT ingest path of every config entry, for the
+account and per device. They are not sensors on purpose, the recorder would store every state they write.
+"""
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+
+from .api import EcoflowApiClient
+
+SERVICE_INGEST_STATS = "ingest_stats"
+
+
+def ingest_stats(client: EcoflowApiClient, now: float) -> dict[str, Any]:
+    """Rates are messages/s since the previous call of the service, None on the first one."""
+    values: dict[str, Any] = {}
+    if client.mqtt_client is not None:
+        metrics = client.mqtt_client.ingest_metrics()
+        values["queue"] = client.mqtt_client.ingest_stats()
+        values["rates"] = metrics.rates(now)
+        values.update(metrics.stats())
+    values["devices"] = {
+        sn: {
+            "rates": device.data.metrics.rates(now),
+            **device.data.metrics.stats(),
+            "commands": device.data.commands.stats(),
+        }
+        for sn, device in client.devices.items()
+    }
+    return values
+
+
+def async_register_services(hass: HomeAssistant):
+    from . import ECOFLOW_DOMAIN
+
+    if hass.services.has_service(ECOFLOW_DOMAIN, SERVICE_INGEST_STATS):
+        return
+
+    async def handle_ingest_stats(call: ServiceCall) -> ServiceResponse:
+        now = time.monotonic()
+        return {entry_id: ingest_stats(client, now) for entry_id, client in hass.data[ECOFLOW_DOMAIN].items()}
+
+    hass.services.async_register(ECOFLOW_DOMAIN, SERVICE_INGEST_STATS, handle_ingest_stats,
+                                 supports_response=SupportsResponse.ONLY)
+
+
+@callback
+def async_remove_services(hass: HomeAssistant):
+    from . import ECOFLOW_DOMAIN
+
+    hass.services.async_remove(ECOFLOW_DOMAIN, SERVICE_INGEST_STATS)
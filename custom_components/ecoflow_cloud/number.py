@@ -77,6 +77,12 @@ class BatteryBackupLevel(MinMaxLevelEntity):
         self._min_key = min_key
         self._max_key = max_key
 
+    def data_keys(self) -> set[str] | None:
+        keys = super().data_keys()
+        if keys is not None:
+            keys.update((self._min_key, self._max_key))
+        return keys
+
     def _updated(self, data: dict[str, Any]):
         if self._min_key in data:
             self._attr_native_min_value = int(data[self._min_key]) + 5  # min + 5%
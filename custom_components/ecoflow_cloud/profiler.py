@@ -0,0 +1,291 @@
+"""
+ecoflow_cloud.profile service: profiles the hot path of the integration for a while with cProfile
+(MQTT receive and decode, coordinator updates, entity updates), writes a .prof file to the config
+directory and keeps a top-N summary for the diagnostics.
+"""
+import asyncio
+import cProfile
+import functools
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from typing import Any, Callable
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_PROFILE = "profile"
+ATTR_DURATION = "duration"
+ATTR_TOP = "top"
+
+DEFAULT_PROFILE_DURATION = 30
+DEFAULT_PROFILE_TOP = 20
+
+PROFILE_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_DURATION, default=DEFAULT_PROFILE_DURATION): vol.All(vol.Coerce(float), vol.Range(min=1, max=600)),
+    vol.Optional(ATTR_TOP, default=DEFAULT_PROFILE_TOP): vol.All(vol.Coerce(int), vol.Range(min=1, max=200)),
+})
+
+
+def _profiled_methods() -> list[tuple[type, str]]:
+    from .api.ecoflow_mqtt import EcoflowMQTTClient
+    from .devices import EcoflowDeviceUpdateCoordinator
+    from .entities import EcoFlowDictEntity
+
+    return [
+        (EcoflowMQTTClient, "_on_message"),  # paho network thread
+        (EcoflowMQTTClient, "_process_message"),  # ingest worker: decoding, data holder update
+        (EcoflowDeviceUpdateCoordinator, "_async_update_data"),
+        (EcoFlowDictEntity, "_updated"),
+    ]
+
+
+# from 3.12 on cProfile hooks into sys.monitoring, which is interpreter wide: one profile sees every thread
+# and a second enabled one raises ValueError
+GLOBAL_PROFILE = sys.version_info >= (3, 12)
+
+
+class _TimedCoroutine:
+    """Drives a coroutine and times only its steps, not the event loop work while it waits."""
+
+    def __init__(self, coro, record: Callable[[float], None], run: Callable):
+        self.__coro = coro
+        self.__record = record
+        self.__run = run
+
+    def __await__(self):
+        coro, run = self.__coro, self.__run
+        value, error = None, None
+        while True:
+            start = time.perf_counter()
+            try:
+                if error is None:
+                    yielded = run(coro.send, value)
+                else:
+                    yielded = run(coro.throw, error)
+            except StopIteration as stop:
+                self.__record(time.perf_counter() - start)
+                return stop.value
+            except BaseException:
+                self.__record(time.perf_counter() - start)
+                raise
+            self.__record(time.perf_counter() - start)
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:
+                value, error = None, e
+
+
+class EcoflowProfiler:
+    """
+    Wraps the profiled methods on their classes while running, counting their calls and timing their
+    synchronous sections. From Python 3.12 on one profile is enabled for the whole run and sees every thread.
+    Before, a profile only sees the thread it was enabled on, so every thread gets its own one, switched on
+    around the synchronous wrapped calls only, and they are merged when stopping.
+    """
+
+    def __init__(self):
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+        self.__profile: cProfile.Profile | None = None
+        self.__profiles: dict[int, cProfile.Profile] = {}
+        self.__originals: list[tuple[type, str, Any]] = []
+        self.__calls: dict[str, int] = {}
+        self.__seconds: dict[str, float] = {}
+        self.last_result: dict[str, Any] | None = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self.__originals)
+
+    def start(self, methods: list[tuple[type, str]]):
+        self.__profiles = {}
+        self.__calls = {}
+        self.__seconds = {}
+        if GLOBAL_PROFILE:
+            self.__profile = cProfile.Profile()
+            self.__profile.enable()
+        for cls, name in methods:
+            original = cls.__dict__[name]
+            self.__originals.append((cls, name, original))
+            setattr(cls, name, self.__wrap(f"{cls.__name__}.{name}", original))
+
+    def stop(self) -> tuple[pstats.Stats | None, dict[str, dict[str, float]]]:
+        for cls, name, original in reversed(self.__originals):
+            setattr(cls, name, original)
+        self.__originals = []
+
+        if self.__profile is not None:
+            self.__profile.disable()
+            profiles = [self.__profile]
+            self.__profile = None
+        else:
+            with self.__lock:
+                profiles = list(self.__profiles.values())
+                self.__profiles = {}
+        stats = None
+        for profile in profiles:
+            if stats is None:
+                stats = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+        sections = {label: {"calls": calls, "sync_ms": round(self.__seconds.get(label, 0.0) * 1000, 3)}
+                    for label, calls in self.__calls.items()}
+        return stats, sections
+
+    def __record(self, label: str, seconds: float):
+        self.__seconds[label] = self.__seconds.get(label, 0.0) + seconds
+
+    def __thread_profile(self) -> cProfile.Profile:
+        ident = threading.get_ident()
+        profile = self.__profiles.get(ident)
+        if profile is None:
+            with self.__lock:
+                profile = self.__profiles.setdefault(ident, cProfile.Profile())
+        return profile
+
+    def __call_profiled(self, func: Callable, *args, **kwargs):
+        """Below 3.12: this thread's profile is on for the call, unless an outer profiled call switched it on."""
+        local = self.__local
+        if GLOBAL_PROFILE or getattr(local, "active", False):
+            return func(*args, **kwargs)
+        profile = self.__thread_profile()
+        profile.enable()
+        local.active = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            local.active = False
+            profile.disable()
+
+    def __wrap(self, label: str, func: Callable) -> Callable:
+        calls = self.__calls
+        record = functools.partial(self.__record, label)
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                calls[label] = calls.get(label, 0) + 1
+                return await _TimedCoroutine(func(*args, **kwargs), record, self.__call_profiled)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            calls[label] = calls.get(label, 0) + 1
+            start = time.perf_counter()
+            try:
+                return self.__call_profiled(func, *args, **kwargs)
+            finally:
+                record(time.perf_counter() - start)
+        return wrapper
+
+
+def _function_key(func: Callable) -> tuple[str, int, str]:
+    code = func.__code__
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+def _reachable(stats: pstats.Stats, roots: set[tuple[str, int, str]]) -> set[tuple[str, int, str]]:
+    """The profiled methods and everything they called, the rest of the process is left out."""
+    callees: dict[tuple[str, int, str], list[tuple[str, int, str]]] = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller in callers:
+            callees.setdefault(caller, []).append(func)
+    seen = set(roots) & stats.stats.keys()
+    todo = list(seen)
+    while todo:
+        for func in callees.get(todo.pop(), ()):
+            if func not in seen:
+                seen.add(func)
+                todo.append(func)
+    return seen
+
+
+def summarize(stats: pstats.Stats | None, top: int, roots: set[tuple[str, int, str]]) -> list[dict[str, Any]]:
+    """
+    The functions with the most own time below the profiled methods, with their call counts and cumulative
+    time. Functions also called from elsewhere are counted with all of their calls.
+    """
+    if stats is None:
+        return []
+    reachable = _reachable(stats, roots)
+    rows = []
+    for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        if (filename, line, name) not in reachable:
+            continue
+        rows.append({
+            # the package directory tells the many __init__.py apart
+            "function": f"{os.path.join(os.path.basename(os.path.dirname(filename)), os.path.basename(filename))}"
+                        f":{line}({name})",
+            "calls": calls,
+            "own_ms": round(own * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3),
+        })
+    rows.sort(key=lambda r: r["own_ms"], reverse=True)
+    return rows[:top]
+
+
+_profiler = EcoflowProfiler()
+
+
+def last_profile() -> dict[str, Any] | None:
+    return _profiler.last_result
+
+
+async def async_profile(hass: HomeAssistant, duration: float, top: int) -> dict[str, Any]:
+    if _profiler.running:
+        raise HomeAssistantError("A profile of ecoflow_cloud is already running")
+
+    methods = _profiled_methods()
+    roots = {_function_key(cls.__dict__[name]) for cls, name in methods}
+    started = dt.utcnow()
+    start = time.perf_counter()
+    _profiler.start(methods)
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        stats, sections = _profiler.stop()
+    elapsed = time.perf_counter() - start
+
+    path = None
+    if stats is not None:
+        path = hass.config.path(f"ecoflow_cloud_profile_{started.strftime('%Y%m%d_%H%M%S')}.prof")
+        await hass.async_add_executor_job(stats.dump_stats, path)
+
+    result = {
+        "started": started.isoformat(),
+        "duration_sec": round(elapsed, 1),
+        "file": path,
+        "sections": sections,
+        "top": summarize(stats, top, roots),
+    }
+    _profiler.last_result = result
+    _LOGGER.info("Profiled ecoflow_cloud for %.0f s, %s", elapsed, path or "no calls recorded")
+    return result
+
+
+@callback
+def async_register_services(hass: HomeAssistant):
+    from . import ECOFLOW_DOMAIN
+
+    if hass.services.has_service(ECOFLOW_DOMAIN, SERVICE_PROFILE):
+        return
+
+    async def handle_profile(call: ServiceCall):
+        await async_profile(hass, call.data[ATTR_DURATION], call.data[ATTR_TOP])
+
+    hass.services.async_register(ECOFLOW_DOMAIN, SERVICE_PROFILE, handle_profile, schema=PROFILE_SCHEMA)
+
+
+@callback
+def async_remove_services(hass: HomeAssistant):
+    from . import ECOFLOW_DOMAIN
+
+    hass.services.async_remove(ECOFLOW_DOMAIN, SERVICE_PROFILE)
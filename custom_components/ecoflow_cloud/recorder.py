@@ -1,9 +1,12 @@
 from homeassistant.core import callback, HomeAssistant
 
 from custom_components.ecoflow_cloud import ATTR_STATUS_UPDATES, ATTR_STATUS_DATA_LAST_UPDATE, \
-    ATTR_STATUS_LAST_UPDATE, ATTR_STATUS_PHASE, ATTR_QUOTA_REQUESTS
+    ATTR_STATUS_LAST_UPDATE, ATTR_STATUS_PHASE, ATTR_QUOTA_REQUESTS, ATTR_QUOTA_SWEEP_LATENCY
 
 
+# Only attributes can be excluded here, every state an entity writes is recorded. That is why the ingest
+# counters are not entities: the ecoflow_cloud.ingest_stats service and the diagnostics return them.
 @callback
 def exclude_attributes(hass: HomeAssistant) -> set[str]:
-    return {ATTR_STATUS_UPDATES, ATTR_STATUS_DATA_LAST_UPDATE, ATTR_STATUS_LAST_UPDATE, ATTR_STATUS_PHASE, ATTR_QUOTA_REQUESTS}
+    return {ATTR_STATUS_UPDATES, ATTR_STATUS_DATA_LAST_UPDATE, ATTR_STATUS_LAST_UPDATE, ATTR_STATUS_PHASE, ATTR_QUOTA_REQUESTS,
+            ATTR_QUOTA_SWEEP_LATENCY}
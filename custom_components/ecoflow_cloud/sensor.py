@@ -15,10 +15,11 @@ from homeassistant.util import dt
 
 from . import ECOFLOW_DOMAIN, ATTR_STATUS_SN, ATTR_STATUS_DATA_LAST_UPDATE, ATTR_STATUS_LAST_UPDATE, \
     ATTR_STATUS_RECONNECTS, \
-    ATTR_STATUS_PHASE, ATTR_MQTT_CONNECTED, ATTR_QUOTA_REQUESTS
+    ATTR_STATUS_PHASE, ATTR_MQTT_CONNECTED, ATTR_QUOTA_REQUESTS, ATTR_QUOTA_SWEEP_LATENCY
 from .api import EcoflowApiClient
 from .devices import BaseDevice
 from .entities import BaseSensorEntity, EcoFlowAbstractEntity, EcoFlowDictEntity
+from .entities.coalescer import FILTER_GROUP_POWER, FILTER_GROUP_MILLIVOLT, FILTER_GROUP_TEMPERATURE
 from custom_components.ecoflow_cloud.battery_manager import (
     BatterySensorManager
 )
@@ -38,21 +39,18 @@ async def async_setup_entry(hass, entry, async_add_entities):
         static_sensors = device.sensors(client)
         async_add_entities(static_sensors)
 
-        # 2) BatterySensorManager anlegen
+        # 2) BatterySensorManager nur für Geräte, die Batteriemodule (bp_addr.*) melden
+        if device.battery_pack_prefix() is None:
+            continue
         manager = BatterySensorManager(
             add_entities_callback=async_add_entities, 
             device=device, 
             coordinator=device.coordinator
         )
 
-        # 3) Koordinator-Listener registrieren
-        # => Jedes Mal bei Update => rufe manager.process_quota_data + manager.update_existing_sensors
-        def after_update():
-            params = device.data.params
-            manager.process_quota_data(params)
-            manager.update_existing_sensors()
-
-        device.coordinator.async_add_listener(after_update)
+        # 3) Koordinator-Listener pro Gerät registrieren (gebundene Methode statt Closure über die Schleifenvariablen)
+        # => bei jedem Update nur die neu gesehenen bp_addr.* Keys prüfen, die Batterie-Sensoren hören auf ihre Sub-Keys
+        client.device_listeners.add(device, manager.discover)
         # => Done
 
 
@@ -134,6 +132,7 @@ class TempSensorEntity(BaseSensorEntity):
     _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_native_value = -1
+    _filter_group = FILTER_GROUP_TEMPERATURE
 
 class CelsiusSensorEntity(TempSensorEntity):
     def _update_value(self, val: Any) -> bool:
@@ -162,6 +161,7 @@ class MilliVoltSensorEntity(BaseSensorEntity):
     _attr_suggested_unit_of_measurement = UnitOfElectricPotential.VOLT
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_native_value = 3
+    _filter_group = FILTER_GROUP_MILLIVOLT
 
 class BeSensorEntity(BaseSensorEntity):
     def _update_value(self, val: Any) -> bool:
@@ -173,6 +173,7 @@ class BeMilliVoltSensorEntity(BeSensorEntity):
     _attr_native_unit_of_measurement = UnitOfElectricPotential.MILLIVOLT
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_native_value = 0
+    _filter_group = FILTER_GROUP_MILLIVOLT
 
 class InMilliVoltSensorEntity(MilliVoltSensorEntity):
     _attr_icon = "mdi:transmission-tower-import"
@@ -225,6 +226,7 @@ class WattsSensorEntity(BaseSensorEntity):
     _attr_native_unit_of_measurement = UnitOfPower.WATT
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_native_value = 0
+    _filter_group = FILTER_GROUP_POWER
 
 class EnergySensorEntity(BaseSensorEntity):
     _attr_device_class = SensorDeviceClass.ENERGY
@@ -324,7 +326,7 @@ class StatusSensorEntity(SensorEntity, EcoFlowAbstractEntity):
         self._online = -1
         self._last_update = dt.utcnow().replace(year=2000, month=1, day=1, hour=0, minute=0, second=0)
         self._skip_count = 0
-        self._offline_skip_count = int(120 / self.coordinator.update_interval.seconds) # 2 minutes
+        self._offline_skip_count = int(120 / self.coordinator.refresh_interval.seconds) # 2 minutes
         self._attrs = OrderedDict[str, Any]()
         self._attrs[ATTR_STATUS_SN] = self._device.device_info.sn
         self._attrs[ATTR_STATUS_DATA_LAST_UPDATE] = None
@@ -342,6 +344,11 @@ class StatusSensorEntity(SensorEntity, EcoFlowAbstractEntity):
         else:
             self._skip_count += 1
 
+        sweep_latency = self._client.sweep_stats()["last_sweep_latency_ms"]
+        if sweep_latency is not None and self._attrs.get(ATTR_QUOTA_SWEEP_LATENCY) != sweep_latency:
+            self._attrs[ATTR_QUOTA_SWEEP_LATENCY] = sweep_latency
+            changed = True
+
         changed = self._actualize_status() or changed
 
         if changed:
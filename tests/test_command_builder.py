@@ -0,0 +1,33 @@
+"""Prerendered command templates of EcoflowCommandBuilder."""
+from custom_components.ecoflow_cloud.entities.command import EcoflowCommandBuilder
+
+
+def test_built_commands_do_not_share_the_template():
+    builder = EcoflowCommandBuilder(lambda value: {"moduleType": 1, "params": {"enabled": value, "id": {"x": 1}}})
+    assert builder.prerendered
+
+    command = builder.build(1, {})
+    # what docs/gen.py does to render the value
+    command["params"]["enabled"] = "VALUE"
+    command["params"]["id"]["x"] = 2
+
+    assert builder.build(0, {}) == {"moduleType": 1, "params": {"enabled": 0, "id": {"x": 1}}}
+
+
+def test_commands_branching_on_the_value_are_called():
+    on_none = EcoflowCommandBuilder(lambda value: {"params": {}} if value is None else {"params": {"watts": value}})
+    on_type = EcoflowCommandBuilder(
+        lambda value: {"params": {"enabled": value}} if isinstance(value, bool) else {"params": {"watts": value}})
+
+    assert not on_none.prerendered
+    assert on_none.build(None, {}) == {"params": {}}
+    assert not on_type.prerendered
+    assert on_type.build(True, {}) == {"params": {"enabled": True}}
+    assert on_type.build(400, {}) == {"params": {"watts": 400}}
+
+
+def test_transformed_values_are_called():
+    builder = EcoflowCommandBuilder(lambda value: {"params": {"watts": int(value * 10)}})
+
+    assert not builder.prerendered
+    assert builder.build(1.5, {}) == {"params": {"watts": 15}}
@@ -0,0 +1,57 @@
+"""The account coordinator's tick drives the device coordinators, which have no timers of their own."""
+import asyncio
+import datetime
+from unittest.mock import AsyncMock, Mock
+
+from benchmarks.stubs import StubHass
+from custom_components.ecoflow_cloud.devices import EcoflowAccountUpdateCoordinator, EcoflowDeviceUpdateCoordinator
+from custom_components.ecoflow_cloud.devices.data_holder import EcoflowDataHolder
+
+
+def run(test):
+    async def with_hass():
+        await test(StubHass(asyncio.get_running_loop()))
+    asyncio.run(with_hass())
+
+
+def create_client(hass: StubHass, refresh_periods: dict[str, int]) -> Mock:
+    devices = {}
+    for sn, period in refresh_periods.items():
+        device = Mock()
+        device.coordinator = EcoflowDeviceUpdateCoordinator(hass, EcoflowDataHolder(), period, None)
+        devices[sn] = device
+    return Mock(devices=devices, quota_sweep=AsyncMock())
+
+
+def test_device_coordinators_schedule_no_refresh():
+    async def test(hass: StubHass):
+        coordinator = create_client(hass, {"SN0": 30}).devices["SN0"].coordinator
+        remove = coordinator.async_add_listener(lambda: None)
+
+        assert coordinator.update_interval is None
+        assert coordinator.refresh_interval == datetime.timedelta(seconds=30)
+        assert coordinator._unsub_refresh is None
+        remove()
+
+    run(test)
+
+
+def test_tick_sweeps_and_refreshes_only_the_due_devices():
+    async def test(hass: StubHass):
+        client = create_client(hass, {"FAST": 30, "SLOW": 90})
+        account = EcoflowAccountUpdateCoordinator(hass, client)
+        refreshed = []
+        for sn, device in client.devices.items():
+            device.coordinator.async_add_listener(lambda sn=sn: refreshed.append(sn))
+
+        await account.async_refresh()
+        start = datetime.datetime.now(datetime.timezone.utc)
+
+        assert account.update_interval is None
+        assert account.tick == datetime.timedelta(seconds=30)
+        client.quota_sweep.assert_awaited_once_with(["FAST", "SLOW"])
+        assert sorted(refreshed) == ["FAST", "SLOW"]
+        assert account.due_devices(start + datetime.timedelta(seconds=30)) == ["FAST"]
+        assert account.due_devices(start + datetime.timedelta(seconds=90)) == ["FAST", "SLOW"]
+
+    run(test)
@@ -0,0 +1,109 @@
+"""Per-device coordinator listeners (EcoflowDeviceListeners) and the battery pack discovery wired through them."""
+import asyncio
+from collections import Counter
+from unittest.mock import Mock
+
+from benchmarks.stubs import CountingDataHolder, StubHass, quota_message
+from custom_components.ecoflow_cloud import ECOFLOW_DOMAIN
+from custom_components.ecoflow_cloud.devices import EcoflowDeviceInfo, EcoflowDeviceListeners, \
+    EcoflowDeviceUpdateCoordinator
+from custom_components.ecoflow_cloud.devices.public.powerocean import PowerOcean
+from custom_components.ecoflow_cloud.sensor import async_setup_entry
+
+
+def create_devices(hass: StubHass, count: int, reads: Counter) -> dict[str, PowerOcean]:
+    devices = {}
+    for i in range(count):
+        sn = f"PO{i:03d}"
+        device = PowerOcean(EcoflowDeviceInfo(public_api=True, sn=sn, name=sn, device_type="PowerOcean", status=1,
+                                              data_topic=f"/open/{sn}/quota", set_topic="S", set_reply_topic="R",
+                                              get_topic=None, get_reply_topic=None))
+        device.data = CountingDataHolder(sn, reads)
+        device.coordinator = EcoflowDeviceUpdateCoordinator(hass, device.data, 30, None)
+        # each device reports its own battery packs
+        device.data.update_data(device._prepare_data(quota_message([f"{sn}-BAT{j}" for j in range(2)])))
+        devices[sn] = device
+    return devices
+
+
+def run(test):
+    async def with_hass():
+        await test(StubHass(asyncio.get_running_loop()))
+    asyncio.run(with_hass())
+
+
+def test_refresh_runs_only_the_listeners_of_that_device():
+    async def test(hass: StubHass):
+        devices = create_devices(hass, 2, Counter())
+        listeners = EcoflowDeviceListeners()
+        calls = []
+        for sn, device in devices.items():
+            listeners.add(device, lambda sn=sn: calls.append(sn))
+
+        await devices["PO001"].coordinator.async_refresh()
+
+        assert calls == ["PO001"]
+        listeners.remove_all()
+
+    run(test)
+
+
+def test_remove_unsubscribes_only_that_device():
+    async def test(hass: StubHass):
+        devices = create_devices(hass, 2, Counter())
+        listeners = EcoflowDeviceListeners()
+        calls = []
+        for sn, device in devices.items():
+            listeners.add(device, lambda sn=sn: calls.append(sn))
+
+        listeners.remove("PO000")
+        await devices["PO000"].coordinator.async_refresh()
+        await devices["PO001"].coordinator.async_refresh()
+
+        assert listeners.count("PO000") == 0
+        assert listeners.count("PO001") == 1
+        assert calls == ["PO001"]
+        listeners.remove_all()
+
+    run(test)
+
+
+def test_remove_all_unsubscribes_every_device():
+    async def test(hass: StubHass):
+        devices = create_devices(hass, 2, Counter())
+        listeners = EcoflowDeviceListeners()
+        calls = []
+        for sn, device in devices.items():
+            listeners.add(device, lambda sn=sn: calls.append(sn))
+
+        listeners.remove_all()
+        for device in devices.values():
+            await device.coordinator.async_refresh()
+
+        assert calls == []
+        assert all(listeners.count(sn) == 0 for sn in devices)
+
+    run(test)
+
+
+def test_battery_discovery_reads_only_its_own_device():
+    async def test(hass: StubHass):
+        reads = Counter()
+        devices = create_devices(hass, 3, reads)
+        client = Mock(devices=devices, device_listeners=EcoflowDeviceListeners(), account_coordinator=None)
+        hass.data[ECOFLOW_DOMAIN] = {"entry": client}
+        added = []
+        await async_setup_entry(hass, Mock(entry_id="entry"), added.extend)
+
+        for sn, device in devices.items():
+            assert client.device_listeners.count(sn) == 1
+            reads.clear()
+            await device.coordinator.async_refresh()
+
+            assert reads == Counter({sn: 1})
+            own = [e._battery_key for e in added
+                   if getattr(e, "_battery_key", "").startswith(f"bp_addr.{sn}-")]
+            assert len(own) == 2
+        client.device_listeners.remove_all()
+
+    run(test)
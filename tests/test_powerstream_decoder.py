@@ -0,0 +1,42 @@
+"""PowerStream heartbeat decoding with the reusable per-device decoders."""
+import threading
+
+from benchmarks.frames import powerstream_heartbeat
+from custom_components.ecoflow_cloud.devices import EcoflowDeviceInfo
+from custom_components.ecoflow_cloud.devices.internal.powerstream import PowerStream
+
+
+def create_device(sn: str) -> PowerStream:
+    return PowerStream(EcoflowDeviceInfo(public_api=False, sn=sn, name=sn, device_type="POWERSTREAM", status=1,
+                                         data_topic=f"/app/device/property/{sn}", set_topic="S",
+                                         set_reply_topic="R", get_topic=None, get_reply_topic=None))
+
+
+def test_concatenated_frames_are_all_decoded():
+    params = create_device("PS0")._prepare_data(powerstream_heartbeat(1) + powerstream_heartbeat(2))["params"]
+
+    # the second frame wins
+    assert params["pv1_input_volt"] == 331 + 2
+    assert params["inv_output_watts"] == 2650 + 2
+
+
+def test_devices_decode_concurrently_without_sharing_messages():
+    frames = {"PS0": powerstream_heartbeat(0), "PS1": powerstream_heartbeat(3)}
+    expected = {"PS0": 2650, "PS1": 2653}
+    mismatches = []
+
+    def worker(sn: str):
+        # one ingest worker per config entry, each with its own PowerStream
+        device = create_device(sn)
+        for _ in range(2000):
+            params = device._prepare_data(frames[sn])["params"]
+            if params["inv_output_watts"] != expected[sn]:
+                mismatches.append(sn)
+
+    threads = [threading.Thread(target=worker, args=(sn,)) for sn in frames]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert mismatches == []
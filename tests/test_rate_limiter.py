@@ -0,0 +1,63 @@
+"""Waiters of the rate limiter are served by priority and only woken when a token is theirs."""
+import asyncio
+
+from custom_components.ecoflow_cloud.api.rate_limiter import EcoflowRateLimiter, PRIORITY_COMMAND, PRIORITY_SWEEP
+
+
+def count_timers(loop: asyncio.AbstractEventLoop) -> list:
+    timers = []
+    call_later = loop.call_later
+
+    def counting(delay, callback, *args, **kwargs):
+        timers.append(delay)
+        return call_later(delay, callback, *args, **kwargs)
+
+    loop.call_later = counting
+    return timers
+
+
+def test_waiters_are_served_by_priority():
+    async def test():
+        limiter = EcoflowRateLimiter(rate=200, burst=1)
+        await limiter.acquire()
+        served = []
+
+        async def request(name: str, priority: int):
+            await limiter.acquire(priority)
+            served.append(name)
+
+        tasks = [asyncio.create_task(request(f"sweep{i}", PRIORITY_SWEEP)) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("command", PRIORITY_COMMAND)))
+        await asyncio.gather(*tasks)
+        assert served == ["command", "sweep0", "sweep1", "sweep2"]
+        assert limiter.stats()["queue_length"] == 0
+    asyncio.run(test())
+
+
+def test_wakeups_do_not_grow_with_the_queue():
+    async def test():
+        limiter = EcoflowRateLimiter(rate=500, burst=1)
+        await limiter.acquire()
+        timers = count_timers(asyncio.get_running_loop())
+        await asyncio.gather(*(limiter.acquire(PRIORITY_SWEEP) for _ in range(50)))
+        # one timer per token, the waiters themselves never poll
+        assert len(timers) == 50
+        assert all(delay <= 1 / 500 for delay in timers)
+    asyncio.run(test())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def test():
+        limiter = EcoflowRateLimiter(rate=100, burst=1)
+        await limiter.acquire()
+        cancelled = asyncio.create_task(limiter.acquire(PRIORITY_COMMAND))
+        waiting = asyncio.create_task(limiter.acquire(PRIORITY_SWEEP))
+        await asyncio.sleep(0)
+        assert limiter.stats()["queue_length"] == 2
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        assert limiter.stats()["queue_length"] == 1
+        await asyncio.wait_for(waiting, 1)
+        assert limiter.stats()["queue_length"] == 0
+    asyncio.run(test())
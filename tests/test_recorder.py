@@ -0,0 +1,61 @@
+"""What the recorder platform keeps out of the database, and the ingest counters that are not entities at all."""
+import asyncio
+from unittest.mock import Mock
+
+from custom_components.ecoflow_cloud import ECOFLOW_DOMAIN, ATTR_STATUS_SN, ATTR_MQTT_CONNECTED, ATTR_STATUS_RECONNECTS, \
+    ATTR_QUOTA_SWEEP_LATENCY
+from custom_components.ecoflow_cloud.api.ingest_metrics import EcoflowIngestMetrics
+from custom_components.ecoflow_cloud.api.pending_commands import EcoflowPendingCommands
+from custom_components.ecoflow_cloud.devices import MSG_KIND_DATA, PAYLOAD_CODEC_JSON
+from custom_components.ecoflow_cloud.ingest_stats import ingest_stats
+from custom_components.ecoflow_cloud.recorder import exclude_attributes
+from custom_components.ecoflow_cloud.sensor import StatusSensorEntity, QuotaStatusSensorEntity, \
+    ReconnectStatusSensorEntity, async_setup_entry
+
+
+def create_device(sn: str):
+    device = Mock(battery_pack_prefix=Mock(return_value=None), sensors=Mock(return_value=[]))
+    device.device_info.sn = sn
+    device.device_info.public_api = True
+    device.coordinator.refresh_interval.seconds = 30
+    device.data.metrics = EcoflowIngestMetrics()
+    device.data.commands = EcoflowPendingCommands()
+    return device
+
+
+def test_status_attributes_that_change_are_excluded():
+    excluded = exclude_attributes(Mock())
+    for entity_class in (StatusSensorEntity, QuotaStatusSensorEntity, ReconnectStatusSensorEntity):
+        attributes = set(entity_class(Mock(), create_device("SN")).extra_state_attributes)
+        # constant or only changing with the status or on a reconnect, worth keeping in the history
+        assert attributes - {ATTR_STATUS_SN, ATTR_MQTT_CONNECTED, ATTR_STATUS_RECONNECTS} <= excluded
+    assert ATTR_QUOTA_SWEEP_LATENCY in excluded
+
+
+def test_no_sensor_is_fed_by_the_ingest_counters():
+    device = create_device("SN")
+    client = Mock(devices={"SN": device})
+    added = []
+    asyncio.run(async_setup_entry(Mock(data={ECOFLOW_DOMAIN: {"entry": client}}), Mock(entry_id="entry"),
+                                  added.extend))
+
+    # only what the device declares, the recorder would keep every state an ingest sensor wrote
+    assert added == []
+
+
+def test_ingest_stats_report_the_counters_instead():
+    device = create_device("SN")
+    device.data.metrics.message(MSG_KIND_DATA, PAYLOAD_CODEC_JSON, 0.0002)
+    mqtt_client = Mock(ingest_stats=Mock(return_value={"queue_depth": 0}))
+    mqtt_client.ingest_metrics.return_value = EcoflowIngestMetrics()
+    client = Mock(mqtt_client=mqtt_client, devices={"SN": device})
+
+    first = ingest_stats(client, 100.0)
+    device.data.metrics.message(MSG_KIND_DATA, PAYLOAD_CODEC_JSON, 0.0002)
+    second = ingest_stats(client, 102.0)
+
+    assert first["queue"] == {"queue_depth": 0}
+    assert first["devices"]["SN"]["rates"] is None
+    assert first["devices"]["SN"]["messages"] == {MSG_KIND_DATA: 1}
+    assert second["devices"]["SN"]["rates"] == {MSG_KIND_DATA: 0.5}
+    assert second["devices"]["SN"]["commands"]["pending"] == 0